@@ -1,50 +1,222 @@
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify, json as flask_json, stream_with_context
 from flask_cors import CORS
 from controllers.userController import UserController
-from controllers.transactionController import TransactionController
-from database.connection import create_connection
+from controllers.transactionController import TransactionController, parse_ids
+from controllers.shopController import ShopController
+from controllers.statsController import StatsController
+from database.connection import create_connection, pool_stats
+from database.streaming import stream_rows
+from utils.orderQueue import order_queue_from_env, QueueFull
+from utils.orderCounters import order_counters_from_env
+from utils.metrics import metrics, instrument_flask
+from utils.queryTracer import tracer
+from utils.idempotency import idempotency_store_from_env
+from utils.tokenCache import token_cache_from_env
+from utils.streaming import json_object_stream
+from utils.serialization import RowJSONEncoder, field_converter
+from utils.eventBus import event_bus_from_env
+from utils.emitScheduler import emit_scheduler_from_env
+from utils.eventReplay import replay_buffer_from_env
 from functools import wraps
 import jwt
 from flask_socketio import SocketIO, emit, join_room 
-from datetime import datetime, timedelta
-from decimal import Decimal
+from datetime import datetime
 import json
+import logging
+import os
+import socket
+
+logging.basicConfig(level=os.getenv('LOG_LEVEL', 'INFO').upper())
+logger = logging.getLogger(__name__)
 
 app = Flask(__name__)
+instrument_flask(app)
+# QUERY_TRACE=1: per-request statement traces, slow-query and N+1 logging
+tracer.install(app)
+# Rows are jsonified as fetched: Decimal, datetime and TIME values are
+# encoded by the app's encoder instead of per-route conversion loops
+app.json_encoder = RowJSONEncoder
 CORS(app)
-socketio = SocketIO(app, cors_allowed_origins="*", async_mode='threading')
+# threading for `python app.py`; wsgi.py / gunicorn.conf.py switch to eventlet.
+# Several worker processes share room events through EVENT_BUS=redis below;
+# SOCKETIO_MESSAGE_QUEUE only remains for emits made outside the bus.
+socketio = SocketIO(
+    app,
+    cors_allowed_origins="*",
+    async_mode=os.getenv('SOCKETIO_ASYNC_MODE', 'threading'),
+    message_queue=os.getenv('SOCKETIO_MESSAGE_QUEUE') or None
+)
+
+# Recent events per room, so a reconnecting client can catch up on what it
+# missed instead of refetching its whole order list
+replay_buffer = replay_buffer_from_env()
+
+# Cache and index changes ride the same bus so every worker process applies
+# them; this room is never joined by a socket
+CHANGES_ROOM = '_changes'
+
+def change_origin():
+    # Per process, read at publish time: forked workers must not share it
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+def deliver_event(event, data, room):
+    if room == CHANGES_ROOM:
+        # The publishing worker already applied its own change
+        if data.get('origin') != change_origin():
+            shop_controller.apply_change(event, data['change'])
+        return
+    if data.get('seq') is not None:
+        replay_buffer.record(room, data['seq'], event, data)
+    socketio.emit(event, data, room=room)
+    metrics.inc('socketio_emits_total', (('event', event),))
+
+# Room events go through the bus so every worker process delivers them to
+# its own clients. More than one worker needs EVENT_BUS=redis, which also
+# numbers each room's events once for all workers; do not set
+# SOCKETIO_MESSAGE_QUEUE as well, or each event reaches the clients twice.
+# Nothing is delivered until event_bus.start(), once the controllers
+# deliver_event needs exist.
+event_bus = event_bus_from_env(deliver_event)
+if event_bus.backend != 'redis' and int(os.getenv('GUNICORN_WORKERS', '1')) > 1:
+    # e.g. EVENT_BUS=redis without the redis package: each worker would
+    # number room events on its own and replay from its own buffer
+    logger.error("GUNICORN_WORKERS=%s but the event bus is %s: room events and "
+                 "seqs are not shared between workers", os.getenv('GUNICORN_WORKERS'),
+                 event_bus.backend)
+if event_bus.backend == 'redis' and os.getenv('SOCKETIO_MESSAGE_QUEUE'):
+    logger.warning("EVENT_BUS=redis and SOCKETIO_MESSAGE_QUEUE are both set; "
+                   "room events will be delivered twice")
+
+def publish_event(event, data, room):
+    # Every frame carries its room and the room's next sequence number,
+    # assigned by the bus in the same step that sends it: in every worker
+    # a room's frames arrive in seq order
+    event_bus.publish_sequenced(event, {**data, 'room': room}, room)
+
+# Events for a room are coalesced over EMIT_COALESCE_MS into one `updates`
+# frame before they hit the bus, so a shop working through a batch of
+# orders gets one frame and one list rebuild instead of one per order
+emit_scheduler = emit_scheduler_from_env(publish_event)
+
+def broadcast(event, data, room):
+    emit_scheduler.send(event, data, room)
+
 app.config['SECRET_KEY'] = '1025'
 
 # Initialize controllers
 user_controller = UserController()
-transaction_controller = TransactionController()
+def publish_change(change, data):
+    event_bus.publish(change, {'origin': change_origin(), 'change': data}, CHANGES_ROOM)
+
+shop_controller = ShopController(publish_change=publish_change)
+transaction_controller = TransactionController(shop_controller.kilo_prices)
+stats_controller = StatsController()
+
+# Badge counts for the shop order tabs, seeded with one grouped query and
+# adjusted by the transaction routes; shops left out are loaded on demand.
+# With several workers (EVENT_BUS=redis) they live in Redis, so every
+# worker pushes the same counts to a shop's room.
+order_counters = order_counters_from_env(transaction_controller.status_counts)
+try:
+    order_counters.seed()
+except Exception as e:
+    logger.warning("Order counters not seeded, loading per shop on demand: %s", e)
+
+# Everything deliver_event touches exists now
+event_bus.start()
 
 # Socket event handlers
 @socketio.on('connect')
 def handle_connect():
     print('Client connected')
+    metrics.inc('socketio_connects_total')
     return True
 
 @socketio.on('disconnect')
 def handle_disconnect():
     print('Client disconnected')
+    metrics.inc('socketio_disconnects_total')
+
+@metrics.collector
+def room_metrics():
+    # Only this worker's clients; every sid also sits in a room of its own
+    rooms, members = {}, {}
+    for room, sids in socketio.server.manager.rooms.get('/', {}).items():
+        kind = room.split('_', 1)[0] if isinstance(room, str) else None
+        if kind in ('shop', 'user'):
+            rooms[kind] = rooms.get(kind, 0) + 1
+            members[kind] = max(members.get(kind, 0), len(sids))
+    return [
+        ('socketio_rooms', 'gauge', 'Joined shop_/user_ rooms in this worker',
+         [((('kind', kind),), count) for kind, count in rooms.items()]),
+        ('socketio_room_members_max', 'gauge', 'Clients in the largest room of each kind',
+         [((('kind', kind),), count) for kind, count in members.items()]),
+    ]
+
+@metrics.collector
+def pool_metrics():
+    stats = pool_stats()
+    gauges = (
+        ('size', 'Maximum connections in the pool'),
+        ('open', 'Physical connections open'),
+        ('idle', 'Connections waiting in the pool'),
+        ('in_use', 'Connections checked out'),
+        ('waiting', 'Requests waiting for a connection'),
+    )
+    counters = (
+        ('created', 'Connections opened'),
+        ('evicted', 'Connections closed by the pool'),
+        ('timeouts', 'Checkouts that timed out'),
+        ('checkouts', 'Connections checked out'),
+    )
+    return (
+        [(f'db_pool_{key}', 'gauge', help, [((), stats[key])]) for key, help in gauges]
+        + [(f'db_pool_{key}_total', 'counter', help, [((), stats[key])]) for key, help in counters]
+    )
+
+def join_room_with_replay(room, last_seq):
+    """Join room and, for a reconnecting client, replay what it missed.
+
+    Clients send the last seq they saw; they get the missed events in
+    order, or a resync event when the gap is no longer buffered.
+    """
+    join_room(room)
+    current_seq = event_bus.current_seq(room)
+    emit('room_joined', {'room': room, 'seq': current_seq})
+    if last_seq is None or current_seq is None:
+        return
+    try:
+        last_seq = int(last_seq)
+    except (TypeError, ValueError):
+        return
+    missed = replay_buffer.since(room, last_seq, current_seq)
+    if missed is None:
+        emit('resync', {'room': room, 'seq': current_seq})
+        return
+    for event, data in missed:
+        emit(event, data)
 
 @socketio.on('join_shop_room')
 def handle_join_shop(data):
     shop_id = data.get('shop_id')
     if shop_id:
-        join_room(f"shop_{shop_id}")
-        emit('room_joined', {'room': f"shop_{shop_id}"})
+        join_room_with_replay(f"shop_{shop_id}", data.get('last_seq'))
         print(f"Shop {shop_id} joined room")
 
 @socketio.on('join_user_room')
 def handle_join_user(data):
     user_id = data.get('user_id')
     if user_id:
-        join_room(f"user_{user_id}")
-        emit('room_joined', {'room': f"user_{user_id}"})
+        join_room_with_replay(f"user_{user_id}", data.get('last_seq'))
         print(f"User {user_id} joined room")
 
+# Verified tokens are reused until they expire, so the dozens of calls a
+# dashboard screen makes do not each pay for the HMAC check
+token_cache = token_cache_from_env()
+
+def decode_token(token):
+    return token_cache.decode(token, app.config['SECRET_KEY'], ["HS256"])
+
 # JWT decorator for protected routes
 def jwt_required(f):
     @wraps(f)
@@ -55,30 +227,21 @@ def jwt_required(f):
             return jsonify({'message': 'Token is missing'}), 401
             
         try:
-            if ' ' not in token:
+            scheme, _, token = token.partition(' ')
+            if not token:
                 return jsonify({'message': 'Invalid token format'}), 401
-                
-            scheme, token = token.split(' ')
             if scheme.lower() != 'bearer':
                 return jsonify({'message': 'Invalid authentication scheme'}), 401
 
-            # Debug prints
-            print(f"Debug - Token being decoded: {token}")
-            print(f"Debug - Secret key being used: {app.config['SECRET_KEY']}")
-            
-            data = jwt.decode(
-                token, 
-                app.config['SECRET_KEY'],
-                algorithms=["HS256"]
-            )
-            
-            print(f"Debug - Decoded token data: {data}")
+            data = decode_token(token)
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("Authenticated user %s for %s", data.get('user_id'), request.path)
             
             request.user = data
             return f(*args, **kwargs)
             
         except jwt.InvalidTokenError as e:
-            print(f"Debug - Token error: {str(e)}")
+            logger.debug("Token rejected for %s: %s", request.path, e)
             return jsonify({'message': f'Token is invalid: {str(e)}'}), 401
             
     return decorated
@@ -94,7 +257,7 @@ def verify_token():
         if scheme.lower() != 'bearer':
             return jsonify({'valid': False, 'message': 'Invalid token format'}), 401
             
-        decoded = jwt.decode(token, app.config['SECRET_KEY'], algorithms=["HS256"])
+        decoded = decode_token(token)
         return jsonify({
             'valid': True,
             'user_id': decoded.get('user_id'),
@@ -151,6 +314,8 @@ def update_password(user_id):
 @jwt_required
 def delete_account(user_id):
     result = user_controller.delete_account(user_id)
+    if result['status'] == 200:
+        shop_controller.shops_deleted(result.pop('shop_ids'))
     return jsonify(result), result['status']
 
 
@@ -183,8 +348,9 @@ def register_shop(user_id):
         shop_query = """
             INSERT INTO shops (
                 user_id, shop_name, contact_number, zone, street, 
-                barangay, building, opening_time, closing_time
-            ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
+                barangay, building, opening_time, closing_time,
+                latitude, longitude
+            ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
         """
         cursor.execute(shop_query, (
             user_id,
@@ -195,7 +361,9 @@ def register_shop(user_id):
             data['barangay'],
             data.get('building'),
             data['opening_time'],
-            data['closing_time']
+            data['closing_time'],
+            data.get('latitude'),
+            data.get('longitude')
         ))
         
         shop_id = cursor.lastrowid
@@ -207,6 +375,7 @@ def register_shop(user_id):
         )
         
         connection.commit()
+        shop_controller.shop_registered(shop_id, data)
         return jsonify({
             'status': 201,
             'message': 'Shop registered successfully',
@@ -222,27 +391,33 @@ def register_shop(user_id):
             cursor.close()
             connection.close()
 
+SHOPS_LIST_QUERY = """
+    SELECT s.*, u.name as owner_name, u.email as owner_email,
+           GROUP_CONCAT(
+               JSON_OBJECT(
+                   'name', ss.service_name,
+                   'price', ss.price
+               )
+           ) as services
+    FROM shops s
+    JOIN users u ON s.user_id = u.id
+    LEFT JOIN shop_services ss ON s.id = ss.shop_id
+    GROUP BY s.id
+"""
+
 @app.route('/shops', methods=['GET'])
 def get_shops():
+    if wants_stream():
+        try:
+            return stream_json('shops', stream_rows(SHOPS_LIST_QUERY))
+        except Exception as e:
+            return jsonify({"error": str(e)}), 500
+
     connection = None
     try:
         connection = create_connection()
         cursor = connection.cursor(dictionary=True)
-        
-        query = """
-            SELECT s.*, u.name as owner_name, u.email as owner_email,
-                   GROUP_CONCAT(
-                       JSON_OBJECT(
-                           'name', ss.service_name,
-                           'price', ss.price
-                       )
-                   ) as services
-            FROM shops s
-            JOIN users u ON s.user_id = u.id
-            LEFT JOIN shop_services ss ON s.id = ss.shop_id
-            GROUP BY s.id
-        """
-        cursor.execute(query)
+        cursor.execute(SHOPS_LIST_QUERY)
         shops = cursor.fetchall()
         
         return jsonify({"shops": shops}), 200
@@ -253,6 +428,16 @@ def get_shops():
             cursor.close()
             connection.close()
 
+@app.route('/shops/search', methods=['GET'])
+def search_shops():
+    result = shop_controller.search_shops(request.args)
+    return jsonify(result), result['status']
+
+@app.route('/shops/nearby', methods=['GET'])
+def nearby_shops():
+    result = shop_controller.nearby_shops(request.args)
+    return jsonify(result), result['status']
+
 @app.route('/shop/user/<int:user_id>', methods=['GET'])
 @jwt_required
 def get_user_shop(user_id):
@@ -311,141 +496,240 @@ def get_recent_shops():
 @app.route('/shop/<int:shop_id>', methods=['GET'])
 @jwt_required
 def get_shop_by_id(shop_id):
-    connection = None
     try:
-        connection = create_connection()
-        cursor = connection.cursor(dictionary=True)
-        
-        # Get shop details
-        cursor.execute("""
-            SELECT id, shop_name, contact_number, zone, street, barangay, 
-                   building, opening_time, closing_time, created_at 
-            FROM shops
-            WHERE id = %s
-        """, (shop_id,))
-        
-        shop = cursor.fetchone()
+        shop = shop_controller.get_shop(shop_id)
         
         if not shop:
             return jsonify({'error': 'Shop not found'}), 404
-
-        # Format datetime for JSON
-        if shop and 'created_at' in shop:
-            shop['created_at'] = shop['created_at'].strftime('%Y-%m-%d %H:%M:%S')
             
         return jsonify(shop)
         
     except Exception as e:
         print(f"Error fetching shop {shop_id}: {str(e)}")  # Debug log
         return jsonify({'error': str(e)}), 500
-    finally:
-        if connection and connection.is_connected():
-            cursor.close()
-            connection.close()
             
+@app.route('/shop/<int:shop_id>/full', methods=['GET'])
+@jwt_required
+def get_shop_full(shop_id):
+    result = shop_controller.get_shop_full(shop_id)
+    if result['status'] != 200:
+        return jsonify(result), result['status']
+
+    # Content hash as ETag: reopening an unchanged shop costs a 304
+    response = jsonify(result)
+    response.add_etag()
+    return response.make_conditional(request)
+
+@app.route('/shop/<int:shop_id>/order_counts', methods=['GET'])
+@jwt_required
+def get_order_counts(shop_id):
+    try:
+        return jsonify({'shop_id': shop_id, 'counts': order_counters.get(shop_id)}), 200
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/shop/<int:shop_id>/stats', methods=['GET'])
+@jwt_required
+def get_shop_stats(shop_id):
+    try:
+        result = stats_controller.get_shop_stats(shop_id, request.args)
+        return jsonify(result), result['status']
+    except Exception as e:
+        return jsonify({'status': 500, 'message': str(e)}), 500
+
+@app.route('/metrics', methods=['GET'])
+def metrics_endpoint():
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
+
+@app.route('/cache/stats', methods=['GET'])
+def cache_stats():
+    return jsonify(shop_controller.cache.stats()), 200
+
+@app.route('/events/stats', methods=['GET'])
+def event_stats():
+    return jsonify({
+        **event_bus.stats(),
+        'coalescing': emit_scheduler.stats(),
+        'replay': replay_buffer.stats(),
+        'order_counts': order_counters.stats()
+    }), 200
+
 # Transaction Routes
+def push_order_counts(shop_id, from_status, to_status):
+    """Adjust the shop's tab counts and push them to its room.
+
+    Runs after the write committed, so a failure here is only logged.
+    """
+    if from_status == to_status:
+        return
+    try:
+        counts, delta = order_counters.adjust(shop_id, from_status, to_status)
+    except Exception as e:
+        logger.warning("Order counts for shop %s not updated: %s", shop_id, e)
+        return
+    broadcast('order_counts', {
+        'shop_id': shop_id,
+        'counts': counts,
+        'delta': delta
+    }, f"shop_{shop_id}")
+
+def announce_transaction(user_id, data, transaction_id):
+    shop_id = data['shop_id']
+    transaction_data = {
+        'transaction_id': transaction_id,
+        'user_id': user_id,
+        'shop_id': shop_id,
+        'service_name': data.get('service_name'),
+        'items': data.get('items', []),
+        'status': 'Pending',
+        'total_amount': data['total_amount'],
+        'created_at': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+    }
+    
+    # Emit to both shop and user rooms
+    broadcast('new_transaction', transaction_data, f"shop_{shop_id}")
+    broadcast('transaction_update', transaction_data, f"user_{user_id}")
+    push_order_counts(shop_id, None, 'Pending')
+
+def on_queued_transaction(user_id, data, result):
+    if result['status'] == 201:
+        announce_transaction(user_id, data, result['transaction_id'])
+
+# Opt-in async order pipeline: validate, queue, answer 202 right away
+ASYNC_ORDERS = os.getenv('ASYNC_ORDERS', '0').lower() in ('1', 'true', 'yes')
+order_queue = order_queue_from_env(
+    transaction_controller.create_transactions_batch, on_queued_transaction)
+# Shared through Redis when several workers run (IDEMPOTENCY_BACKEND), so
+# a retry that lands on another worker still finds the first outcome
+idempotency_keys = idempotency_store_from_env()
+
+def queue_transaction(user_id, data):
+    error = transaction_controller.validate_transaction(data)
+    if error:
+        return error
+    try:
+        provisional_id = order_queue.submit(user_id, data)
+    except QueueFull:
+        return {'status': 429, 'message': 'Too many orders in flight, please retry'}
+    return {
+        'status': 202,
+        'message': 'Transaction accepted',
+        'provisional_id': provisional_id,
+        'status_url': f'/transaction_request/{provisional_id}'
+    }
+
 @app.route('/create_transaction/<int:user_id>', methods=['POST'])
 @jwt_required
 def create_transaction(user_id):
+    # Client retries carrying the same Idempotency-Key get the first
+    # response back instead of creating a duplicate order
+    key = request.headers.get('Idempotency-Key')
+    if key:
+        key = f"{user_id}:{key}"
+        previous = idempotency_keys.begin(key)
+        if previous is not None:
+            if previous['state'] == 'in_flight':
+                return jsonify({
+                    'status': 409,
+                    'message': 'A request with this Idempotency-Key is still in progress'
+                }), 409
+            return jsonify(previous['body']), previous['status']
+
     try:
-        result = transaction_controller.create_transaction(user_id, request.json)
-        if result['status'] == 201:
-            shop_id = request.json['shop_id']
-            transaction_data = {
-                'transaction_id': result['transaction_id'],
-                'user_id': user_id,
-                'shop_id': shop_id,
-                'service_name': request.json.get('service_name'),
-                'items': request.json.get('items', []),
-                'status': 'Pending',
-                'total_amount': request.json['total_amount'],
-                'created_at': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-            }
-            
-            # Emit to both shop and user rooms
-            socketio.emit('new_transaction', transaction_data, room=f"shop_{shop_id}")
-            socketio.emit('transaction_update', transaction_data, room=f"user_{user_id}")
-            
-        return jsonify(result), result['status']
+        if ASYNC_ORDERS:
+            result = queue_transaction(user_id, request.json)
+        else:
+            result = transaction_controller.create_transaction(user_id, request.json)
+            if result['status'] == 201:
+                announce_transaction(user_id, request.json, result['transaction_id'])
     except Exception as e:
         print(f"Error in create_transaction: {str(e)}")
-        return jsonify({'status': 500, 'message': str(e)}), 500
+        result = {'status': 500, 'message': str(e)}
+
+    if key:
+        if result['status'] >= 500 or result['status'] == 429:
+            idempotency_keys.release(key)
+        else:
+            idempotency_keys.complete(key, result['status'], result)
+
+    response = jsonify(result)
+    if result['status'] == 429:
+        response.headers['Retry-After'] = '1'
+    return response, result['status']
+
+@app.route('/transaction_request/<string:provisional_id>', methods=['GET'])
+@jwt_required
+def get_transaction_request(provisional_id):
+    state = order_queue.status(provisional_id)
+    if state is None:
+        return jsonify({'status': 404, 'message': 'Unknown or expired request'}), 404
+    return jsonify({'status': 200, 'provisional_id': provisional_id, **state}), 200
+
+def wants_stream():
+    return request.args.get('stream', '').lower() in ('1', 'true', 'yes')
+
+def stream_json(array_key, items, head=None, tail=None):
+    """Chunked JSON response; rows are serialized as they come off the cursor."""
+    body = json_object_stream(array_key, items, head=head, tail=tail, dumps=flask_json.dumps)
+    return Response(stream_with_context(body), mimetype='application/json')
+
+# The order history screens show total_amount as sent ('350.00')
+format_user_transaction = field_converter(total_amount=str)
 
 @app.route('/user_transactions/<int:user_id>', methods=['GET'])
 @jwt_required
 def get_user_transactions(user_id):
-    connection = None
     try:
-        connection = create_connection()
-        cursor = connection.cursor(dictionary=True)
-        
-        # Query to get user's transactions with shop details
-        query = """
-            SELECT t.*, s.shop_name
-            FROM transactions t
-            JOIN shops s ON t.shop_id = s.id
-            WHERE t.user_id = %s
-            ORDER BY t.created_at DESC
-        """
-        cursor.execute(query, (user_id,))
-        transactions = cursor.fetchall()
-        
-        # Convert decimal values to strings for JSON serialization
-        for transaction in transactions:
-            if 'total_amount' in transaction:
-                transaction['total_amount'] = str(transaction['total_amount'])
-            if 'created_at' in transaction:
-                transaction['created_at'] = transaction['created_at'].strftime('%Y-%m-%d %H:%M:%S')
+        if wants_stream():
+            result = transaction_controller.stream_transactions('user', user_id, request.args)
+            if result['status'] != 200:
+                return jsonify({'status': 'error', 'message': result['message']}), result['status']
+            page = result['page']
+            return stream_json(
+                'data', map(format_user_transaction, result['transactions']),
+                head={'status': 'success'},
+                tail=lambda: {'next_cursor': page['next_cursor']}
+            )
+
+        result = transaction_controller.list_transactions('user', user_id, request.args)
+        if result['status'] != 200:
+            return jsonify({'status': 'error', 'message': result['message']}), result['status']
         
-        return jsonify({'status': 'success', 'data': transactions}), 200
+        return jsonify({
+            'status': 'success',
+            'data': [format_user_transaction(t) for t in result['transactions']],
+            'next_cursor': result['next_cursor']
+        }), 200
         
     except Exception as e:
         return jsonify({'status': 'error', 'message': str(e)}), 500
-    finally:
-        if connection and connection.is_connected():
-            cursor.close()
-            connection.close()
 
 @app.route('/shop_transactions/<int:shop_id>', methods=['GET'])
 @jwt_required
 def get_shop_transactions(shop_id):
-    connection = None
     try:
-        connection = create_connection()
-        cursor = connection.cursor(dictionary=True)
-        
-        query = """
-            SELECT t.*, u.name as customer_name, u.email as customer_email
-            FROM transactions t
-            JOIN users u ON t.user_id = u.id
-            WHERE t.shop_id = %s
-            ORDER BY t.created_at DESC
-        """
-        cursor.execute(query, (shop_id,))
-        transactions = cursor.fetchall()
-        
-        # Convert datetime and Decimal objects to JSON serializable format
-        formatted_transactions = []
-        for transaction in transactions:
-            formatted_transaction = {}
-            for key, value in transaction.items():
-                if isinstance(value, (datetime, timedelta)):
-                    formatted_transaction[key] = value.strftime('%Y-%m-%d %H:%M:%S')
-                elif isinstance(value, Decimal):
-                    formatted_transaction[key] = float(value)
-                else:
-                    formatted_transaction[key] = value
-            formatted_transactions.append(formatted_transaction)
-
-        return jsonify({"transactions": formatted_transactions}), 200
+        if wants_stream():
+            result = transaction_controller.stream_transactions('shop', shop_id, request.args)
+            if result['status'] != 200:
+                return jsonify({"error": result['message']}), result['status']
+            page = result['page']
+            return stream_json(
+                'transactions', result['transactions'],
+                tail=lambda: {'next_cursor': page['next_cursor']}
+            )
+
+        result = transaction_controller.list_transactions('shop', shop_id, request.args)
+        if result['status'] != 200:
+            return jsonify({"error": result['message']}), result['status']
+
+        return jsonify({
+            "transactions": result['transactions'],
+            "next_cursor": result['next_cursor']
+        }), 200
         
     except Exception as e:
         print(f"Error fetching transactions: {e}")
         return jsonify({"error": str(e)}), 500
-    finally:
-        if connection and connection.is_connected():
-            cursor.close()
-            connection.close()
 
 @app.route('/update_transaction_status/<string:transaction_id>', methods=['PUT'])
 @jwt_required
@@ -454,26 +738,47 @@ def update_transaction_status(transaction_id):
         result = transaction_controller.update_transaction_status(
             transaction_id,
             request.json['status'],
-            request.json.get('notes')
+            request.json.get('notes'),
+            expected_version=request.json.get('expected_version'),
+            reason=request.json.get('cancel_reason')
         )
         
         if result['status'] == 200:
             update_data = {
-                'transaction_id': transaction_id,
-                'status': request.json['status'],
-                'notes': request.json.get('notes'),
+                'transaction_id': result['transaction_id'],
+                'status': result['transaction_status'],
+                'version': result['version'],
+                'notes': result['notes'],
                 'total_amount': request.json.get('total_amount')
             }
             
             # Emit to both rooms
-            socketio.emit('status_update', update_data, room=f"shop_{result['shop_id']}")
-            socketio.emit('status_update', update_data, room=f"user_{result['user_id']}")
+            broadcast('status_update', update_data, f"shop_{result['shop_id']}")
+            broadcast('status_update', update_data, f"user_{result['user_id']}")
+            push_order_counts(result['shop_id'], result['previous_status'], result['transaction_status'])
             
         return jsonify(result), result['status']
     except Exception as e:
         print(f"Error in update_transaction_status: {str(e)}")
         return jsonify({'status': 500, 'message': str(e)}), 500
 
+@app.route('/transactions/<int:transaction_id>', methods=['GET'])
+@jwt_required
+def get_transaction(transaction_id):
+    result = transaction_controller.get_transaction(transaction_id)
+    return jsonify(result), result['status']
+
+@app.route('/transactions', methods=['GET'])
+@jwt_required
+def get_transactions():
+    # Batch form for list screens: /transactions?ids=1,2,3
+    try:
+        ids = parse_ids(request.args.get('ids'))
+    except ValueError as e:
+        return jsonify({'status': 400, 'message': str(e)}), 400
+    result = transaction_controller.get_transactions(ids)
+    return jsonify(result), result['status']
+
 @app.route('/cancel_transaction/<string:transaction_id>', methods=['PUT'])
 @jwt_required
 def cancel_transaction(transaction_id):
@@ -483,6 +788,8 @@ def cancel_transaction(transaction_id):
             request.json.get('reason'),
             request.json.get('notes')
         )
+        if result['status'] == 200:
+            push_order_counts(result['shop_id'], result['previous_status'], 'Cancelled')
         return jsonify(result), result['status']
     except Exception as e:
         return jsonify({'status': 500, 'message': str(e)}), 500
@@ -513,26 +820,12 @@ def check_user_shop(user_id):
 @app.route('/shop/<int:shop_id>/services', methods=['GET'])
 @jwt_required
 def get_shop_services(shop_id):
-    connection = None
     try:
-        connection = create_connection()
-        cursor = connection.cursor(dictionary=True)
-        
-        cursor.execute("""
-            SELECT id, service_name, color, CAST(price AS FLOAT) as price 
-            FROM shop_services 
-            WHERE shop_id = %s
-        """, (shop_id,))
-        
-        services = cursor.fetchall()
+        services = shop_controller.get_catalog(shop_id, 'services')
         return jsonify({'services': services}), 200
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
-    finally:
-        if connection and connection.is_connected():
-            cursor.close()
-            connection.close()
 
 @app.route('/shop/<int:shop_id>/service', methods=['POST'])
 @jwt_required
@@ -559,6 +852,9 @@ def add_shop_service(shop_id):
         ))
         
         connection.commit()
+        shop_controller.catalog_changed(shop_id)
+        shop_controller.service_added(
+            shop_id, cursor.lastrowid, data['service_name'], data.get('price', 0))
         return jsonify({'message': 'Service added successfully'}), 201
         
     except Exception as e:
@@ -577,6 +873,7 @@ def manage_shop_service(service_id):
     try:
         connection = create_connection()
         cursor = connection.cursor()
+        shop_id = shop_controller.shop_id_for(cursor, 'shop_services', service_id)
         
         if request.method == 'DELETE':
             cursor.execute("DELETE FROM shop_services WHERE id = %s", (service_id,))
@@ -591,6 +888,12 @@ def manage_shop_service(service_id):
             message = 'Service updated successfully'
             
         connection.commit()
+        if shop_id is not None:
+            shop_controller.catalog_changed(shop_id)
+        if request.method == 'DELETE':
+            shop_controller.service_deleted(service_id)
+        else:
+            shop_controller.service_updated(service_id, data['name'], data['price'])
         return jsonify({'message': message}), 200
         
     except Exception as e:
@@ -608,24 +911,20 @@ def manage_shop_service(service_id):
 def manage_household_items(shop_id):
     connection = None
     try:
-        connection = create_connection()
-        cursor = connection.cursor(dictionary=True)
-        
         if request.method == 'GET':
-            cursor.execute("""
-                SELECT * FROM household_items 
-                WHERE shop_id = %s
-            """, (shop_id,))
-            items = cursor.fetchall()
+            items = shop_controller.get_catalog(shop_id, 'household_items')
             return jsonify({'items': items}), 200
             
         else:  # POST
             data = request.json
+            connection = create_connection()
+            cursor = connection.cursor(dictionary=True)
             cursor.execute("""
                 INSERT INTO household_items (shop_id, item_name, price)
                 VALUES (%s, %s, %s)
             """, (shop_id, data['name'], data['price']))
             connection.commit()
+            shop_controller.catalog_changed(shop_id)
             return jsonify({'message': 'Item added successfully'}), 201
             
     except Exception as e:
@@ -642,24 +941,20 @@ def manage_household_items(shop_id):
 def manage_clothing_types(shop_id):
     connection = None
     try:
-        connection = create_connection()
-        cursor = connection.cursor(dictionary=True)
-        
         if request.method == 'GET':
-            cursor.execute("""
-                SELECT * FROM clothing_types 
-                WHERE shop_id = %s
-            """, (shop_id,))
-            types = cursor.fetchall()
+            types = shop_controller.get_catalog(shop_id, 'clothing_types')
             return jsonify({'types': types}), 200
             
         else:  # POST
             data = request.json
+            connection = create_connection()
+            cursor = connection.cursor(dictionary=True)
             cursor.execute("""
                 INSERT INTO clothing_types (shop_id, type_name, price)
                 VALUES (%s, %s, %s)
             """, (shop_id, data['name'], data['price']))
             connection.commit()
+            shop_controller.catalog_changed(shop_id)
             return jsonify({'message': 'Clothing type added successfully'}), 201
             
     except Exception as e:
@@ -674,48 +969,22 @@ def manage_clothing_types(shop_id):
 @app.route('/shop/<int:shop_id>/clothing', methods=['GET'])
 @jwt_required
 def get_clothing_types(shop_id):
-    connection = None
     try:
-        connection = create_connection()
-        cursor = connection.cursor(dictionary=True)
-        
-        cursor.execute("""
-            SELECT * FROM clothing_types 
-            WHERE shop_id = %s
-        """, (shop_id,))
-        
-        types = cursor.fetchall()
+        types = shop_controller.get_catalog(shop_id, 'clothing_types')
         return jsonify({'types': types}), 200
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
-    finally:
-        if connection and connection.is_connected():
-            cursor.close()
-            connection.close()
 
 @app.route('/shop/<int:shop_id>/household', methods=['GET'])
 @jwt_required
 def get_household_items(shop_id):
-    connection = None
     try:
-        connection = create_connection()
-        cursor = connection.cursor(dictionary=True)
-        
-        cursor.execute("""
-            SELECT * FROM household_items 
-            WHERE shop_id = %s
-        """, (shop_id,))
-        
-        items = cursor.fetchall()
+        items = shop_controller.get_catalog(shop_id, 'household_items')
         return jsonify({'items': items}), 200
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
-    finally:
-        if connection and connection.is_connected():
-            cursor.close()
-            connection.close()
 
 @app.route('/shop/<int:shop_id>/household', methods=['POST'])
 @jwt_required
@@ -747,6 +1016,7 @@ def add_household_item(shop_id):
         """, (shop_id, data['name'], data['price']))
         
         connection.commit()
+        shop_controller.catalog_changed(shop_id)
         return jsonify({'message': 'Item added successfully'}), 201
         
     except Exception as e:
@@ -788,6 +1058,7 @@ def add_clothing_type(shop_id):
         """, (shop_id, data['name'], data['price']))
         
         connection.commit()
+        shop_controller.catalog_changed(shop_id)
         return jsonify({'message': 'Type added successfully'}), 201
         
     except Exception as e:
@@ -807,6 +1078,7 @@ def update_household_item(item_id):
         data = request.json
         connection = create_connection()
         cursor = connection.cursor()
+        shop_id = shop_controller.shop_id_for(cursor, 'household_items', item_id)
         
         cursor.execute("""
             UPDATE household_items 
@@ -815,6 +1087,8 @@ def update_household_item(item_id):
         """, (data['price'], item_id))
         
         connection.commit()
+        if shop_id is not None:
+            shop_controller.catalog_changed(shop_id)
         return jsonify({'message': 'Item updated successfully'}), 200
         
     except Exception as e:
@@ -834,6 +1108,7 @@ def update_clothing_type(type_id):
         data = request.json
         connection = create_connection()
         cursor = connection.cursor()
+        shop_id = shop_controller.shop_id_for(cursor, 'clothing_types', type_id)
         
         cursor.execute("""
             UPDATE clothing_types 
@@ -842,6 +1117,8 @@ def update_clothing_type(type_id):
         """, (data['price'], type_id))
         
         connection.commit()
+        if shop_id is not None:
+            shop_controller.catalog_changed(shop_id)
         return jsonify({'message': 'Type updated successfully'}), 200
         
     except Exception as e:
@@ -872,10 +1149,6 @@ def get_all_shop_services():
         
         services = cursor.fetchall()
         
-        # Convert Decimal to float for JSON serialization
-        for service in services:
-            service['price'] = float(service['price'])
-        
         return jsonify({'services': services}), 200
         
     except Exception as e:
@@ -902,10 +1175,6 @@ def get_all_shop_items():
         
         items = cursor.fetchall()
         
-        # Convert Decimal to float
-        for item in items:
-            item['price'] = float(item['price'])
-        
         return jsonify({'items': items}), 200
         
     except Exception as e:
@@ -919,37 +1188,12 @@ def get_all_shop_items():
 @app.route('/shop/<int:shop_id>/kilo-prices', methods=['GET'])
 @jwt_required
 def get_kilo_prices(shop_id):
-    connection = None
     try:
-        connection = create_connection()
-        cursor = connection.cursor()
-        
-        cursor.execute("""
-            SELECT min_kilo, max_kilo, price_per_kilo 
-            FROM kilo_prices 
-            WHERE shop_id = %s
-        """, (shop_id,))
-        
-        prices = cursor.fetchall()
-        
-        # Convert Decimal objects to float before JSON serialization
-        formatted_prices = [
-            {
-                'min_kilo': float(price[0]),
-                'max_kilo': float(price[1]),
-                'price_per_kilo': float(price[2])
-            }
-            for price in prices
-        ]
-        
-        return jsonify({'prices': formatted_prices}), 200
+        prices = shop_controller.get_catalog(shop_id, 'kilo_prices')
+        return jsonify({'prices': prices}), 200
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
-    finally:
-        if connection and connection.is_connected():
-            cursor.close()
-            connection.close()
 
 @app.route('/shop/<int:shop_id>/kilo-price', methods=['POST'])
 @jwt_required
@@ -957,31 +1201,22 @@ def add_kilo_price(shop_id):
     connection = None
     try:
         data = request.json
-        connection = create_connection()
-        cursor = connection.cursor()
 
-        # Check for overlapping ranges
-        cursor.execute("""
-            SELECT COUNT(*) FROM kilo_prices 
-            WHERE shop_id = %s AND (
-                (%s BETWEEN min_kilo AND max_kilo) OR
-                (%s BETWEEN min_kilo AND max_kilo) OR
-                (min_kilo BETWEEN %s AND %s)
-            )
-        """, (shop_id, data['min_kilo'], data['max_kilo'], 
-              data['min_kilo'], data['max_kilo']))
-        
-        if cursor.fetchone()[0] > 0:
+        # Check for overlapping ranges against the compiled price table
+        if shop_controller.kilo_prices.overlaps(shop_id, data['min_kilo'], data['max_kilo']):
             return jsonify({
                 'error': 'This range overlaps with an existing range'
             }), 400
             
+        connection = create_connection()
+        cursor = connection.cursor()
         cursor.execute("""
             INSERT INTO kilo_prices (shop_id, min_kilo, max_kilo, price_per_kilo)
             VALUES (%s, %s, %s, %s)
         """, (shop_id, data['min_kilo'], data['max_kilo'], data['price_per_kilo']))
         
         connection.commit()
+        shop_controller.catalog_changed(shop_id)
         return jsonify({'message': 'Price range added successfully'}), 201
         
     except Exception as e:
@@ -1008,6 +1243,7 @@ def delete_kilo_price(shop_id):
         """, (shop_id, data['min_kilo'], data['max_kilo']))
         
         connection.commit()
+        shop_controller.catalog_changed(shop_id)
         return jsonify({'message': 'Price range deleted successfully'}), 200
         
     except Exception as e:
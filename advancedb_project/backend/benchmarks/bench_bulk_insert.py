@@ -0,0 +1,86 @@
+"""Round trips and latency of per-row vs batched transaction_items inserts.
+
+Runs against the database configured in .env, inside a TEMPORARY table
+shaped like transaction_items, so nothing is left behind.
+
+    python -m benchmarks.bench_bulk_insert --repeat 50 --batch-size 500
+"""
+import argparse
+import statistics
+import time
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+from database.connection import create_connection
+from database.bulk import insert_many
+
+ITEM_COUNTS = (1, 5, 10, 30, 50, 100, 500)
+
+INSERT_ITEM = """
+    INSERT INTO bench_transaction_items (
+        transaction_id, item_name, quantity
+    ) VALUES (%s, %s, %s)
+"""
+
+def per_row(cursor, rows):
+    for row in rows:
+        cursor.execute(INSERT_ITEM, row)
+    return len(rows)
+
+def batched(cursor, rows, batch_size):
+    return insert_many(cursor, INSERT_ITEM, rows, batch_size)
+
+def measure(conn, cursor, strategy, rows, repeat):
+    timings = []
+    round_trips = 0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        round_trips = strategy(cursor, rows)
+        conn.commit()
+        timings.append((time.perf_counter() - start) * 1000)
+        cursor.execute("TRUNCATE TABLE bench_transaction_items")
+    timings.sort()
+    return {
+        'round_trips': round_trips,
+        'p50_ms': statistics.median(timings),
+        'p99_ms': timings[min(len(timings) - 1, int(len(timings) * 0.99))],
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=30)
+    parser.add_argument('--batch-size', type=int, default=500)
+    args = parser.parse_args()
+
+    conn = create_connection()
+    if not conn:
+        raise SystemExit('Database connection failed')
+    cursor = conn.cursor()
+    cursor.execute("""
+        CREATE TEMPORARY TABLE bench_transaction_items (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            transaction_id INT NOT NULL,
+            item_name VARCHAR(255) NOT NULL,
+            quantity INT NOT NULL
+        )
+    """)
+
+    print(f"{'items':>6} {'strategy':>9} {'trips':>6} {'p50 ms':>9} {'p99 ms':>9}")
+    try:
+        for count in ITEM_COUNTS:
+            rows = [(1, f'Item {i}', i % 5 + 1) for i in range(count)]
+            for name, strategy in (
+                ('per-row', per_row),
+                ('batched', lambda c, r: batched(c, r, args.batch_size)),
+            ):
+                result = measure(conn, cursor, strategy, rows, args.repeat)
+                print(f"{count:>6} {name:>9} {result['round_trips']:>6} "
+                      f"{result['p50_ms']:>9.2f} {result['p99_ms']:>9.2f}")
+    finally:
+        cursor.close()
+        conn.close()
+
+if __name__ == '__main__':
+    main()
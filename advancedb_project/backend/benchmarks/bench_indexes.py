@@ -0,0 +1,283 @@
+"""EXPLAIN plans and p50/p99 of the hot queries before and after the index pack.
+
+Seeds a synthetic dataset into a scratch database (BENCH_DB_NAME, default
+LabaRide_bench) on the server configured in .env, runs every query
+without secondary indexes, applies database/migrations/0002_hot_path_indexes.sql
+and runs them again. The scratch database is dropped afterwards unless
+--keep is given.
+
+    python -m benchmarks.bench_indexes --transactions 200000 --repeat 50
+"""
+import argparse
+import os
+import random
+import statistics
+import time
+from datetime import datetime, timedelta
+
+import mysql.connector
+from dotenv import load_dotenv
+from mysql.connector import Error
+
+load_dotenv()
+
+from controllers.transactionController import TransactionController
+from database.bulk import insert_many
+from database.migrate import MIGRATIONS_DIR, ALREADY_APPLIED_ERRORS, split_statements
+
+INDEX_MIGRATION = '0002_hot_path_indexes.sql'
+
+# Production tables with only the primary keys and the indexes InnoDB
+# creates for foreign keys; constraints are left out to keep seeding fast
+SCHEMA = (
+    """CREATE TABLE users (
+        id INT AUTO_INCREMENT PRIMARY KEY,
+        name VARCHAR(255) NOT NULL,
+        email VARCHAR(255) NOT NULL
+    )""",
+    """CREATE TABLE shops (
+        id INT AUTO_INCREMENT PRIMARY KEY,
+        user_id INT NOT NULL,
+        shop_name VARCHAR(255) NOT NULL,
+        contact_number VARCHAR(20) NOT NULL,
+        zone VARCHAR(255) NOT NULL,
+        street VARCHAR(255) NOT NULL,
+        barangay VARCHAR(255) NOT NULL,
+        building VARCHAR(255),
+        opening_time VARCHAR(20) NOT NULL,
+        closing_time VARCHAR(20) NOT NULL,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        KEY user_id (user_id)
+    )""",
+    """CREATE TABLE transactions (
+        id INT AUTO_INCREMENT PRIMARY KEY,
+        user_id INT NOT NULL,
+        shop_id INT NOT NULL,
+        service_name VARCHAR(50) NOT NULL,
+        kilo_amount DECIMAL(10,2) NOT NULL,
+        total_amount DECIMAL(10,2) NOT NULL,
+        status ENUM('Pending', 'Processing', 'Completed', 'Cancelled') DEFAULT 'Pending',
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        KEY user_id (user_id),
+        KEY shop_id (shop_id)
+    )""",
+    """CREATE TABLE shop_services (
+        id INT AUTO_INCREMENT PRIMARY KEY,
+        shop_id INT NOT NULL,
+        service_name VARCHAR(255) NOT NULL,
+        price DECIMAL(10,2) DEFAULT 0,
+        color VARCHAR(255),
+        description TEXT,
+        is_active BOOLEAN NOT NULL DEFAULT TRUE,
+        KEY shop_id (shop_id)
+    )""",
+    """CREATE TABLE household_items (
+        id INT AUTO_INCREMENT PRIMARY KEY,
+        shop_id INT NOT NULL,
+        item_name VARCHAR(255) NOT NULL,
+        price DECIMAL(10,2) NOT NULL DEFAULT 0,
+        KEY shop_id (shop_id)
+    )""",
+    """CREATE TABLE clothing_types (
+        id INT AUTO_INCREMENT PRIMARY KEY,
+        shop_id INT NOT NULL,
+        type_name VARCHAR(255) NOT NULL,
+        price DECIMAL(10,2) NOT NULL DEFAULT 0,
+        KEY shop_id (shop_id)
+    )""",
+)
+
+SERVICES = ('Wash Only', 'Dry Clean', 'Steam Press', 'Full Service', 'Fold Only')
+STATUSES = ('Pending', 'Processing', 'Completed', 'Cancelled')
+
+def seed(cursor, args):
+    rng = random.Random(42)
+    now = datetime.now()
+
+    def moment():
+        return now - timedelta(seconds=rng.randint(0, 365 * 24 * 3600))
+
+    insert_many(cursor, "INSERT INTO users (name, email) VALUES (%s, %s)",
+                [(f'User {i}', f'user{i}@example.com') for i in range(args.users)], 1000)
+    insert_many(cursor, """
+        INSERT INTO shops (user_id, shop_name, contact_number, zone, street,
+                           barangay, building, opening_time, closing_time, created_at)
+        VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+    """, [
+        (rng.randint(1, args.users), f'Shop {i}', '09170000000', 'Zone 1', 'Main St',
+         f'Barangay {i % 40}', None, '08:00 AM', '08:00 PM', moment())
+        for i in range(args.shops)
+    ], 1000)
+    insert_many(cursor, """
+        INSERT INTO shop_services (shop_id, service_name, price, is_active)
+        VALUES (%s, %s, %s, %s)
+    """, [
+        (shop_id, name, rng.randint(50, 300), rng.random() > 0.1)
+        for shop_id in range(1, args.shops + 1) for name in SERVICES
+    ], 1000)
+    for table, column in (('household_items', 'item_name'), ('clothing_types', 'type_name')):
+        insert_many(cursor, f"INSERT INTO {table} (shop_id, {column}, price) VALUES (%s, %s, %s)", [
+            (shop_id, f'{column} {n}', rng.randint(10, 100))
+            for shop_id in range(1, args.shops + 1) for n in range(10)
+        ], 1000)
+
+    batch = []
+    for _ in range(args.transactions):
+        batch.append((rng.randint(1, args.users), rng.randint(1, args.shops),
+                      rng.choice(SERVICES), 3.5, 350, rng.choice(STATUSES), moment()))
+        if len(batch) == 5000:
+            insert_many(cursor, """
+                INSERT INTO transactions (user_id, shop_id, service_name, kilo_amount,
+                                          total_amount, status, created_at)
+                VALUES (%s, %s, %s, %s, %s, %s, %s)
+            """, batch, 5000)
+            batch = []
+    if batch:
+        insert_many(cursor, """
+            INSERT INTO transactions (user_id, shop_id, service_name, kilo_amount,
+                                      total_amount, status, created_at)
+            VALUES (%s, %s, %s, %s, %s, %s, %s)
+        """, batch, 5000)
+
+def bench_queries(args):
+    """(name, sql, params factory) for every hot path."""
+    rng = random.Random(7)
+    lists = TransactionController(None)
+
+    def listing(owner, count, status=None):
+        def params():
+            query_params = {'limit': '20'}
+            if status:
+                query_params['status'] = status
+            return lists.build_list_query(owner, rng.randint(1, count), query_params)[:2]
+        return params
+
+    return [
+        ('user_transactions', listing('user', args.users)),
+        ('user_transactions?status', listing('user', args.users, 'pending')),
+        ('shop_transactions', listing('shop', args.shops)),
+        ('shop_transactions?status', listing('shop', args.shops, 'completed')),
+        ('shops/recent', lambda: ("""
+            SELECT id, shop_name, contact_number, zone, street, barangay, building,
+                   opening_time, closing_time, created_at
+            FROM shops
+            ORDER BY created_at DESC
+            LIMIT 10
+        """, ())),
+        ('shop services (active)', lambda: ("""
+            SELECT id, service_name, price, color
+            FROM shop_services
+            WHERE shop_id = %s AND is_active = true
+        """, (rng.randint(1, args.shops),))),
+        ('shop/services (all active)', lambda: ("""
+            SELECT s.id, s.service_name, s.price, s.color, s.description
+            FROM shop_services s
+            WHERE s.is_active = true
+            ORDER BY s.service_name
+            LIMIT 100
+        """, ())),
+        ('household item exists', lambda: ("""
+            SELECT id FROM household_items
+            WHERE shop_id = %s AND item_name = %s
+        """, (rng.randint(1, args.shops), 'item_name 3'))),
+        ('clothing type exists', lambda: ("""
+            SELECT id FROM clothing_types
+            WHERE shop_id = %s AND type_name = %s
+        """, (rng.randint(1, args.shops), 'type_name 3'))),
+    ]
+
+def explain(cursor, query, params):
+    cursor.execute("EXPLAIN " + query, params)
+    rows = cursor.fetchall()
+    return '; '.join(
+        f"{row['table']}: {row['type']} key={row['key']} rows={row['rows']}"
+        + (f" ({row['Extra']})" if row.get('Extra') else '')
+        for row in rows
+    )
+
+def measure(cursor, queries, repeat):
+    results = {}
+    for name, make in queries:
+        query, params = make()
+        plan = explain(cursor, query, params)
+        timings = []
+        for _ in range(repeat):
+            query, params = make()
+            start = time.perf_counter()
+            cursor.execute(query, params)
+            cursor.fetchall()
+            timings.append((time.perf_counter() - start) * 1000)
+        timings.sort()
+        results[name] = {
+            'plan': plan,
+            'p50_ms': statistics.median(timings),
+            'p99_ms': timings[min(len(timings) - 1, int(len(timings) * 0.99))],
+        }
+    return results
+
+def apply_indexes(cursor):
+    with open(os.path.join(MIGRATIONS_DIR, INDEX_MIGRATION)) as f:
+        for statement in split_statements(f.read()):
+            try:
+                cursor.execute(statement)
+            except Error as e:
+                if e.errno not in ALREADY_APPLIED_ERRORS:
+                    raise
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--users', type=int, default=20000)
+    parser.add_argument('--shops', type=int, default=2000)
+    parser.add_argument('--transactions', type=int, default=200000)
+    parser.add_argument('--repeat', type=int, default=50)
+    parser.add_argument('--keep', action='store_true', help='keep the scratch database')
+    args = parser.parse_args()
+
+    database = os.getenv('BENCH_DB_NAME', 'LabaRide_bench')
+    conn = mysql.connector.connect(
+        host=os.getenv('DB_HOST', 'localhost'),
+        user=os.getenv('DB_USER', 'root'),
+        password=os.getenv('DB_PASSWORD', '1025')
+    )
+    cursor = conn.cursor(dictionary=True)
+    try:
+        cursor.execute(f"DROP DATABASE IF EXISTS `{database}`")
+        cursor.execute(f"CREATE DATABASE `{database}`")
+        cursor.execute(f"USE `{database}`")
+        for statement in SCHEMA:
+            cursor.execute(statement)
+
+        start = time.perf_counter()
+        seed(cursor, args)
+        conn.commit()
+        cursor.execute("ANALYZE TABLE users, shops, transactions, shop_services, "
+                       "household_items, clothing_types")
+        cursor.fetchall()
+        print(f"Seeded {args.transactions} transactions, {args.shops} shops, "
+              f"{args.users} users in {time.perf_counter() - start:.1f}s\n")
+
+        queries = bench_queries(args)
+        before = measure(cursor, queries, args.repeat)
+        apply_indexes(cursor)
+        cursor.execute("ANALYZE TABLE shops, transactions, shop_services, "
+                       "household_items, clothing_types")
+        cursor.fetchall()
+        after = measure(cursor, queries, args.repeat)
+
+        print(f"{'query':<28} {'p50 before':>11} {'p50 after':>10} {'p99 before':>11} {'p99 after':>10}")
+        for name, _ in queries:
+            print(f"{name:<28} {before[name]['p50_ms']:>11.2f} {after[name]['p50_ms']:>10.2f} "
+                  f"{before[name]['p99_ms']:>11.2f} {after[name]['p99_ms']:>10.2f}")
+        print()
+        for name, _ in queries:
+            print(name)
+            print(f"  before: {before[name]['plan']}")
+            print(f"  after:  {after[name]['plan']}")
+    finally:
+        if not args.keep:
+            cursor.execute(f"DROP DATABASE IF EXISTS `{database}`")
+        cursor.close()
+        conn.close()
+
+if __name__ == '__main__':
+    main()
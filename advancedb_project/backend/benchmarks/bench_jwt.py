@@ -0,0 +1,64 @@
+"""Per-request cost of jwt_required with and without the verified-token cache.
+
+Mounts a no-op protected route on the app and drives it through Flask's
+test client, so the numbers cover header parsing, verification and the
+decorator itself but no database work.
+
+    python -m benchmarks.bench_jwt --requests 5000
+"""
+import argparse
+import statistics
+import time
+from datetime import datetime, timedelta
+
+import jwt
+
+from app import app, jwt_required, token_cache
+
+@jwt_required
+def bench_protected():
+    return '', 204
+
+app.add_url_rule('/__bench/protected', 'bench_protected', bench_protected)
+
+def make_token(user_id):
+    return jwt.encode({
+        'user_id': user_id,
+        'email': f'user{user_id}@example.com',
+        'exp': datetime.utcnow() + timedelta(hours=24)
+    }, app.config['SECRET_KEY'], algorithm="HS256")
+
+def measure(client, tokens, requests, cached):
+    timings = []
+    for i in range(requests):
+        if not cached:
+            token_cache.clear()
+        headers = {'Authorization': f'Bearer {tokens[i % len(tokens)]}'}
+        start = time.perf_counter()
+        response = client.get('/__bench/protected', headers=headers)
+        timings.append((time.perf_counter() - start) * 1_000_000)
+        assert response.status_code == 204, response.status_code
+    timings.sort()
+    return {
+        'p50_us': statistics.median(timings),
+        'p99_us': timings[min(len(timings) - 1, int(len(timings) * 0.99))],
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--requests', type=int, default=5000)
+    parser.add_argument('--users', type=int, default=50)
+    args = parser.parse_args()
+
+    tokens = [make_token(user_id) for user_id in range(1, args.users + 1)]
+    client = app.test_client()
+
+    print(f"{'mode':>9} {'p50 us':>9} {'p99 us':>9}")
+    for name, cached in (('uncached', False), ('cached', True)):
+        token_cache.clear()
+        result = measure(client, tokens, args.requests, cached)
+        print(f"{name:>9} {result['p50_us']:>9.1f} {result['p99_us']:>9.1f}")
+    print(token_cache.stats())
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,100 @@
+"""Catalog and order-list latency while a burst of logins is hashing.
+
+Drives a running server over HTTP. Probe threads keep requesting a
+catalog endpoint and a transaction list; the same probes run first on
+an idle server and then during a login storm. Compare the two rows with
+BCRYPT_WORKERS=0 (hashing on request threads) and with the worker pool.
+
+    python -m benchmarks.bench_login_storm --url http://localhost:5000 \\
+        --email demo@example.com --password secret --shop-id 1 --user-id 1
+"""
+import argparse
+import json
+import statistics
+import threading
+import time
+import urllib.error
+import urllib.request
+
+def call(url, method='GET', body=None, token=None):
+    headers = {'Content-Type': 'application/json'}
+    if token:
+        headers['Authorization'] = f'Bearer {token}'
+    data = json.dumps(body).encode('utf-8') if body is not None else None
+    req = urllib.request.Request(url, data=data, headers=headers, method=method)
+    try:
+        with urllib.request.urlopen(req, timeout=30) as response:
+            return response.status, response.read()
+    except urllib.error.HTTPError as e:
+        return e.code, e.read()
+
+def login(base, email, password):
+    status, body = call(f'{base}/login', 'POST', {'email': email, 'password': password})
+    if status != 200:
+        raise SystemExit(f'Login failed ({status}): {body[:200]!r}')
+    return json.loads(body)['token']
+
+def probe(urls, token, stop, timings):
+    i = 0
+    while not stop.is_set():
+        url = urls[i % len(urls)]
+        i += 1
+        start = time.perf_counter()
+        call(url, token=token)
+        timings.append((time.perf_counter() - start) * 1000)
+
+def storm(base, email, password, stop, statuses):
+    while not stop.is_set():
+        status, _ = call(f'{base}/login', 'POST', {'email': email, 'password': password})
+        statuses.append(status)
+
+def run_phase(args, token, storm_threads):
+    urls = [
+        f'{args.url}/shop/{args.shop_id}/full',
+        f'{args.url}/user_transactions/{args.user_id}?limit=20',
+    ]
+    stop = threading.Event()
+    timings = []
+    statuses = []
+    threads = [threading.Thread(target=probe, args=(urls, token, stop, timings))
+               for _ in range(args.probes)]
+    threads += [threading.Thread(target=storm, args=(args.url, args.email, args.password, stop, statuses))
+                for _ in range(storm_threads)]
+    for thread in threads:
+        thread.start()
+    time.sleep(args.duration)
+    stop.set()
+    for thread in threads:
+        thread.join()
+
+    timings.sort()
+    return {
+        'probe_requests': len(timings),
+        'p50_ms': statistics.median(timings) if timings else None,
+        'p99_ms': timings[min(len(timings) - 1, int(len(timings) * 0.99))] if timings else None,
+        'logins': len(statuses),
+        'logins_shed': sum(1 for status in statuses if status == 503),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--url', default='http://localhost:5000')
+    parser.add_argument('--email', required=True)
+    parser.add_argument('--password', required=True)
+    parser.add_argument('--shop-id', type=int, default=1)
+    parser.add_argument('--user-id', type=int, default=1)
+    parser.add_argument('--probes', type=int, default=4)
+    parser.add_argument('--logins', type=int, default=32, help='concurrent login threads')
+    parser.add_argument('--duration', type=float, default=10.0)
+    args = parser.parse_args()
+
+    token = login(args.url, args.email, args.password)
+
+    print(f"{'phase':>6} {'probes':>7} {'p50 ms':>9} {'p99 ms':>9} {'logins':>7} {'shed':>5}")
+    for name, storm_threads in (('idle', 0), ('storm', args.logins)):
+        result = run_phase(args, token, storm_threads)
+        print(f"{name:>6} {result['probe_requests']:>7} {result['p50_ms'] or 0:>9.2f} "
+              f"{result['p99_ms'] or 0:>9.2f} {result['logins']:>7} {result['logins_shed']:>5}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,100 @@
+"""Cost of turning transaction rows into a JSON response, per 10k rows.
+
+Rows are synthetic but typed like a fetchall() of transactions (Decimal,
+datetime, date, TIME as timedelta). Compares the old per-route loop
+(isinstance on every value, then jsonify) with RowJSONEncoder on the raw
+rows, through the standard library and through orjson when installed.
+
+    python -m benchmarks.bench_serialization --rows 10000 --repeat 20
+"""
+import argparse
+import random
+import statistics
+import time
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+
+from flask import Flask, jsonify
+
+from utils.serialization import RowJSONEncoder, orjson
+
+STATUSES = ('Pending', 'Processing', 'Completed', 'Cancelled')
+
+def make_rows(count):
+    rng = random.Random(42)
+    start = datetime(2024, 1, 1)
+    return [{
+        'id': i,
+        'user_id': rng.randint(1, 20000),
+        'shop_id': rng.randint(1, 2000),
+        'service_name': 'Full Service',
+        'kilo_amount': Decimal(rng.randint(10, 200)) / 10,
+        'total_amount': Decimal(rng.randint(5000, 90000)) / 100,
+        'status': rng.choice(STATUSES),
+        'payment_method': 'Cash',
+        'scheduled_date': date(2024, 1, 1) + timedelta(days=rng.randint(0, 365)),
+        'scheduled_time': timedelta(hours=rng.randint(8, 20)),
+        'notes': None,
+        'created_at': start + timedelta(seconds=rng.randint(0, 365 * 24 * 3600)),
+    } for i in range(count)]
+
+def legacy_format(rows):
+    # What get_shop_transactions used to do before jsonify
+    formatted_rows = []
+    for row in rows:
+        formatted = {}
+        for key, value in row.items():
+            if isinstance(value, datetime):
+                formatted[key] = value.strftime('%Y-%m-%d %H:%M:%S')
+            elif isinstance(value, date):
+                formatted[key] = value.isoformat()
+            elif isinstance(value, timedelta):
+                formatted[key] = str(value)
+            elif isinstance(value, Decimal):
+                formatted[key] = float(value)
+            else:
+                formatted[key] = value
+        formatted_rows.append(formatted)
+    return formatted_rows
+
+def timed(fn, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=10000)
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    rows = make_rows(args.rows)
+    scale = 10000 / args.rows
+
+    legacy_app = Flask('legacy')
+    encoder_app = Flask('encoder')
+    encoder_app.json_encoder = RowJSONEncoder
+
+    cases = [('per-route loop + jsonify', legacy_app, legacy_format, False)]
+    cases.append(('RowJSONEncoder (json)', encoder_app, None, False))
+    if orjson is not None:
+        cases.append(('RowJSONEncoder (orjson)', encoder_app, None, True))
+    else:
+        print('orjson is not installed; skipping the orjson row\n')
+
+    print(f"{'path':<28} {'ms / 10k rows':>14} {'bytes':>10}")
+    for name, flask_app, prepare, use_orjson in cases:
+        RowJSONEncoder.use_orjson = use_orjson
+        with flask_app.app_context():
+            def render():
+                data = prepare(rows) if prepare else rows
+                return jsonify({'transactions': data}).get_data()
+            size = len(render())
+            ms = timed(render, args.repeat) * scale
+        print(f"{name:<28} {ms:>14.2f} {size:>10}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,66 @@
+"""Time to first byte and total time of the list endpoints, buffered vs streamed.
+
+Drives a running server over HTTP; point it at a shop and a user with a
+lot of orders. Server memory is best watched alongside (e.g. the worker's
+RSS in top): with ?stream=1 it should stay flat as the lists grow.
+
+    python -m benchmarks.bench_streaming --url http://localhost:5000 \\
+        --email demo@example.com --password secret --shop-id 1 --user-id 1
+"""
+import argparse
+import json
+import statistics
+import time
+import urllib.error
+import urllib.request
+
+def login(base, email, password):
+    req = urllib.request.Request(
+        f'{base}/login',
+        data=json.dumps({'email': email, 'password': password}).encode('utf-8'),
+        headers={'Content-Type': 'application/json'},
+        method='POST'
+    )
+    try:
+        with urllib.request.urlopen(req, timeout=30) as response:
+            return json.loads(response.read())['token']
+    except urllib.error.HTTPError as e:
+        raise SystemExit(f'Login failed ({e.code}): {e.read()[:200]!r}')
+
+def fetch(url, token):
+    """(ttfb_ms, total_ms, bytes) of one GET."""
+    req = urllib.request.Request(url, headers={'Authorization': f'Bearer {token}'})
+    start = time.perf_counter()
+    with urllib.request.urlopen(req, timeout=120) as response:
+        first = response.read(1)
+        ttfb = time.perf_counter() - start
+        size = len(first)
+        while True:
+            chunk = response.read(64 * 1024)
+            if not chunk:
+                break
+            size += len(chunk)
+    return ttfb * 1000, (time.perf_counter() - start) * 1000, size
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--url', default='http://localhost:5000')
+    parser.add_argument('--email', required=True)
+    parser.add_argument('--password', required=True)
+    parser.add_argument('--shop-id', type=int, default=1)
+    parser.add_argument('--user-id', type=int, default=1)
+    parser.add_argument('--repeat', type=int, default=10)
+    args = parser.parse_args()
+
+    token = login(args.url, args.email, args.password)
+    paths = ['/shops', f'/shop_transactions/{args.shop_id}', f'/user_transactions/{args.user_id}']
+
+    print(f"{'endpoint':<28} {'mode':>8} {'ttfb p50':>9} {'total p50':>10} {'bytes':>10}")
+    for path in paths:
+        for mode, suffix in (('buffered', ''), ('stream', '?stream=1')):
+            runs = [fetch(args.url + path + suffix, token) for _ in range(args.repeat)]
+            print(f"{path:<28} {mode:>8} {statistics.median(r[0] for r in runs):>9.2f} "
+                  f"{statistics.median(r[1] for r in runs):>10.2f} {runs[-1][2]:>10}")
+
+if __name__ == '__main__':
+    main()
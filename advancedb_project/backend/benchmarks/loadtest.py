@@ -0,0 +1,617 @@
+"""End-to-end load test: customers, shop owners and Socket.IO clients.
+
+Runs entirely on one machine. MySQL can be a throwaway container:
+
+    docker run -d --name labaride-mysql -e MYSQL_ROOT_PASSWORD=1025 -p 3306:3306 mysql:8
+
+seed builds a scratch database (LOADTEST_DB_NAME, default LabaRide_load)
+from database.sql on the server configured in .env and fills it with a
+synthetic dataset. Users 1..--shops each own the shop with the same id;
+the rest are customers. Every seeded user has the password
+LOADTEST_PASSWORD (default loadtest), hashed once at BCRYPT_ROUNDS.
+
+    python -m benchmarks.loadtest seed --users 5000 --shops 1000 --transactions 300000
+
+Then start the server against it and drive it:
+
+    DB_NAME=LabaRide_load python wsgi.py
+    python -m benchmarks.loadtest run --duration 60 --sockets 500 --out before.json
+
+run logs in --customers customers and --owners shop owners, then holds
+--sockets Socket.IO clients spread over their user_ and shop_ rooms.
+--workers threads pick scenarios by --mix weight:
+
+    browse        GET /shops
+    open_shop     GET /shop/<id>/full
+    create_order  POST /create_transaction/<user_id>
+    accept_order  PUT /update_transaction_status/<id> -> Processing,
+                  for an order this run created
+
+Event lag is the time from sending the request that caused an event to
+each client in the room receiving it (new_transaction and status_update
+in the shop room, transaction_update and status_update in the user room),
+including events that arrived inside a coalesced `updates` frame.
+
+The JSON report holds throughput, p50/p95/p99 and error rate per
+scenario plus the event lag, and two reports diff with:
+
+    python -m benchmarks.loadtest compare before.json after.json
+
+The socket clients need the python-socketio client extras
+(pip install "python-socketio[asyncio_client]"); --sockets 0 skips them.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+import mysql.connector
+from dotenv import load_dotenv
+
+load_dotenv()
+
+from database.bulk import insert_many
+from database.migrate import CREATE_MIGRATIONS_TABLE, migration_files, split_statements
+from database.rollups import rebuild
+from utils.passwordHasher import PasswordHasher
+
+SCHEMA_FILE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                           'database', 'database.sql')
+PASSWORD = os.getenv('LOADTEST_PASSWORD', 'loadtest')
+
+SERVICES = ('Wash Only', 'Dry Clean', 'Steam Press', 'Full Service', 'Fold Only')
+STATUSES = ('Pending', 'Processing', 'Completed', 'Cancelled')
+SCENARIOS = ('browse', 'open_shop', 'create_order', 'accept_order')
+DEFAULT_MIX = 'browse=40,open_shop=30,create_order=20,accept_order=10'
+
+# Seeding
+
+def schema_statements():
+    """CREATE TABLE statements of database.sql, without its USE and SELECTs."""
+    with open(SCHEMA_FILE) as f:
+        lines = [line for line in f if not line.lstrip().startswith('#')]
+    return [statement for statement in split_statements(''.join(lines))
+            if statement.upper().startswith('CREATE TABLE')]
+
+def create_schema(cursor, database):
+    cursor.execute(f"DROP DATABASE IF EXISTS `{database}`")
+    cursor.execute(f"CREATE DATABASE `{database}`")
+    cursor.execute(f"USE `{database}`")
+    # database.sql creates transactions before the shops it references
+    cursor.execute("SET FOREIGN_KEY_CHECKS = 0")
+    for statement in schema_statements():
+        cursor.execute(statement)
+    # database.sql already has everything the migrations add
+    cursor.execute(CREATE_MIGRATIONS_TABLE)
+    cursor.executemany("INSERT INTO schema_migrations (version) VALUES (%s)",
+                       [(name,) for name in migration_files()])
+
+def order_row(rng, user_id, shop_id, status, created_at):
+    kilos = rng.choice((3.0, 5.0, 7.5, 10.0))
+    subtotal = kilos * 50
+    return (user_id, shop_id, f'User {user_id}', f'user{user_id}@example.com', '09170000000',
+            rng.choice(SERVICES), kilos, subtotal, 50, 0, subtotal + 50, 'Pickup & Delivery',
+            'Zone 1', 'Main St', f'Barangay {shop_id % 40}', 'Bldg 1',
+            created_at.date(), '09:00:00', status, created_at)
+
+TRANSACTION_INSERT = """
+    INSERT INTO transactions (
+        user_id, shop_id, user_name, user_email, user_phone,
+        service_name, kilo_amount, subtotal, delivery_fee,
+        voucher_discount, total_amount, delivery_type,
+        zone, street, barangay, building,
+        scheduled_date, scheduled_time, status, created_at
+    ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s,
+              %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+"""
+
+def seed(cursor, args):
+    rng = random.Random(args.seed)
+    now = datetime.now()
+    password = PasswordHasher(workers=0, rounds=int(os.getenv('BCRYPT_ROUNDS', '12'))).hash(PASSWORD)
+
+    insert_many(cursor, """
+        INSERT INTO users (name, email, password, phone, is_shop_owner)
+        VALUES (%s, %s, %s, %s, %s)
+    """, [
+        (f'User {i}', f'user{i}@example.com', password, '09170000000', i <= args.shops)
+        for i in range(1, args.users + 1)
+    ], 1000)
+    insert_many(cursor, """
+        INSERT INTO shops (user_id, shop_name, contact_number, zone, street,
+                           barangay, building, opening_time, closing_time, created_at)
+        VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+    """, [
+        (i, f'Shop {i}', '09170000000', 'Zone 1', 'Main St', f'Barangay {i % 40}', None,
+         '08:00 AM', '08:00 PM', now - timedelta(days=rng.randint(0, 730)))
+        for i in range(1, args.shops + 1)
+    ], 1000)
+    insert_many(cursor, """
+        INSERT INTO shop_services (shop_id, service_name, price, is_active)
+        VALUES (%s, %s, %s, %s)
+    """, [
+        (shop_id, name, rng.randint(50, 300), True)
+        for shop_id in range(1, args.shops + 1) for name in SERVICES
+    ], 1000)
+    insert_many(cursor, """
+        INSERT INTO kilo_prices (shop_id, min_kilo, max_kilo, price_per_kilo)
+        VALUES (%s, %s, %s, %s)
+    """, [(shop_id, 0, 100, 50) for shop_id in range(1, args.shops + 1)], 1000)
+    for table, column in (('household_items', 'item_name'), ('clothing_types', 'type_name')):
+        insert_many(cursor, f"INSERT INTO {table} (shop_id, {column}, price) VALUES (%s, %s, %s)", [
+            (shop_id, f'{column} {n}', rng.randint(10, 100))
+            for shop_id in range(1, args.shops + 1) for n in range(10)
+        ], 1000)
+
+    customers = range(args.shops + 1, args.users + 1)
+    for start in range(0, args.transactions, 5000):
+        insert_many(cursor, TRANSACTION_INSERT, [
+            order_row(rng, rng.choice(customers), rng.randint(1, args.shops), rng.choice(STATUSES),
+                      now - timedelta(seconds=rng.randint(0, 365 * 24 * 3600)))
+            for _ in range(min(5000, args.transactions - start))
+        ], 5000)
+
+def run_seed(args):
+    if args.users <= args.shops:
+        raise SystemExit('--users must be larger than --shops: shop owners are users too')
+    database = os.getenv('LOADTEST_DB_NAME', 'LabaRide_load')
+    conn = mysql.connector.connect(
+        host=os.getenv('DB_HOST', 'localhost'),
+        user=os.getenv('DB_USER', 'root'),
+        password=os.getenv('DB_PASSWORD', '1025')
+    )
+    cursor = conn.cursor()
+    try:
+        start = time.perf_counter()
+        create_schema(cursor, database)
+        seed(cursor, args)
+        cursor.execute("SET FOREIGN_KEY_CHECKS = 1")
+        conn.commit()
+        days = rebuild(conn)
+        cursor.execute("ANALYZE TABLE users, shops, transactions, shop_services, kilo_prices, "
+                       "household_items, clothing_types, shop_daily_stats")
+        cursor.fetchall()
+        print(f"Seeded {database}: {args.users} users, {args.shops} shops, "
+              f"{args.transactions} transactions ({days} rollup days) "
+              f"in {time.perf_counter() - start:.1f}s")
+        print(f"Start the server with DB_NAME={database}; every user's password is {PASSWORD!r}")
+    finally:
+        cursor.close()
+        conn.close()
+
+# Load
+
+def call(url, method='GET', body=None, token=None):
+    headers = {'Content-Type': 'application/json'}
+    if token:
+        headers['Authorization'] = f'Bearer {token}'
+    data = json.dumps(body).encode('utf-8') if body is not None else None
+    req = urllib.request.Request(url, data=data, headers=headers, method=method)
+    try:
+        with urllib.request.urlopen(req, timeout=30) as response:
+            return response.status, response.read()
+    except urllib.error.HTTPError as e:
+        return e.code, e.read()
+    except (urllib.error.URLError, OSError) as e:
+        return 0, str(e).encode('utf-8')
+
+def login(base, user_id):
+    status, body = call(f'{base}/login', 'POST',
+                        {'email': f'user{user_id}@example.com', 'password': PASSWORD})
+    if status != 200:
+        raise SystemExit(f'Login of user {user_id} failed ({status}): {body[:200]!r}')
+    return json.loads(body)['token']
+
+def percentile(ordered, q):
+    if not ordered:
+        return None
+    return round(ordered[min(len(ordered) - 1, int(len(ordered) * q))], 3)
+
+def summarize(timings, seconds=None):
+    ordered = sorted(timings)
+    summary = {
+        'count': len(ordered),
+        'p50_ms': percentile(ordered, 0.50),
+        'p95_ms': percentile(ordered, 0.95),
+        'p99_ms': percentile(ordered, 0.99),
+        'max_ms': round(ordered[-1], 3) if ordered else None,
+    }
+    if seconds:
+        summary['throughput_rps'] = round(len(ordered) / seconds, 2)
+    return summary
+
+def parse_mix(text):
+    weights = {}
+    for part in text.split(','):
+        name, _, weight = part.partition('=')
+        name = name.strip()
+        if name not in SCENARIOS:
+            raise SystemExit(f'Unknown scenario {name!r}; expected one of {", ".join(SCENARIOS)}')
+        weights[name] = float(weight or 1)
+    return weights
+
+
+class EventLog:
+    """Send times of requests and receive times of the events they cause.
+
+    Keys are (room, event, transaction_id, status); receipts are recorded
+    per socket client, so a room with three clients expects three.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.sent = {}       # key -> perf_counter when the request went out
+        self.received = {}   # key -> {client: perf_counter}
+        self.members = {}    # room -> clients joined
+        self.frames = 0
+
+    def expect(self, key, at):
+        with self._lock:
+            self.sent.setdefault(key, at)
+
+    def receive(self, client, room, event, data):
+        at = time.perf_counter()
+        if event == 'updates':
+            events = [(item.get('event'), item.get('data') or {}) for item in data.get('events', [])]
+        else:
+            events = [(event, data)]
+        with self._lock:
+            self.frames += 1
+            for name, payload in events:
+                if not isinstance(payload, dict) or 'transaction_id' not in payload:
+                    continue
+                key = (room, name, str(payload['transaction_id']), payload.get('status'))
+                self.received.setdefault(key, {}).setdefault(client, at)
+
+    def joined(self, room):
+        with self._lock:
+            self.members[room] = self.members.get(room, 0) + 1
+
+    def report(self):
+        with self._lock:
+            lags, expected, missed = [], 0, 0
+            for key, sent_at in self.sent.items():
+                clients = self.members.get(key[0], 0)
+                receipts = self.received.get(key, {})
+                expected += clients
+                missed += max(0, clients - len(receipts))
+                lags.extend((at - sent_at) * 1000 for at in receipts.values())
+            return {
+                **summarize(lags),
+                'expected': expected,
+                'missed': missed,
+                'frames': self.frames,
+            }
+
+
+class SocketClients:
+    """Socket.IO clients on one asyncio loop in a background thread."""
+
+    def __init__(self, url, rooms, events, connect_timeout=30):
+        self.url = url
+        self.rooms = rooms              # [(join event, payload, room)], one per client
+        self.events = events
+        self.connect_timeout = connect_timeout
+        self.loop = asyncio.new_event_loop()
+        self.clients = []
+        self.failed = 0
+        self._thread = threading.Thread(target=self.loop.run_forever, name='loadtest-sockets',
+                                        daemon=True)
+
+    async def _connect(self, index, join, payload, room):
+        import socketio
+
+        client = socketio.AsyncClient(reconnection=False)
+        joined = asyncio.Event()
+
+        @client.on('room_joined')
+        async def on_joined(data):
+            joined.set()
+
+        for name in ('new_transaction', 'transaction_update', 'status_update', 'updates'):
+            client.on(name, lambda data, name=name: self.events.receive(index, room, name, data))
+
+        try:
+            await client.connect(self.url, transports=['websocket'])
+            await client.emit(join, payload)
+            await asyncio.wait_for(joined.wait(), self.connect_timeout)
+        except Exception as e:
+            self.failed += 1
+            if self.failed <= 3:
+                print(f"Socket client for {room} failed: {e}")
+            return
+        self.events.joined(room)
+        self.clients.append(client)
+
+    async def _connect_all(self):
+        # Bounded so a few hundred handshakes do not all land in the same instant
+        gate = asyncio.Semaphore(50)
+
+        async def bounded(*args):
+            async with gate:
+                await self._connect(*args)
+
+        await asyncio.gather(*(bounded(i, *room) for i, room in enumerate(self.rooms)))
+
+    async def _disconnect_all(self):
+        await asyncio.gather(*(client.disconnect() for client in self.clients),
+                             return_exceptions=True)
+
+    def start(self):
+        self._thread.start()
+        asyncio.run_coroutine_threadsafe(self._connect_all(), self.loop).result()
+        return len(self.clients)
+
+    def stop(self):
+        asyncio.run_coroutine_threadsafe(self._disconnect_all(), self.loop).result(timeout=30)
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self._thread.join(timeout=5)
+
+
+class LoadRun:
+    def __init__(self, args, customers, owners, events):
+        self.args = args
+        self.customers = customers      # [(user_id, token)]
+        self.owners = owners            # {shop_id: token}; owner i has shop i
+        self.events = events
+        self.pending = []               # (transaction_id, shop_id, user_id) to accept
+        self._lock = threading.Lock()
+        self.timings = {name: [] for name in SCENARIOS}
+        self.errors = {name: 0 for name in SCENARIOS}
+        self.error_samples = {}
+        self.recording = False
+
+    def record(self, scenario, start, status, body):
+        elapsed = (time.perf_counter() - start) * 1000
+        if not self.recording:
+            return
+        with self._lock:
+            self.timings[scenario].append(elapsed)
+            if status == 0 or status >= 400:
+                self.errors[scenario] += 1
+                self.error_samples.setdefault(f'{scenario} {status}', body[:200].decode('utf-8', 'replace'))
+
+    def browse(self, rng):
+        user_id, token = rng.choice(self.customers)
+        start = time.perf_counter()
+        status, body = call(f'{self.args.url}/shops', token=token)
+        self.record('browse', start, status, body)
+
+    def open_shop(self, rng):
+        user_id, token = rng.choice(self.customers)
+        start = time.perf_counter()
+        status, body = call(f'{self.args.url}/shop/{rng.randint(1, self.args.shop_range)}/full',
+                            token=token)
+        self.record('open_shop', start, status, body)
+
+    def create_order(self, rng):
+        user_id, token = rng.choice(self.customers)
+        shop_id = rng.choice(list(self.owners))
+        kilos = rng.choice((3.0, 5.0, 7.5))
+        order = {
+            'shop_id': shop_id,
+            'service_name': rng.choice(SERVICES),
+            'kilo_amount': kilos,
+            'subtotal': kilos * 50,
+            'delivery_fee': 50,
+            'voucher_discount': 0,
+            'total_amount': kilos * 50 + 50,
+            'delivery_type': 'Pickup & Delivery',
+            'zone': 'Zone 1',
+            'street': 'Main St',
+            'barangay': 'Barangay 1',
+            'building': 'Bldg 1',
+            'scheduled_date': (datetime.now() + timedelta(days=1)).strftime('%Y-%m-%d'),
+            'scheduled_time': '09:00:00',
+            'items': [{'name': 'Shirts', 'quantity': rng.randint(1, 10)}],
+        }
+        start = time.perf_counter()
+        status, body = call(f'{self.args.url}/create_transaction/{user_id}', 'POST', order, token)
+        self.record('create_order', start, status, body)
+        if status == 201:
+            transaction_id = str(json.loads(body)['transaction_id'])
+            if self.recording:
+                self.events.expect((f'shop_{shop_id}', 'new_transaction', transaction_id, 'Pending'), start)
+                self.events.expect((f'user_{user_id}', 'transaction_update', transaction_id, 'Pending'), start)
+            with self._lock:
+                self.pending.append((transaction_id, shop_id, user_id))
+
+    def accept_order(self, rng):
+        with self._lock:
+            order = self.pending.pop(rng.randrange(len(self.pending))) if self.pending else None
+        if order is None:
+            # Nothing to accept yet: place the order a shop would accept
+            self.create_order(rng)
+            return
+        transaction_id, shop_id, user_id = order
+        start = time.perf_counter()
+        status, body = call(f'{self.args.url}/update_transaction_status/{transaction_id}', 'PUT',
+                            {'status': 'Processing'}, self.owners[shop_id])
+        self.record('accept_order', start, status, body)
+        if status == 200 and self.recording:
+            for room in (f'shop_{shop_id}', f'user_{user_id}'):
+                self.events.expect((room, 'status_update', transaction_id, 'Processing'), start)
+
+    def worker(self, index, stop, weights):
+        rng = random.Random(self.args.seed * 1000 + index)
+        names, shares = list(weights), list(weights.values())
+        while not stop.is_set():
+            getattr(self, rng.choices(names, shares)[0])(rng)
+
+    def drive(self, weights):
+        stop = threading.Event()
+        threads = [threading.Thread(target=self.worker, args=(i, stop, weights))
+                   for i in range(self.args.workers)]
+        for thread in threads:
+            thread.start()
+        time.sleep(self.args.warmup)
+        self.recording = True
+        start = time.perf_counter()
+        time.sleep(self.args.duration)
+        self.recording = False
+        elapsed = time.perf_counter() - start
+        stop.set()
+        for thread in threads:
+            thread.join()
+        return elapsed
+
+def revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                              text=True, timeout=5).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+def run_load(args):
+    weights = parse_mix(args.mix)
+    if args.owners > args.shop_range:
+        raise SystemExit('--owners cannot exceed --shop-range')
+    rng = random.Random(args.seed)
+    customer_ids = rng.sample(range(args.shop_range + 1, args.user_range + 1), args.customers)
+    shop_ids = rng.sample(range(1, args.shop_range + 1), args.owners)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        customer_tokens = list(pool.map(lambda user_id: login(args.url, user_id), customer_ids))
+        owner_tokens = list(pool.map(lambda shop_id: login(args.url, shop_id), shop_ids))
+    customers = list(zip(customer_ids, customer_tokens))
+    owners = dict(zip(shop_ids, owner_tokens))
+    print(f"Logged in {len(customers)} customers and {len(owners)} shop owners "
+          f"in {time.perf_counter() - start:.1f}s")
+
+    events = EventLog()
+    rooms = ([('join_user_room', {'user_id': user_id}, f'user_{user_id}') for user_id in customer_ids]
+             + [('join_shop_room', {'shop_id': shop_id}, f'shop_{shop_id}') for shop_id in shop_ids])
+    sockets = None
+    connected = 0
+    if args.sockets:
+        sockets = SocketClients(args.url, [rooms[i % len(rooms)] for i in range(args.sockets)], events)
+        connected = sockets.start()
+        print(f"{connected} socket clients joined, {sockets.failed} failed")
+
+    load = LoadRun(args, customers, owners, events)
+    try:
+        elapsed = load.drive(weights)
+        # Events for the last requests may still be in flight
+        time.sleep(args.drain)
+    finally:
+        if sockets:
+            sockets.stop()
+
+    scenarios = {}
+    for name in SCENARIOS:
+        if name not in weights:
+            continue
+        count = len(load.timings[name])
+        scenarios[name] = {
+            **summarize(load.timings[name], elapsed),
+            'errors': load.errors[name],
+            'error_rate': round(load.errors[name] / count, 4) if count else None,
+        }
+    return {
+        'started_at': datetime.now().isoformat(timespec='seconds'),
+        'revision': revision(),
+        'config': {key: value for key, value in vars(args).items() if key not in ('command', 'out')},
+        'duration_s': round(elapsed, 3),
+        'scenarios': scenarios,
+        'events': events.report() if sockets else None,
+        'sockets': {'requested': args.sockets, 'connected': connected,
+                    'failed': sockets.failed if sockets else 0},
+        'error_samples': load.error_samples,
+    }
+
+def print_report(report):
+    print(f"\n{'scenario':<14} {'count':>7} {'rps':>8} {'p50 ms':>9} {'p95 ms':>9} "
+          f"{'p99 ms':>9} {'errors':>7}")
+    for name, result in report['scenarios'].items():
+        print(f"{name:<14} {result['count']:>7} {result['throughput_rps']:>8.1f} "
+              f"{result['p50_ms'] or 0:>9.2f} {result['p95_ms'] or 0:>9.2f} "
+              f"{result['p99_ms'] or 0:>9.2f} {(result['error_rate'] or 0) * 100:>6.2f}%")
+    lag = report['events']
+    if lag:
+        print(f"\nevent lag: {lag['count']} deliveries, p50 {lag['p50_ms'] or 0:.2f} ms, "
+              f"p95 {lag['p95_ms'] or 0:.2f} ms, p99 {lag['p99_ms'] or 0:.2f} ms, "
+              f"{lag['missed']} of {lag['expected']} missed")
+    for sample, body in report['error_samples'].items():
+        print(f"  {sample}: {body}")
+
+def run_compare(args):
+    with open(args.before) as f:
+        before = json.load(f)
+    with open(args.after) as f:
+        after = json.load(f)
+
+    def change(old, new):
+        if not old or new is None:
+            return ''
+        return f'{(new - old) / old * 100:+.1f}%'
+
+    fields = ('throughput_rps', 'p50_ms', 'p95_ms', 'p99_ms', 'error_rate')
+    print(f"{before.get('revision')} -> {after.get('revision')}")
+    print(f"{'scenario':<14} {'field':<15} {'before':>10} {'after':>10} {'change':>9}")
+    rows = [(name, before['scenarios'].get(name, {}), result)
+            for name, result in after['scenarios'].items()]
+    if before.get('events') and after.get('events'):
+        rows.append(('event lag', before['events'], after['events']))
+    for name, old, new in rows:
+        for field in fields:
+            if field not in new:
+                continue
+            print(f"{name:<14} {field:<15} {old.get(field) if old.get(field) is not None else '-':>10} "
+                  f"{new[field] if new[field] is not None else '-':>10} "
+                  f"{change(old.get(field), new[field]):>9}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    seed_parser = commands.add_parser('seed', help='build and fill the load-test database')
+    seed_parser.add_argument('--users', type=int, default=5000)
+    seed_parser.add_argument('--shops', type=int, default=1000)
+    seed_parser.add_argument('--transactions', type=int, default=300000)
+    seed_parser.add_argument('--seed', type=int, default=42)
+
+    run_parser = commands.add_parser('run', help='drive a running server and write the report')
+    run_parser.add_argument('--url', default='http://localhost:5000')
+    run_parser.add_argument('--user-range', type=int, default=5000, help='--users given to seed')
+    run_parser.add_argument('--shop-range', type=int, default=1000, help='--shops given to seed')
+    run_parser.add_argument('--customers', type=int, default=50, help='customers placing orders')
+    run_parser.add_argument('--owners', type=int, default=20, help='shop owners accepting them')
+    run_parser.add_argument('--sockets', type=int, default=200,
+                            help='Socket.IO clients, spread over the active user_/shop_ rooms')
+    run_parser.add_argument('--workers', type=int, default=16, help='concurrent request threads')
+    run_parser.add_argument('--mix', default=DEFAULT_MIX, help='scenario weights')
+    run_parser.add_argument('--duration', type=float, default=60.0)
+    run_parser.add_argument('--warmup', type=float, default=5.0, help='seconds not recorded')
+    run_parser.add_argument('--drain', type=float, default=2.0,
+                            help='seconds to wait for the last events')
+    run_parser.add_argument('--seed', type=int, default=42)
+    run_parser.add_argument('--out', help='write the JSON report here')
+
+    compare_parser = commands.add_parser('compare', help='diff two JSON reports')
+    compare_parser.add_argument('before')
+    compare_parser.add_argument('after')
+
+    args = parser.parse_args()
+    if args.command == 'seed':
+        run_seed(args)
+    elif args.command == 'compare':
+        run_compare(args)
+    else:
+        report = run_load(args)
+        print_report(report)
+        if args.out:
+            with open(args.out, 'w') as f:
+                json.dump(report, f, indent=2)
+            print(f"\nReport written to {args.out}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,267 @@
+from database.connection import create_connection
+from utils.searchIndex import search_index_from_env
+from utils.spatialIndex import spatial_index_from_env
+from utils.pagination import encode_cursor, decode_cursor, cursor_id, parse_limit
+from utils.cache import ShopCatalogCache, cache_backend_from_env
+from utils.kiloPriceIndex import kilo_price_index_from_env
+from utils.serialization import row_converter
+
+SHOP_COLUMNS = """
+    id, shop_name, contact_number, zone, street, barangay, building,
+    opening_time, closing_time, latitude, longitude
+"""
+
+# Per-shop catalog reads. Each section is cached on its own and
+# /shop/<id>/full sends all of them to MySQL as one multi-statement batch.
+CATALOG_QUERIES = (
+    ('shop', """
+        SELECT id, shop_name, contact_number, zone, street, barangay,
+               building, opening_time, closing_time, created_at,
+               latitude, longitude
+        FROM shops
+        WHERE id = %(shop_id)s
+    """),
+    ('services', """
+        SELECT id, service_name, color, CAST(price AS FLOAT) as price
+        FROM shop_services
+        WHERE shop_id = %(shop_id)s
+    """),
+    ('kilo_prices', """
+        SELECT min_kilo, max_kilo, price_per_kilo
+        FROM kilo_prices
+        WHERE shop_id = %(shop_id)s
+        ORDER BY min_kilo
+    """),
+    ('clothing_types', """
+        SELECT * FROM clothing_types
+        WHERE shop_id = %(shop_id)s
+    """),
+    ('household_items', """
+        SELECT * FROM household_items
+        WHERE shop_id = %(shop_id)s
+    """),
+)
+
+class ShopController:
+    def __init__(self, publish_change=None):
+        self.search_index = search_index_from_env()
+        self.spatial_index = spatial_index_from_env()
+        self.cache = ShopCatalogCache(cache_backend_from_env())
+        self.kilo_prices = kilo_price_index_from_env(
+            lambda shop_id: self.get_catalog(shop_id, 'kilo_prices'))
+        # publish_change(change, data) hands a change to the other worker
+        # processes, which apply it with apply_change
+        self.publish_change = publish_change
+
+    def _load_search_rows(self):
+        conn = create_connection()
+        if not conn:
+            raise RuntimeError('Database connection failed')
+        try:
+            cursor = conn.cursor(dictionary=True)
+            cursor.execute(f"SELECT {SHOP_COLUMNS} FROM shops")
+            shops = cursor.fetchall()
+            cursor.execute("""
+                SELECT id, shop_id, service_name, price
+                FROM shop_services
+            """)
+            services = cursor.fetchall()
+            return shops, services
+        finally:
+            if conn and conn.is_connected():
+                cursor.close()
+                conn.close()
+
+    def _load_located_shops(self):
+        conn = create_connection()
+        if not conn:
+            raise RuntimeError('Database connection failed')
+        try:
+            cursor = conn.cursor(dictionary=True)
+            cursor.execute(f"""
+                SELECT {SHOP_COLUMNS} FROM shops
+                WHERE latitude IS NOT NULL AND longitude IS NOT NULL
+            """)
+            return cursor.fetchall()
+        finally:
+            if conn and conn.is_connected():
+                cursor.close()
+                conn.close()
+
+    def search_shops(self, params):
+        try:
+            limit = parse_limit(params.get('limit'))
+            after_id = None
+            if params.get('cursor'):
+                after_id = decode_cursor(params['cursor'], cursor_id)[0]
+        except ValueError as e:
+            return {'status': 400, 'message': str(e)}
+
+        try:
+            self.search_index.ensure_loaded(self._load_search_rows)
+            shops, has_more = self.search_index.search(
+                q=params.get('q'),
+                barangay=params.get('barangay'),
+                service=params.get('service'),
+                after_id=after_id,
+                limit=limit
+            )
+        except Exception as e:
+            print(f"Error searching shops: {e}")
+            return {'status': 500, 'message': str(e)}
+
+        return {
+            'status': 200,
+            'shops': shops,
+            'next_cursor': encode_cursor(shops[-1]['id']) if has_more else None
+        }
+
+    def nearby_shops(self, params):
+        try:
+            lat = float(params['lat'])
+            lng = float(params['lng'])
+            radius_km = float(params.get('radius_km') or 5)
+            limit = parse_limit(params.get('limit'))
+        except KeyError as e:
+            return {'status': 400, 'message': f'Missing required parameter: {e.args[0]}'}
+        except ValueError as e:
+            return {'status': 400, 'message': f'Invalid parameter: {e}'}
+
+        if not (-90 <= lat <= 90 and -180 <= lng <= 180):
+            return {'status': 400, 'message': 'Coordinates out of range'}
+        if not 0 < radius_km <= 50:
+            return {'status': 400, 'message': 'radius_km must be between 0 and 50'}
+
+        try:
+            self.spatial_index.ensure_loaded(self._load_located_shops)
+            shops = self.spatial_index.nearby(lat, lng, radius_km, limit)
+        except Exception as e:
+            print(f"Error finding nearby shops: {e}")
+            return {'status': 500, 'message': str(e)}
+
+        return {'status': 200, 'shops': shops}
+
+    def _read_sections(self, shop_id, sections):
+        conn = create_connection()
+        if not conn:
+            raise RuntimeError('Database connection failed')
+        try:
+            cursor = conn.cursor(dictionary=True)
+            queries = dict(CATALOG_QUERIES)
+            params = {'shop_id': shop_id}
+            if len(sections) == 1:
+                cursor.execute(queries[sections[0]], params)
+                convert = row_converter(cursor.description)
+                return {sections[0]: [convert(row) for row in cursor.fetchall()]}
+
+            batch = ';'.join(queries[section] for section in sections)
+            results = {}
+            names = iter(sections)
+            for result in cursor.execute(batch, params, multi=True):
+                if result.with_rows:
+                    convert = row_converter(result.description)
+                    results[next(names)] = [convert(row) for row in result.fetchall()]
+            return results
+        finally:
+            if conn and conn.is_connected():
+                cursor.close()
+                conn.close()
+
+    def _load_shop(self, shop_id):
+        rows = self._read_sections(shop_id, ['shop'])['shop']
+        return rows[0] if rows else None
+
+    def _load_full(self, shop_id):
+        sections = self._read_sections(shop_id, [name for name, _ in CATALOG_QUERIES])
+        if not sections['shop']:
+            return None
+        sections['shop'] = sections['shop'][0]
+        return sections
+
+    def get_shop(self, shop_id):
+        """Shop row, or None if it does not exist."""
+        return self.cache.get_or_load(shop_id, 'shop', lambda: self._load_shop(shop_id))
+
+    def get_catalog(self, shop_id, section):
+        """One of services, kilo_prices, clothing_types or household_items."""
+        return self.cache.get_or_load(
+            shop_id, section, lambda: self._read_sections(shop_id, [section])[section])
+
+    def get_shop_full(self, shop_id):
+        try:
+            full = self.cache.get_or_load(shop_id, 'full', lambda: self._load_full(shop_id))
+        except Exception as e:
+            print(f"Error fetching full shop {shop_id}: {e}")
+            return {'status': 500, 'message': str(e)}
+
+        if full is None:
+            return {'status': 404, 'message': 'Shop not found'}
+        return {'status': 200, **full}
+
+    def catalog_changed(self, shop_id):
+        self._changed('catalog_changed', shop_id=shop_id)
+
+    def shop_id_for(self, cursor, table, row_id):
+        """Owning shop of a catalog row, for routes that are keyed by row id."""
+        cursor.execute(f"SELECT shop_id FROM {table} WHERE id = %s", (row_id,))
+        row = cursor.fetchone()
+        if row is None:
+            return None
+        return row['shop_id'] if isinstance(row, dict) else row[0]
+
+    # Index and cache maintenance, called by the write routes after they
+    # commit. Each change is applied here at once, so the writer reads its
+    # own write, and published for the other workers.
+
+    def _changed(self, change, **data):
+        self.apply_change(change, data)
+        if self.publish_change:
+            try:
+                self.publish_change(change, data)
+            except Exception as e:
+                print(f"Change {change} not published: {e}")
+
+    def apply_change(self, change, data):
+        if change == 'catalog_changed':
+            self.cache.invalidate_shop(data['shop_id'])
+            self.kilo_prices.invalidate(data['shop_id'])
+        elif change == 'shop_registered':
+            self.search_index.add_shop(data['shop'])
+            self.spatial_index.put(data['shop'])
+        elif change == 'shops_deleted':
+            for shop_id in data['shop_ids']:
+                self.search_index.remove_shop(shop_id)
+                self.spatial_index.remove(shop_id)
+                self.cache.invalidate_shop(shop_id)
+                self.kilo_prices.invalidate(shop_id)
+        elif change == 'service_added':
+            self.search_index.add_service(
+                data['shop_id'], data['service_id'], data['name'], data['price'])
+        elif change == 'service_updated':
+            self.search_index.update_service(data['service_id'], data['name'], data['price'])
+        elif change == 'service_deleted':
+            self.search_index.remove_service(data['service_id'])
+        else:
+            print(f"Unknown change {change} ignored")
+
+    def shop_registered(self, shop_id, data):
+        shop = {'id': shop_id}
+        for column in ('shop_name', 'contact_number', 'zone', 'street', 'barangay',
+                       'building', 'opening_time', 'closing_time',
+                       'latitude', 'longitude'):
+            shop[column] = data.get(column)
+        self._changed('shop_registered', shop=shop)
+
+    def shops_deleted(self, shop_ids):
+        if shop_ids:
+            self._changed('shops_deleted', shop_ids=list(shop_ids))
+
+    def service_added(self, shop_id, service_id, name, price):
+        self._changed('service_added', shop_id=shop_id, service_id=service_id,
+                      name=name, price=price)
+
+    def service_updated(self, service_id, name, price):
+        self._changed('service_updated', service_id=service_id, name=name, price=price)
+
+    def service_deleted(self, service_id):
+        self._changed('service_deleted', service_id=service_id)
@@ -0,0 +1,102 @@
+from database.connection import create_connection
+from database.rollups import STATUS_COLUMNS
+from datetime import date, datetime, timedelta
+
+DEFAULT_RANGE_DAYS = 30
+MAX_RANGE_DAYS = 366
+
+COUNT_FIELDS = ('orders',) + tuple(status.lower() for status, _ in STATUS_COLUMNS)
+AMOUNT_FIELDS = ('total_amount', 'kilo_amount')
+
+SHOP_STATS_QUERY = f"""
+    SELECT day, order_count AS orders,
+           {', '.join(f'{column} AS {status.lower()}' for status, column in STATUS_COLUMNS)},
+           total_amount, kilo_amount
+    FROM shop_daily_stats
+    WHERE shop_id = %s AND day BETWEEN %s AND %s
+    ORDER BY day
+"""
+
+def parse_day(value, name):
+    try:
+        return datetime.strptime(value, '%Y-%m-%d').date()
+    except (TypeError, ValueError):
+        raise ValueError(f'{name} must be a date (YYYY-MM-DD)')
+
+def empty_bucket(**fields):
+    bucket = dict(fields)
+    bucket.update({field: 0 for field in COUNT_FIELDS})
+    bucket.update({field: 0.0 for field in AMOUNT_FIELDS})
+    return bucket
+
+def add_to(bucket, row):
+    for field in COUNT_FIELDS:
+        bucket[field] += row[field]
+    for field in AMOUNT_FIELDS:
+        bucket[field] = round(bucket[field] + row[field], 2)
+
+
+class StatsController:
+    def get_shop_stats(self, shop_id, params):
+        """Daily and weekly order counts and amounts for a shop, from the
+        shop_daily_stats rollups: one row per day, however many orders.
+
+        Days without orders are filled in with zeros; weeks start on Monday.
+        Amounts leave out cancelled orders.
+        """
+        try:
+            end = parse_day(params['to'], 'to') if params.get('to') else date.today()
+            start = (parse_day(params['from'], 'from') if params.get('from')
+                     else end - timedelta(days=DEFAULT_RANGE_DAYS - 1))
+        except ValueError as e:
+            return {'status': 400, 'message': str(e)}
+        if start > end:
+            return {'status': 400, 'message': 'from must not be after to'}
+        if (end - start).days >= MAX_RANGE_DAYS:
+            return {'status': 400, 'message': f'Range is limited to {MAX_RANGE_DAYS} days'}
+
+        conn = create_connection()
+        if not conn:
+            return {'status': 500, 'message': 'Database connection failed'}
+        try:
+            cursor = conn.cursor(dictionary=True)
+            cursor.execute(SHOP_STATS_QUERY, (shop_id, start, end))
+            rows = {row['day']: row for row in cursor.fetchall()}
+        except Exception as e:
+            print(f"Error fetching stats for shop {shop_id}: {e}")
+            return {'status': 500, 'message': str(e)}
+        finally:
+            if conn and conn.is_connected():
+                cursor.close()
+                conn.close()
+
+        days = []
+        weeks = {}
+        totals = empty_bucket()
+        for offset in range((end - start).days + 1):
+            day = start + timedelta(days=offset)
+            bucket = empty_bucket(day=day.isoformat())
+            row = rows.get(day)
+            if row:
+                add_to(bucket, {
+                    **row,
+                    'total_amount': float(row['total_amount']),
+                    'kilo_amount': float(row['kilo_amount'])
+                })
+            days.append(bucket)
+
+            week_start = (day - timedelta(days=day.weekday())).isoformat()
+            if week_start not in weeks:
+                weeks[week_start] = empty_bucket(week=week_start)
+            add_to(weeks[week_start], bucket)
+            add_to(totals, bucket)
+
+        return {
+            'status': 200,
+            'shop_id': shop_id,
+            'from': start.isoformat(),
+            'to': end.isoformat(),
+            'days': days,
+            'weeks': list(weeks.values()),
+            'totals': totals
+        }
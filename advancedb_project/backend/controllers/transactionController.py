@@ -1,99 +1,373 @@
 from database.connection import create_connection
+from database.bulk import insert_many
+from database.streaming import stream_rows
+from database.rollups import record_order, record_transition, transition_sql
+from utils.pagination import (encode_cursor, decode_cursor, cursor_id, cursor_time,
+                              parse_limit, page_size_from_env)
+from utils.cache import cache_backend_from_env
+from utils.serialization import row_converter
 import json
 
+STATUSES = ('Pending', 'Processing', 'Completed', 'Cancelled')
+
+MAX_BATCH_IDS = 100
+
+# Detail reads: both statements are primary key / foreign key lookups and
+# go to MySQL as one multi-statement batch
+TRANSACTION_DETAIL_BATCH = """
+    SELECT t.*
+    FROM transactions t
+    WHERE t.id IN ({ids});
+    SELECT ti.transaction_id, ti.item_name AS name, ti.quantity
+    FROM transaction_items ti
+    WHERE ti.transaction_id IN ({ids})
+    ORDER BY ti.transaction_id, ti.id
+"""
+
+# Order state machine: target status -> statuses it may be reached from
+STATUS_TRANSITIONS = {
+    'Processing': ('Pending',),
+    'Completed': ('Processing',),
+    'Cancelled': ('Pending', 'Processing'),
+}
+
+# Statuses no transition leaves (Completed, Cancelled). Their details are
+# cached with no invalidation, so this is derived from the table that both
+# update_transaction_status and cancel_transaction enforce: allowing a move
+# out of a status takes it out of the cache too.
+TERMINAL_STATUSES = tuple(
+    status for status in STATUSES
+    if not any(status in sources for sources in STATUS_TRANSITIONS.values())
+)
+
+# One round trip: the guarded UPDATE captures the status it leaves, the
+# row's owners and new version into session variables; the shop's daily
+# rollup is moved along only if the UPDATE matched, and the trailing SELECT
+# returns the captured values. The variables are cleared first because
+# pooled connections keep them.
+UPDATE_STATUS_BATCH = """
+    SET @tx_from_status = NULL, @tx_user_id = NULL, @tx_shop_id = NULL, @tx_version = NULL;
+    UPDATE transactions
+    SET status = IF((@tx_from_status := status) IS NULL, %(status)s, %(status)s),
+        notes = COALESCE(%(notes)s, notes),
+        version = (@tx_version := version + 1),
+        user_id = (@tx_user_id := user_id),
+        shop_id = (@tx_shop_id := shop_id)
+    WHERE id = %(id)s
+      AND status IN ({expected})
+      {version_guard};
+    {rollup};
+    SELECT @tx_user_id AS user_id, @tx_shop_id AS shop_id, @tx_version AS version,
+           @tx_from_status AS previous_status
+"""
+
+UPDATE_STATUS_ROLLUP = transition_sql('@tx_from_status', '%(id)s', guard='AND @tx_version IS NOT NULL').strip()
+
+def normalize_status(value):
+    """Canonical status name for any casing the clients send, or None."""
+    if not isinstance(value, str):
+        return None
+    for status in STATUSES:
+        if status.lower() == value.strip().lower():
+            return status
+    return None
+
+def parse_ids(value):
+    """Distinct transaction ids from a comma separated ?ids= value, in order."""
+    ids = []
+    for part in (value or '').split(','):
+        part = part.strip()
+        if not part:
+            continue
+        try:
+            transaction_id = int(part)
+        except ValueError:
+            raise ValueError('ids must be comma separated integers')
+        if transaction_id not in ids:
+            ids.append(transaction_id)
+    if not ids:
+        raise ValueError('ids is required')
+    if len(ids) > MAX_BATCH_IDS:
+        raise ValueError(f'At most {MAX_BATCH_IDS} ids per request')
+    return ids
+
+REQUIRED_TRANSACTION_FIELDS = (
+    'shop_id', 'service_name', 'subtotal', 'delivery_fee', 'voucher_discount',
+    'total_amount', 'delivery_type', 'zone', 'street', 'barangay', 'building',
+    'scheduled_date', 'scheduled_time'
+)
+
+# Listing queries per owner: the base SELECT and the column it filters on.
+# Both are served by the (owner, created_at, id) and
+# (owner, status, created_at, id) indexes in database.sql.
+TRANSACTION_LISTS = {
+    'user': ("""
+        SELECT t.*, s.shop_name
+        FROM transactions t
+        JOIN shops s ON t.shop_id = s.id
+    """, 't.user_id'),
+    'shop': ("""
+        SELECT t.*, u.name as customer_name, u.email as customer_email
+        FROM transactions t
+        JOIN users u ON t.user_id = u.id
+    """, 't.shop_id'),
+}
+
 class TransactionController:
-    def __init__(self):
+    def __init__(self, kilo_prices):
         self.connection = None
+        # Shared with ShopController, which invalidates it on price edits
+        self.kilo_prices = kilo_prices
+        # Details in TERMINAL_STATUSES, which no longer change
+        self.details = cache_backend_from_env()
+        # Cap for listings requested without limit or cursor; set
+        # TRANSACTION_PAGE_SIZE=0 while app builds that fetch the whole
+        # history without paging are still in use
+        self.page_size = page_size_from_env('TRANSACTION_PAGE_SIZE', 50)
+
+    def build_list_query(self, owner, owner_id, params):
+        """Build the keyset-paginated listing query for a user or shop.
+
+        Without limit or cursor a page of self.page_size rows comes back,
+        or the full history when page_size is None. status takes one
+        status or a comma-separated list ('Pending,Processing').
+        Returns (query, values, limit); limit is None when unpaginated.
+        Raises ValueError for bad parameters.
+        """
+        base_query, owner_column = TRANSACTION_LISTS[owner]
+        conditions = [f"{owner_column} = %s"]
+        values = [owner_id]
+
+        if params.get('status'):
+            statuses = [status.strip().capitalize() for status in params['status'].split(',')]
+            if any(status not in STATUSES for status in statuses):
+                raise ValueError(f'status must be one of {", ".join(STATUSES)}')
+            if len(statuses) == 1:
+                conditions.append("t.status = %s")
+            else:
+                conditions.append(f"t.status IN ({', '.join(['%s'] * len(statuses))})")
+            values.extend(statuses)
+
+        limit = self.page_size
+        if params.get('limit') or params.get('cursor'):
+            limit = parse_limit(params.get('limit'), default=20, maximum=100)
+        if params.get('cursor'):
+            created_at, last_id = decode_cursor(params['cursor'], cursor_time, cursor_id)
+            # Expanded form of (created_at, id) < (%s, %s), which MySQL
+            # turns into a range scan on the composite index
+            conditions.append(
+                "(t.created_at < %s OR (t.created_at = %s AND t.id < %s))"
+            )
+            values.extend([created_at, created_at, last_id])
+
+        query = f"""{base_query}
+            WHERE {' AND '.join(conditions)}
+            ORDER BY t.created_at DESC, t.id DESC
+        """
+        if limit is not None:
+            # One extra row tells us whether another page exists
+            query += " LIMIT %s"
+            values.append(limit + 1)
+        return query, tuple(values), limit
+
+    def list_transactions(self, owner, owner_id, params):
+        try:
+            query, values, limit = self.build_list_query(owner, owner_id, params)
+        except ValueError as e:
+            return {'status': 400, 'message': str(e)}
 
-    def create_transaction(self, user_id, data):
         conn = create_connection()
+        if not conn:
+            return {'status': 500, 'message': 'Database connection failed'}
         try:
             cursor = conn.cursor(dictionary=True)
-            
-            # Get user details
-            user_query = "SELECT name, email, phone FROM users WHERE id = %s"
-            cursor.execute(user_query, (user_id,))
-            user_data = cursor.fetchone()
-            
-            if not user_data:
-                return {'status': 404, 'message': 'User not found'}
+            cursor.execute(query, values)
+            transactions = cursor.fetchall()
 
-            # Validate kilo amount if present
-            if 'kilo_amount' in data:
-                price_query = """
-                    SELECT price_per_kilo 
-                    FROM kilo_prices 
-                    WHERE shop_id = %s AND 
-                    min_kilo <= %s AND 
-                    max_kilo >= %s
-                    LIMIT 1
-                """
-                cursor.execute(price_query, (
-                    data['shop_id'], 
-                    data['kilo_amount'],
-                    data['kilo_amount']
-                ))
-                price_data = cursor.fetchone()
-                
-                if not price_data:
-                    return {'status': 400, 'message': 'Invalid kilo range'}
-
-            # Insert transaction
-            query = """
-                INSERT INTO transactions (
-                    user_id, shop_id, user_name, user_email, user_phone,
-                    service_name, kilo_amount, subtotal, delivery_fee,
-                    voucher_discount, total_amount, delivery_type,
-                    zone, street, barangay, building,
-                    scheduled_date, scheduled_time, payment_method,
-                    notes, status
-                ) VALUES (
-                    %s, %s, %s, %s, %s, %s, %s, %s, %s, %s,
-                    %s, %s, %s, %s, %s, %s, %s, %s, %s, %s,
-                    'Pending'
-                )
-            """
-            
-            values = (
-                user_id,
-                data['shop_id'],
-                user_data['name'],
-                user_data['email'],
-                user_data.get('phone', ''),
-                data['service_name'],
-                data.get('kilo_amount', 0),
-                data['subtotal'],
-                data['delivery_fee'],
-                data['voucher_discount'],
-                data['total_amount'],
-                data['delivery_type'],
-                data['zone'],
-                data['street'],
-                data['barangay'],
-                data['building'],
-                data['scheduled_date'],
-                data['scheduled_time'],
-                data.get('payment_method', 'Cash on Delivery'),
-                data.get('notes', '')
+            next_cursor = None
+            if limit is not None and len(transactions) > limit:
+                transactions = transactions[:limit]
+                last = transactions[-1]
+                next_cursor = encode_cursor(
+                    last['created_at'].strftime('%Y-%m-%d %H:%M:%S'), last['id'])
+
+            return {
+                'status': 200,
+                'transactions': transactions,
+                'next_cursor': next_cursor
+            }
+        except Exception as e:
+            print(f"Error listing {owner} transactions: {e}")
+            return {'status': 500, 'message': str(e)}
+        finally:
+            if conn and conn.is_connected():
+                cursor.close()
+                conn.close()
+
+    def stream_transactions(self, owner, owner_id, params):
+        """Like list_transactions, but 'transactions' is a lazy row iterator.
+
+        'page' is filled in once the iterator is exhausted: its
+        next_cursor is only known after the last row went out.
+        """
+        try:
+            query, values, limit = self.build_list_query(owner, owner_id, params)
+        except ValueError as e:
+            return {'status': 400, 'message': str(e)}
+        try:
+            rows = stream_rows(query, values)
+        except Exception as e:
+            print(f"Error streaming {owner} transactions: {e}")
+            return {'status': 500, 'message': str(e)}
+
+        page = {'next_cursor': None}
+
+        def transactions():
+            last = None
+            for count, row in enumerate(rows):
+                if limit is not None and count == limit:
+                    # The extra row (LIMIT is limit + 1) only says another
+                    # page exists; reading it to the end frees the connection
+                    page['next_cursor'] = encode_cursor(*last)
+                    continue
+                # Taken before yielding: callers may format the row in place
+                last = (row['created_at'].strftime('%Y-%m-%d %H:%M:%S'), row['id'])
+                yield row
+
+        return {'status': 200, 'transactions': transactions(), 'page': page}
+
+    def status_counts(self, shop_id=None):
+        """{shop_id: {status: count}} for one shop, or every shop when None;
+        one grouped scan of the (shop_id, status, ...) index."""
+        where = 'WHERE shop_id = %s' if shop_id is not None else ''
+        conn = create_connection()
+        if not conn:
+            raise ConnectionError('Database connection failed')
+        try:
+            cursor = conn.cursor()
+            cursor.execute(f"""
+                SELECT shop_id, status, COUNT(*)
+                FROM transactions
+                {where}
+                GROUP BY shop_id, status
+            """, (shop_id,) if shop_id is not None else ())
+            counts = {}
+            for row_shop_id, status, count in cursor.fetchall():
+                counts.setdefault(row_shop_id, {})[status] = count
+            return counts
+        finally:
+            if conn and conn.is_connected():
+                cursor.close()
+                conn.close()
+
+    def validate_transaction(self, data):
+        """Checks that need no database round trip.
+
+        Returns an error result, or None when the order can be inserted.
+        """
+        if not data:
+            return {'status': 400, 'message': 'No data provided'}
+        for field in REQUIRED_TRANSACTION_FIELDS:
+            if field not in data:
+                return {'status': 400, 'message': f'Missing required field: {field}'}
+
+        # Validate kilo amount if present, against the in-memory price
+        # table, before a connection is even checked out
+        if 'kilo_amount' in data:
+            try:
+                price_per_kilo = self.kilo_prices.price_for(
+                    data['shop_id'], data['kilo_amount'])
+            except ValueError as e:
+                return {'status': 400, 'message': str(e)}
+            except Exception as e:
+                print(f"Error loading kilo prices: {e}")
+                return {'status': 500, 'message': str(e)}
+            if price_per_kilo is None:
+                return {'status': 400, 'message': 'Invalid kilo range'}
+        return None
+
+    def _insert_transaction(self, cursor, user_id, data):
+        """Insert one order and its items on cursor, without committing.
+
+        Returns the new transaction id, or None if the user does not exist.
+        """
+        # Get user details
+        user_query = "SELECT name, email, phone FROM users WHERE id = %s"
+        cursor.execute(user_query, (user_id,))
+        user_data = cursor.fetchone()
+        
+        if not user_data:
+            return None
+
+        # Insert transaction
+        query = """
+            INSERT INTO transactions (
+                user_id, shop_id, user_name, user_email, user_phone,
+                service_name, kilo_amount, subtotal, delivery_fee,
+                voucher_discount, total_amount, delivery_type,
+                zone, street, barangay, building,
+                scheduled_date, scheduled_time, payment_method,
+                notes, status
+            ) VALUES (
+                %s, %s, %s, %s, %s, %s, %s, %s, %s, %s,
+                %s, %s, %s, %s, %s, %s, %s, %s, %s, %s,
+                'Pending'
             )
+        """
+        
+        values = (
+            user_id,
+            data['shop_id'],
+            user_data['name'],
+            user_data['email'],
+            user_data.get('phone', ''),
+            data['service_name'],
+            data.get('kilo_amount', 0),
+            data['subtotal'],
+            data['delivery_fee'],
+            data['voucher_discount'],
+            data['total_amount'],
+            data['delivery_type'],
+            data['zone'],
+            data['street'],
+            data['barangay'],
+            data['building'],
+            data['scheduled_date'],
+            data['scheduled_time'],
+            data.get('payment_method', 'Cash on Delivery'),
+            data.get('notes', '')
+        )
+        
+        cursor.execute(query, values)
+        transaction_id = cursor.lastrowid
+        record_order(cursor, transaction_id)
+        
+        # Handle items insertion
+        if 'items' in data:
+            items_data = json.loads(data['items']) if isinstance(data['items'], str) else data['items']
+            items_query = """
+                INSERT INTO transaction_items (
+                    transaction_id, item_name, quantity
+                ) VALUES (%s, %s, %s)
+            """
+            insert_many(cursor, items_query, [
+                (transaction_id, item['name'], item['quantity'])
+                for item in items_data
+            ])
+        return transaction_id
+
+    def create_transaction(self, user_id, data):
+        error = self.validate_transaction(data)
+        if error:
+            return error
+
+        conn = create_connection()
+        try:
+            cursor = conn.cursor(dictionary=True)
+            transaction_id = self._insert_transaction(cursor, user_id, data)
             
-            cursor.execute(query, values)
-            transaction_id = cursor.lastrowid
-            
-            # Handle items insertion
-            if 'items' in data:
-                items_data = json.loads(data['items']) if isinstance(data['items'], str) else data['items']
-                items_query = """
-                    INSERT INTO transaction_items (
-                        transaction_id, item_name, quantity
-                    ) VALUES (%s, %s, %s)
-                """
-                for item in items_data:
-                    cursor.execute(items_query, (
-                        transaction_id,
-                        item['name'],
-                        item['quantity']
-                    ))
+            if transaction_id is None:
+                return {'status': 404, 'message': 'User not found'}
             
             conn.commit()
             return {
@@ -112,40 +386,206 @@ class TransactionController:
                 cursor.close()
                 conn.close()
 
+    def create_transactions_batch(self, orders):
+        """Insert already-validated (user_id, data) orders with one commit.
+
+        Each order runs under its own savepoint so a bad one is rolled back
+        alone. Returns one create_transaction-style result per order.
+        """
+        conn = create_connection()
+        if not conn:
+            return [{'status': 500, 'message': 'Database connection failed'}] * len(orders)
+
+        results = []
+        try:
+            cursor = conn.cursor(dictionary=True)
+            conn.start_transaction()
+            for i, (user_id, data) in enumerate(orders):
+                cursor.execute(f"SAVEPOINT order_{i}")
+                try:
+                    transaction_id = self._insert_transaction(cursor, user_id, data)
+                except Exception as e:
+                    cursor.execute(f"ROLLBACK TO SAVEPOINT order_{i}")
+                    print(f"Error creating queued transaction: {e}")
+                    results.append({'status': 500, 'message': str(e)})
+                    continue
+                if transaction_id is None:
+                    results.append({'status': 404, 'message': 'User not found'})
+                else:
+                    results.append({
+                        'status': 201,
+                        'message': 'Transaction created successfully',
+                        'transaction_id': transaction_id
+                    })
+            conn.commit()
+            return results
+
+        except Exception as e:
+            if conn:
+                conn.rollback()
+            print(f"Error committing transaction batch: {e}")
+            return [{'status': 500, 'message': str(e)}] * len(orders)
+        finally:
+            if conn and conn.is_connected():
+                cursor.close()
+                conn.close()
+
+    @staticmethod
+    def detail_key(transaction_id):
+        return f"transaction:{transaction_id}"
+
+    def _load_details(self, ids):
+        """Transactions with their items, keyed by id; missing ids are absent."""
+        placeholders = ', '.join(['%s'] * len(ids))
+        query = TRANSACTION_DETAIL_BATCH.format(ids=placeholders)
+
+        conn = create_connection()
+        if not conn:
+            raise ConnectionError('Database connection failed')
+        try:
+            cursor = conn.cursor(dictionary=True)
+            row_sets = []
+            for result in cursor.execute(query, tuple(ids) * 2, multi=True):
+                if result.with_rows:
+                    # Cached details must be plain JSON data
+                    convert = row_converter(result.description)
+                    row_sets.append([convert(row) for row in result.fetchall()])
+        finally:
+            if conn and conn.is_connected():
+                cursor.close()
+                conn.close()
+
+        transaction_rows, items = row_sets
+        transactions = {row['id']: row for row in transaction_rows}
+        for transaction in transactions.values():
+            transaction['items'] = []
+        for item in items:
+            transaction = transactions.get(item.pop('transaction_id'))
+            if transaction is not None:
+                transaction['items'].append(item)
+
+        # The applied kilo rate comes from the compiled price table instead
+        # of a range LEFT JOIN on kilo_prices; like the join, orders
+        # without a kilo amount get no rate
+        for transaction in transactions.values():
+            if transaction['kilo_amount'] is None:
+                transaction['price_per_kilo'] = None
+                continue
+            price = self.kilo_prices.price_for(transaction['shop_id'], transaction['kilo_amount'])
+            transaction['price_per_kilo'] = float(price) if price is not None else None
+        return transactions
+
+    def get_transactions(self, ids):
+        """Details for ids, in the order asked; cache first, one batch for the rest."""
+        found = {}
+        misses = []
+        for transaction_id in ids:
+            cached = self.details.get(self.detail_key(transaction_id))
+            if cached is not None:
+                found[transaction_id] = cached
+            else:
+                misses.append(transaction_id)
+
+        if misses:
+            try:
+                loaded = self._load_details(misses)
+            except Exception as e:
+                print(f"Error getting transactions: {e}")
+                return {'status': 500, 'message': str(e)}
+            for transaction_id, transaction in loaded.items():
+                if transaction['status'] in TERMINAL_STATUSES:
+                    self.details.set(self.detail_key(transaction_id), transaction)
+            found.update(loaded)
+
+        return {
+            'status': 200,
+            'data': [found[transaction_id] for transaction_id in ids if transaction_id in found],
+            'missing': [transaction_id for transaction_id in ids if transaction_id not in found]
+        }
+
     def get_transaction(self, transaction_id):
+        result = self.get_transactions([transaction_id])
+        if result['status'] != 200:
+            return result
+        if not result['data']:
+            return {'status': 404, 'message': 'Transaction not found'}
+        return {'status': 200, 'data': result['data'][0]}
+
+    def update_transaction_status(self, transaction_id, status, notes=None,
+                                  expected_version=None, reason=None):
+        """Move a transaction along STATUS_TRANSITIONS with a single guarded UPDATE.
+
+        The WHERE clause only matches rows in a status the target may be
+        reached from (and, when given, at expected_version), so of two
+        devices racing on the same order exactly one wins; the other gets
+        409 with the row's current status and version.
+        """
+        try:
+            transaction_id = int(transaction_id)
+        except (TypeError, ValueError):
+            return {'status': 400, 'message': 'Invalid transaction id'}
+        target = normalize_status(status)
+        if target is None or target not in STATUS_TRANSITIONS:
+            return {'status': 400, 'message': f'Cannot set status to {status!r}'}
+        if expected_version is not None:
+            try:
+                expected_version = int(expected_version)
+            except (TypeError, ValueError):
+                return {'status': 400, 'message': 'expected_version must be an integer'}
+        if notes is None and reason and target == 'Cancelled':
+            notes = f"Cancelled - {reason}"
+
+        sources = STATUS_TRANSITIONS[target]
+        params = {'status': target, 'notes': notes, 'id': transaction_id,
+                  'expected_version': expected_version}
+        params.update({f'from_{i}': source for i, source in enumerate(sources)})
+        query = UPDATE_STATUS_BATCH.format(
+            expected=', '.join(f'%(from_{i})s' for i in range(len(sources))),
+            version_guard='AND version = %(expected_version)s' if expected_version is not None else '',
+            rollup=UPDATE_STATUS_ROLLUP
+        )
+
         conn = create_connection()
+        if not conn:
+            return {'status': 500, 'message': 'Database connection failed'}
+
         try:
             cursor = conn.cursor(dictionary=True)
-            
-            # Get transaction with items and kilo price
-            query = """
-                SELECT t.*, k.price_per_kilo,
-                    (SELECT JSON_ARRAYAGG(
-                        JSON_OBJECT(
-                            'name', ti.item_name,
-                            'quantity', ti.quantity
-                        )
-                    )
-                    FROM transaction_items ti
-                    WHERE ti.transaction_id = t.id
-                    ) as items
-                FROM transactions t
-                LEFT JOIN kilo_prices k ON 
-                    k.shop_id = t.shop_id AND
-                    k.min_kilo <= t.kilo_amount AND
-                    k.max_kilo >= t.kilo_amount
-                WHERE t.id = %s
-            """
-            cursor.execute(query, (transaction_id,))
-            transaction = cursor.fetchone()
-            
-            if not transaction:
-                return {'status': 404, 'message': 'Transaction not found'}
+            updated = None
+            for result in cursor.execute(query, params, multi=True):
+                if result.with_rows:
+                    updated = result.fetchone()
+
+            if updated and updated['user_id'] is not None:
+                conn.commit()
+                return {
+                    'status': 200,
+                    'message': f'Transaction status updated to {target}',
+                    'transaction_id': transaction_id,
+                    'transaction_status': target,
+                    'notes': notes,
+                    'version': updated['version'],
+                    'previous_status': updated['previous_status'],
+                    'user_id': updated['user_id'],
+                    'shop_id': updated['shop_id']
+                }
 
-            return {'status': 200, 'data': transaction}
+            conn.rollback()
+            # Only the losing side pays for a second read, to say why
+            cursor.execute("SELECT status, version FROM transactions WHERE id = %s", (transaction_id,))
+            current = cursor.fetchone()
+            if not current:
+                return {'status': 404, 'message': 'Transaction not found'}
+            return {
+                'status': 409,
+                'message': f"Cannot move transaction from {current['status']} to {target}",
+                'transaction_status': current['status'],
+                'version': current['version']
+            }
 
         except Exception as e:
-            print(f"Error getting transaction: {e}")
+            conn.rollback()
+            print(f"Error updating transaction status: {e}")
             return {'status': 500, 'message': str(e)}
         finally:
             if conn and conn.is_connected():
@@ -153,38 +593,73 @@ class TransactionController:
                 conn.close()
 
     def cancel_transaction(self, transaction_id, reason=None, notes=None):
-        conn = None
+        """Cancel a transaction, along STATUS_TRANSITIONS like
+        update_transaction_status: Pending and Processing orders can be
+        cancelled, a Completed one gets 409. Cancelling twice is a no-op.
+
+        The row is locked while its status is read, and the UPDATE is
+        guarded on that status and bumps version, so the rollup moves from
+        the bucket the order really left, exactly once.
+        """
+        conn = create_connection()
+        if not conn:
+            return {'status': 500, 'message': 'Database connection failed'}
         try:
-            conn = create_connection()
             cursor = conn.cursor()
-            
-            # Check if transaction exists
-            cursor.execute("SELECT id, status FROM transactions WHERE id = %s", (transaction_id,))
+            cursor.execute(
+                "SELECT id, status, shop_id, version FROM transactions WHERE id = %s FOR UPDATE",
+                (transaction_id,)
+            )
             transaction = cursor.fetchone()
-            
+
             if not transaction:
+                conn.rollback()
                 return {'status': 404, 'message': 'Transaction not found'}
-            
-            # Update transaction status to Cancelled
+            _, previous_status, shop_id, version = transaction
+            if previous_status == 'Cancelled':
+                conn.rollback()
+                return {
+                    'status': 200,
+                    'message': 'Transaction already cancelled',
+                    'previous_status': previous_status,
+                    'shop_id': shop_id,
+                    'version': version
+                }
+            if previous_status not in STATUS_TRANSITIONS['Cancelled']:
+                conn.rollback()
+                return {
+                    'status': 409,
+                    'message': f"Cannot move transaction from {previous_status} to Cancelled",
+                    'transaction_status': previous_status,
+                    'version': version
+                }
+
             cursor.execute("""
-                UPDATE transactions 
-                SET status = 'Cancelled', 
-                    notes = %s
-                WHERE id = %s
+                UPDATE transactions
+                SET status = 'Cancelled',
+                    notes = %s,
+                    version = version + 1
+                WHERE id = %s AND status = %s AND version = %s
             """, (
                 f"Cancelled - {reason}: {notes}" if notes else f"Cancelled - {reason}",
-                transaction_id
+                transaction_id, previous_status, version
             ))
-            
+            if cursor.rowcount != 1:
+                conn.rollback()
+                return {'status': 409, 'message': 'Transaction changed while cancelling, please retry'}
+            record_transition(cursor, transaction_id, previous_status)
+
             conn.commit()
             return {
                 'status': 200,
-                'message': 'Transaction cancelled successfully'
+                'message': 'Transaction cancelled successfully',
+                'previous_status': previous_status,
+                'shop_id': shop_id,
+                'version': version + 1
             }
-                
+
         except Exception as e:
-            if conn:
-                conn.rollback()
+            conn.rollback()
             print(f"Error cancelling transaction: {e}")
             return {'status': 500, 'message': str(e)}
         finally:
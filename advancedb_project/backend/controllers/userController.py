@@ -1,6 +1,7 @@
 from models.userModel import User
 from database.connection import create_connection
-import bcrypt
+from database.bulk import insert_many
+from utils.passwordHasher import password_hasher_from_env, HasherBusy
 import mysql.connector
 from datetime import datetime, timedelta
 import jwt
@@ -9,6 +10,8 @@ from flask import current_app
 class UserController:
     def __init__(self):
         self.connection = None
+        # bcrypt runs in worker processes, never on the request thread
+        self.hasher = password_hasher_from_env()
 
     def get_user_details(self, user_id):
         conn = create_connection()
@@ -115,166 +118,155 @@ class UserController:
                 cursor.close()
                 conn.close()
 
-    def update_password(self, user_id, data):
+    def _fetch_password(self, query, value):
+        """Look up a user row for a password check without holding the
+        connection while bcrypt runs."""
         conn = create_connection()
         if not conn:
-            return {'status': 500, 'message': 'Database connection failed'}
-            
+            return None, {'status': 500, 'message': 'Database connection failed'}
+
         try:
             cursor = conn.cursor(dictionary=True)
-            
-            # First verify current password
-            cursor.execute("SELECT password FROM users WHERE id = %s", (user_id,))
-            user = cursor.fetchone()
-            
-            if not user:
-                return {'status': 404, 'message': 'User not found'}
-                
-            # Verify current password
-            if not bcrypt.checkpw(data['current_password'].encode('utf-8'), 
-                                user['password'].encode('utf-8')):
-                return {'status': 401, 'message': 'Current password is incorrect'}
-            
-            # Hash new password
-            hashed_password = bcrypt.hashpw(data['new_password'].encode('utf-8'), 
-                                        bcrypt.gensalt())
-            
-            # Update password
-            query = "UPDATE users SET password = %s WHERE id = %s"
-            cursor.execute(query, (hashed_password, user_id))
-            conn.commit()
-            
-            if cursor.rowcount == 0:
-                return {'status': 404, 'message': 'Failed to update password'}
-                
-            return {'status': 200, 'message': 'Password updated successfully'}
-                    
+            cursor.execute(query, (value,))
+            return cursor.fetchone(), None
         except mysql.connector.Error as err:
-            print(f"Password update error: {err}")  # Debug logging
-            return {'status': 500, 'message': f'Database error: {str(err)}'}
+            return None, {'status': 500, 'message': f'Database error: {str(err)}'}
         finally:
             if conn.is_connected():
                 cursor.close()
                 conn.close()
 
-    def update_password(self, user_id, data):
+    def _store_password(self, user_id, old_hash, new_hash):
+        """Swap the stored hash, unless it changed since old_hash was read.
+
+        Returns the number of rows updated, or None on a database error.
+        """
         conn = create_connection()
         if not conn:
-            return {'status': 500, 'message': 'Database connection failed'}
-            
+            return None
+
         try:
-            cursor = conn.cursor(dictionary=True)
-            
-            # First verify current password
-            cursor.execute("SELECT password FROM users WHERE id = %s", (user_id,))
-            user = cursor.fetchone()
-            
-            if not user:
-                return {'status': 404, 'message': 'User not found'}
-                
-            if not bcrypt.checkpw(data['current_password'].encode('utf-8'), 
-                                user['password'].encode('utf-8')):
-                return {'status': 401, 'message': 'Current password is incorrect'}
-            
-            # Hash new password
-            hashed_password = bcrypt.hashpw(data['new_password'].encode('utf-8'), 
-                                        bcrypt.gensalt())
-            
-            # Update password
-            query = "UPDATE users SET password = %s WHERE id = %s"
-            cursor.execute(query, (hashed_password, user_id))
+            cursor = conn.cursor()
+            cursor.execute(
+                "UPDATE users SET password = %s WHERE id = %s AND password = %s",
+                (new_hash, user_id, old_hash)
+            )
             conn.commit()
-            
-            return {'status': 200, 'message': 'Password updated successfully'}
-                    
+            return cursor.rowcount
         except mysql.connector.Error as err:
-            return {'status': 500, 'message': f'Database error: {str(err)}'}
+            print(f"Password update error: {err}")
+            return None
         finally:
             if conn.is_connected():
                 cursor.close()
                 conn.close()
 
+    def update_password(self, user_id, data):
+        user, error = self._fetch_password("SELECT password FROM users WHERE id = %s", user_id)
+        if error:
+            return error
+        if not user:
+            return {'status': 404, 'message': 'User not found'}
+
+        try:
+            # Verify current password
+            if not self.hasher.check(data['current_password'], user['password']):
+                return {'status': 401, 'message': 'Current password is incorrect'}
+
+            # Hash new password
+            hashed_password = self.hasher.hash(data['new_password'])
+        except HasherBusy:
+            return {'status': 503, 'message': 'Server is busy, please try again'}
+
+        updated = self._store_password(user_id, user['password'], hashed_password)
+        if updated is None:
+            return {'status': 500, 'message': 'Database error while updating password'}
+        if updated == 0:
+            return {'status': 409, 'message': 'Password was changed by another request'}
+
+        return {'status': 200, 'message': 'Password updated successfully'}
+
     def login(self, credentials):
-        conn = create_connection()
-        if not conn:
-            return {'status': 500, 'message': 'Database connection failed'}
-            
+        user, error = self._fetch_password("SELECT * FROM users WHERE email = %s", credentials['email'])
+        if error:
+            return error
+        if not user:
+            return {'status': 401, 'message': 'Invalid email or password'}
+
         try:
-            cursor = conn.cursor(dictionary=True)
-            cursor.execute("SELECT * FROM users WHERE email = %s", (credentials['email'],))
-            user = cursor.fetchone()
-            
-            if not user:
+            if not self.hasher.check(credentials['password'], user['password']):
                 return {'status': 401, 'message': 'Invalid email or password'}
-                
-            if bcrypt.checkpw(credentials['password'].encode('utf-8'), 
-                            user['password'].encode('utf-8')):
-                # Generate proper JWT token
-                token = jwt.encode({
-                    'user_id': user['id'],
-                    'email': user['email'],
-                    'exp': datetime.utcnow() + timedelta(hours=24)
-                }, current_app.config['SECRET_KEY'], algorithm="HS256")
-                
-                if isinstance(token, bytes):
-                    token = token.decode('utf-8')  # Convert bytes to string if needed
-                    
-                return {
-                    'status': 200,
-                    'message': 'Login successful',
-                    'token': token,  # Make sure token is a string
-                    'user': {
-                        'id': user['id'],
-                        'email': user['email']
-                    }
-                }
-            
-            return {'status': 401, 'message': 'Invalid email or password'}
-            
-        except mysql.connector.Error as err:
-            return {'status': 500, 'message': f'Database error: {str(err)}'}
+        except HasherBusy:
+            return {'status': 503, 'message': 'Server is busy, please try again'}
         except Exception as e:
             return {'status': 500, 'message': f'Error: {str(e)}'}
-        finally:
-            if conn and conn.is_connected():
-                cursor.close()
-                conn.close()
+
+        # Move hashes made with an older BCRYPT_ROUNDS to the current cost;
+        # the password is verified already, so a full queue only postpones
+        # the upgrade to a later login
+        if self.hasher.needs_rehash(user['password']):
+            try:
+                self._store_password(user['id'], user['password'],
+                                     self.hasher.hash(credentials['password']))
+            except HasherBusy:
+                pass
+
+        # Generate proper JWT token
+        token = jwt.encode({
+            'user_id': user['id'],
+            'email': user['email'],
+            'exp': datetime.utcnow() + timedelta(hours=24)
+        }, current_app.config['SECRET_KEY'], algorithm="HS256")
+
+        if isinstance(token, bytes):
+            token = token.decode('utf-8')  # Convert bytes to string if needed
+
+        return {
+            'status': 200,
+            'message': 'Login successful',
+            'token': token,  # Make sure token is a string
+            'user': {
+                'id': user['id'],
+                'email': user['email']
+            }
+        }
 
     def signup(self, data):
+        # Debug print to see what data we're receiving
+        print("Received signup data:", {k: v for k, v in data.items() if k != 'password'})
+
+        # Validate required fields with better error messages
+        if not data.get('name'):
+            return {'status': 400, 'message': 'Name field is missing'}
+
+        if not data.get('name').strip():
+            return {'status': 400, 'message': 'Name cannot be empty'}
+
+        if not data.get('email'):
+            return {'status': 400, 'message': 'Email field is missing'}
+
+        if not data.get('password'):
+            return {'status': 400, 'message': 'Password field is missing'}
+
+        # Hash before checking out a connection so a slow hash does not
+        # hold a pooled connection
+        try:
+            hashed_password = self.hasher.hash(data['password'])
+        except HasherBusy:
+            return {'status': 503, 'message': 'Server is busy, please try again'}
+
         conn = create_connection()
         if not conn:
             return {'status': 500, 'message': 'Database connection failed'}
         
         try:
             cursor = conn.cursor(dictionary=True)
-            
-            # Debug print to see what data we're receiving
-            print("Received signup data:", data)
-            
-            # Validate required fields with better error messages
-            if not data.get('name'):
-                return {'status': 400, 'message': 'Name field is missing'}
-            
-            if not data.get('name').strip():
-                return {'status': 400, 'message': 'Name cannot be empty'}
-                
-            if not data.get('email'):
-                return {'status': 400, 'message': 'Email field is missing'}
-                
-            if not data.get('password'):
-                return {'status': 400, 'message': 'Password field is missing'}
 
             # Check if email already exists
             cursor.execute("SELECT * FROM users WHERE email = %s", (data['email'],))
             if cursor.fetchone():
                 return {'status': 400, 'message': 'Email already exists'}
 
-            # Hash password with bcrypt
-            hashed_password = bcrypt.hashpw(
-                data['password'].encode('utf-8'), 
-                bcrypt.gensalt()
-            )
-            
             # Clean input data
             name = data['name'].strip()
             email = data['email'].strip()
@@ -306,8 +298,6 @@ class UserController:
             if isinstance(token, bytes):
                 token = token.decode('utf-8')
             
-            print("Debug - Generated token:", token)  # Debug print
-            
             return {
                 'status': 201,
                 'message': 'User registered successfully',
@@ -338,12 +328,18 @@ class UserController:
             if not cursor.fetchone():
                 return {'status': 404, 'message': 'User not found'}
                 
+            # Their shops go with them (ON DELETE CASCADE); the caller
+            # drops them from the shop indexes
+            cursor.execute("SELECT id FROM shops WHERE user_id = %s", (user_id,))
+            shop_ids = [row[0] for row in cursor.fetchall()]
+
             # Delete the user
             cursor.execute("DELETE FROM users WHERE id = %s", (user_id,))
             conn.commit()
             
             if cursor.rowcount > 0:
-                return {'status': 200, 'message': 'Account deleted successfully'}
+                return {'status': 200, 'message': 'Account deleted successfully',
+                        'shop_ids': shop_ids}
             else:
                 return {'status': 400, 'message': 'Failed to delete account'}
                 
@@ -392,11 +388,13 @@ class UserController:
             shop_id = cursor.lastrowid
             
             # Add services
-            for service in shop_data.get('services', []):
-                cursor.execute('''
-                    INSERT INTO services (shop_id, service_name, price)
-                    VALUES (%s, %s, %s)
-                ''', (shop_id, service['service_name'], service['price']))
+            insert_many(cursor, '''
+                INSERT INTO services (shop_id, service_name, price)
+                VALUES (%s, %s, %s)
+            ''', [
+                (shop_id, service['service_name'], service['price'])
+                for service in shop_data.get('services', [])
+            ])
             
             # Update user to shop owner
             cursor.execute(
@@ -0,0 +1,20 @@
+import os
+
+DEFAULT_BATCH_SIZE = int(os.getenv('DB_INSERT_BATCH_SIZE', '500'))
+
+def insert_many(cursor, query, rows, batch_size=None):
+    """Insert rows with one multi-row INSERT per batch.
+
+    query is a plain single-row ``INSERT ... VALUES (%s, ...)``; the
+    connector's executemany rewrites it into ``VALUES (...), (...), ...``
+    so each batch costs a single round trip instead of one per row.
+    batch_size bounds the statement size (max_allowed_packet).
+    Returns the number of statements sent.
+    """
+    batch_size = batch_size or DEFAULT_BATCH_SIZE
+    rows = list(rows)
+    statements = 0
+    for start in range(0, len(rows), batch_size):
+        cursor.executemany(query, rows[start:start + batch_size])
+        statements += 1
+    return statements
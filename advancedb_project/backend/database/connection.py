@@ -1,18 +1,52 @@
 import os
+import threading
+import time
 import mysql.connector
 from mysql.connector import Error
+from database.pool import pool_from_env
+from utils.metrics import record_acquire
+from utils.queryTracer import TracingCursor
+
+_pool = None
+_pool_pid = None
+_pool_lock = threading.Lock()
+
+def _connect():
+    options = {}
+    # The C extension blocks the whole process under eventlet; the pure
+    # Python driver goes through the patched socket module instead. Left
+    # unset otherwise, so installs without the extension keep working.
+    if os.getenv('DB_USE_PURE', '0') == '1':
+        options['use_pure'] = True
+    connection = mysql.connector.connect(
+        host=os.getenv('DB_HOST', 'localhost'),
+        user=os.getenv('DB_USER', 'root'),
+        password=os.getenv('DB_PASSWORD', '1025'),
+        database=os.getenv('DB_NAME', 'LabaRide_DB'),
+        **options
+    )
+    print("Successfully connected to MySQL database")
+    return connection
+
+def get_pool():
+    global _pool, _pool_pid
+    # Pools are per process: a forked worker must not share sockets with its parent
+    if _pool is None or _pool_pid != os.getpid():
+        with _pool_lock:
+            if _pool is None or _pool_pid != os.getpid():
+                _pool = pool_from_env(_connect, wrap_cursor=TracingCursor)
+                _pool_pid = os.getpid()
+    return _pool
+
+def pool_stats():
+    return get_pool().stats()
 
 def create_connection():
+    start = time.perf_counter()
     try:
-        connection = mysql.connector.connect(
-            host=os.getenv('DB_HOST', 'localhost'),
-            user=os.getenv('DB_USER', 'root'),
-            password=os.getenv('DB_PASSWORD', '1025'),
-            database=os.getenv('DB_NAME', 'LabaRide_DB')
-        )
-        if connection.is_connected():
-            print("Successfully connected to MySQL database")
-            return connection
+        return get_pool().acquire()
     except Error as e:
         print(f"Error connecting to MySQL Database: {e}")
-        return None
\ No newline at end of file
+        return None
+    finally:
+        record_acquire(time.perf_counter() - start)
@@ -43,9 +43,17 @@ CREATE TABLE transactions (
     payment_method VARCHAR(50) NOT NULL DEFAULT 'Cash on Delivery',
     notes TEXT,
     status ENUM('Pending', 'Processing', 'Completed', 'Cancelled') DEFAULT 'Pending',
+    -- Bumped by every status change, for optimistic concurrency
+    version INT NOT NULL DEFAULT 0,
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     FOREIGN KEY (user_id) REFERENCES users(id),
-    FOREIGN KEY (shop_id) REFERENCES shops(id)
+    FOREIGN KEY (shop_id) REFERENCES shops(id),
+    -- Keyset pagination for /user_transactions and /shop_transactions,
+    -- with and without the status filter
+    INDEX idx_transactions_user_created (user_id, created_at, id),
+    INDEX idx_transactions_user_status_created (user_id, status, created_at, id),
+    INDEX idx_transactions_shop_created (shop_id, created_at, id),
+    INDEX idx_transactions_shop_status_created (shop_id, status, created_at, id)
 );
 
 #Shop table
@@ -64,7 +72,9 @@ CREATE TABLE shops (
     FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE,
     latitude DOUBLE,
     longitude DOUBLE,
-    address VARCHAR(255)
+    address VARCHAR(255),
+    -- /shops/recent
+    INDEX idx_shops_created (created_at)
 );
 
 CREATE TABLE IF NOT EXISTS shop_services (
@@ -73,7 +83,11 @@ CREATE TABLE IF NOT EXISTS shop_services (
     service_name VARCHAR(255) NOT NULL,
     price DECIMAL(10,2) DEFAULT 0,
     color VARCHAR(255),
-    FOREIGN KEY (shop_id) REFERENCES shops(id)
+    description TEXT,
+    is_active BOOLEAN NOT NULL DEFAULT TRUE,
+    FOREIGN KEY (shop_id) REFERENCES shops(id),
+    INDEX idx_shop_services_shop_active (shop_id, is_active),
+    INDEX idx_shop_services_active_name (is_active, service_name)
 );
 
 CREATE TABLE IF NOT EXISTS kilo_prices (
@@ -87,6 +101,52 @@ CREATE TABLE IF NOT EXISTS kilo_prices (
     UNIQUE KEY unique_range (shop_id, min_kilo, max_kilo)
 );
 
+CREATE TABLE IF NOT EXISTS transaction_items (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    transaction_id INT NOT NULL,
+    item_name VARCHAR(255) NOT NULL,
+    quantity INT NOT NULL DEFAULT 1,
+    FOREIGN KEY (transaction_id) REFERENCES transactions(id) ON DELETE CASCADE
+);
+
+CREATE TABLE IF NOT EXISTS household_items (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    shop_id INT NOT NULL,
+    item_name VARCHAR(255) NOT NULL,
+    price DECIMAL(10,2) NOT NULL DEFAULT 0,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    FOREIGN KEY (shop_id) REFERENCES shops(id),
+    INDEX idx_household_items_shop_name (shop_id, item_name)
+);
+
+CREATE TABLE IF NOT EXISTS clothing_types (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    shop_id INT NOT NULL,
+    type_name VARCHAR(255) NOT NULL,
+    price DECIMAL(10,2) NOT NULL DEFAULT 0,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    FOREIGN KEY (shop_id) REFERENCES shops(id),
+    INDEX idx_clothing_types_shop_name (shop_id, type_name)
+);
+
+-- Per-shop, per-day order rollups for /shop/<id>/stats, maintained by the
+-- transaction writes (database/rollups.py); amounts leave out cancelled orders
+CREATE TABLE IF NOT EXISTS shop_daily_stats (
+    shop_id INT NOT NULL,
+    day DATE NOT NULL,
+    order_count INT NOT NULL DEFAULT 0,
+    pending_count INT NOT NULL DEFAULT 0,
+    processing_count INT NOT NULL DEFAULT 0,
+    completed_count INT NOT NULL DEFAULT 0,
+    cancelled_count INT NOT NULL DEFAULT 0,
+    total_amount DECIMAL(12,2) NOT NULL DEFAULT 0,
+    kilo_amount DECIMAL(12,2) NOT NULL DEFAULT 0,
+    PRIMARY KEY (shop_id, day),
+    FOREIGN KEY (shop_id) REFERENCES shops(id)
+);
+
+-- Existing databases: python -m database.migrate brings them to this schema
+
 
 select * from users;
 select * from shops;
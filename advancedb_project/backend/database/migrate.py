@@ -0,0 +1,100 @@
+"""Apply the numbered SQL files in database/migrations in order.
+
+    python -m database.migrate            # apply pending migrations
+    python -m database.migrate --status   # list applied / pending
+
+Applied versions are recorded in schema_migrations. MySQL commits DDL
+implicitly, so a migration that fails half way is not rolled back; every
+statement is written to be safe to run again, and "already exists"
+errors are skipped so databases created from database.sql (which may
+already have some of these objects) migrate cleanly.
+"""
+import argparse
+import os
+import re
+
+from dotenv import load_dotenv
+from mysql.connector import Error
+
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'migrations')
+
+# Table exists, duplicate column, duplicate key name
+ALREADY_APPLIED_ERRORS = {1050, 1060, 1061}
+
+CREATE_MIGRATIONS_TABLE = """
+    CREATE TABLE IF NOT EXISTS schema_migrations (
+        version VARCHAR(255) PRIMARY KEY,
+        applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+"""
+
+def migration_files():
+    return sorted(
+        name for name in os.listdir(MIGRATIONS_DIR)
+        if re.match(r'^\d+_.+\.sql$', name)
+    )
+
+def split_statements(sql):
+    # Migrations are plain DDL: no semicolons inside strings or routines
+    lines = [line for line in sql.splitlines() if not line.strip().startswith('--')]
+    return [statement.strip() for statement in '\n'.join(lines).split(';') if statement.strip()]
+
+def applied_versions(cursor):
+    cursor.execute(CREATE_MIGRATIONS_TABLE)
+    cursor.execute("SELECT version FROM schema_migrations")
+    return {row[0] for row in cursor.fetchall()}
+
+def apply_migration(cursor, name):
+    with open(os.path.join(MIGRATIONS_DIR, name)) as f:
+        statements = split_statements(f.read())
+    skipped = 0
+    for statement in statements:
+        try:
+            cursor.execute(statement)
+        except Error as e:
+            if e.errno not in ALREADY_APPLIED_ERRORS:
+                raise
+            skipped += 1
+            print(f"  skipped ({e.msg})")
+    cursor.execute("INSERT INTO schema_migrations (version) VALUES (%s)", (name,))
+    return len(statements), skipped
+
+def migrate(conn, status_only=False):
+    cursor = conn.cursor()
+    try:
+        done = applied_versions(cursor)
+        pending = [name for name in migration_files() if name not in done]
+        if status_only:
+            for name in migration_files():
+                print(f"{'applied' if name in done else 'pending':>8}  {name}")
+            return pending
+
+        for name in pending:
+            print(f"Applying {name}")
+            total, skipped = apply_migration(cursor, name)
+            conn.commit()
+            print(f"  {total - skipped} statements applied, {skipped} already in place")
+        if not pending:
+            print("Schema is up to date")
+        return pending
+    finally:
+        cursor.close()
+
+def main():
+    parser = argparse.ArgumentParser(description='Apply pending schema migrations')
+    parser.add_argument('--status', action='store_true', help='list migrations without applying')
+    args = parser.parse_args()
+
+    load_dotenv()
+    from database.connection import create_connection
+
+    conn = create_connection()
+    if not conn:
+        raise SystemExit('Database connection failed')
+    try:
+        migrate(conn, status_only=args.status)
+    finally:
+        conn.close()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,21 @@
+-- Composite indexes for the hot read paths. shops.user_id and
+-- transaction_items.transaction_id are already covered by the indexes
+-- InnoDB creates for their foreign keys.
+
+-- /user_transactions and /shop_transactions: keyset pagination by
+-- created_at, with and without the status filter
+CREATE INDEX idx_transactions_user_created ON transactions (user_id, created_at, id);
+CREATE INDEX idx_transactions_user_status_created ON transactions (user_id, status, created_at, id);
+CREATE INDEX idx_transactions_shop_created ON transactions (shop_id, created_at, id);
+CREATE INDEX idx_transactions_shop_status_created ON transactions (shop_id, status, created_at, id);
+
+-- /shops/recent: ORDER BY created_at DESC LIMIT 10 reads the index tail
+CREATE INDEX idx_shops_created ON shops (created_at);
+
+-- Per-shop service lists, and /shop/services (is_active, ORDER BY name)
+CREATE INDEX idx_shop_services_shop_active ON shop_services (shop_id, is_active);
+CREATE INDEX idx_shop_services_active_name ON shop_services (is_active, service_name);
+
+-- Catalog reads by shop and the duplicate-name checks before inserts
+CREATE INDEX idx_household_items_shop_name ON household_items (shop_id, item_name);
+CREATE INDEX idx_clothing_types_shop_name ON clothing_types (shop_id, type_name);
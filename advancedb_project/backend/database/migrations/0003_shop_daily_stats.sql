@@ -0,0 +1,17 @@
+-- Per-shop, per-day order rollups for /shop/<id>/stats. The transaction
+-- writes keep it current from here on; backfill existing orders with
+--     python -m database.rollups
+
+CREATE TABLE IF NOT EXISTS shop_daily_stats (
+    shop_id INT NOT NULL,
+    day DATE NOT NULL,
+    order_count INT NOT NULL DEFAULT 0,
+    pending_count INT NOT NULL DEFAULT 0,
+    processing_count INT NOT NULL DEFAULT 0,
+    completed_count INT NOT NULL DEFAULT 0,
+    cancelled_count INT NOT NULL DEFAULT 0,
+    total_amount DECIMAL(12,2) NOT NULL DEFAULT 0,
+    kilo_amount DECIMAL(12,2) NOT NULL DEFAULT 0,
+    PRIMARY KEY (shop_id, day),
+    FOREIGN KEY (shop_id) REFERENCES shops(id)
+);
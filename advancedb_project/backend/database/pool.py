@@ -0,0 +1,239 @@
+import os
+import threading
+import time
+from collections import deque
+
+from mysql.connector import Error
+
+
+class PoolTimeout(Error):
+    """Raised when no connection could be checked out within the timeout."""
+
+
+class _PoolEntry:
+    __slots__ = ('raw', 'created_at', 'last_used', 'uses')
+
+    def __init__(self, raw):
+        now = time.monotonic()
+        self.raw = raw
+        self.created_at = now
+        self.last_used = now
+        self.uses = 0
+
+
+class PooledConnection:
+    """Proxy handed out by the pool.
+
+    Behaves like a mysql.connector connection, except that close() returns
+    the underlying connection to the pool instead of tearing it down, so the
+    existing ``finally: connection.close()`` blocks keep working unchanged.
+    """
+
+    def __init__(self, pool, entry):
+        self._pool = pool
+        self._entry = entry
+        self._closed = False
+
+    def __getattr__(self, name):
+        if self._closed:
+            raise Error(msg='Connection has already been returned to the pool')
+        return getattr(self._entry.raw, name)
+
+    def cursor(self, *args, **kwargs):
+        cursor = self.__getattr__('cursor')(*args, **kwargs)
+        wrap = self._pool.wrap_cursor
+        return wrap(cursor) if wrap else cursor
+
+    def is_connected(self):
+        # The borrow-time health check already pinged the server; avoid a
+        # second round trip on every release.
+        return not self._closed
+
+    def close(self):
+        if self._closed:
+            return
+        self._closed = True
+        self._pool._release(self._entry)
+
+    def discard(self):
+        """Drop the physical connection instead of returning it, e.g. when
+        an unbuffered result was abandoned half read."""
+        if self._closed:
+            return
+        self._closed = True
+        self._pool._discard(self._entry)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def __del__(self):
+        # A leaked checkout must not shrink the pool forever.
+        if not self._closed:
+            try:
+                self.close()
+            except Exception:
+                pass
+
+
+class ConnectionPool:
+    """Bounded MySQL connection pool.
+
+    connect      -- zero-argument callable returning a new raw connection
+    size         -- maximum number of physical connections (idle + in use)
+    timeout      -- seconds acquire() waits for a free connection
+    max_uses     -- recycle a connection after this many checkouts (0 = never)
+    max_lifetime -- recycle a connection after this many seconds (0 = never)
+    ping_interval -- ping connections idle for longer than this on borrow
+                     (0 = ping on every borrow)
+    wrap_cursor  -- optional callable wrapping every cursor handed out
+    """
+
+    def __init__(self, connect, size=10, timeout=5.0, max_uses=1000,
+                 max_lifetime=1800, ping_interval=5.0, wrap_cursor=None):
+        self._connect = connect
+        self.wrap_cursor = wrap_cursor
+        self.size = size
+        self.timeout = timeout
+        self.max_uses = max_uses
+        self.max_lifetime = max_lifetime
+        self.ping_interval = ping_interval
+
+        self._cond = threading.Condition()
+        self._idle = deque()
+        self._total = 0
+        self._in_use = 0
+        self._waiting = 0
+
+        self._created = 0
+        self._evicted = 0
+        self._timeouts = 0
+        self._checkouts = 0
+
+    def acquire(self, timeout=None):
+        timeout = self.timeout if timeout is None else timeout
+        deadline = time.monotonic() + timeout
+
+        while True:
+            entry = None
+            with self._cond:
+                while not self._idle and self._total >= self.size:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self._timeouts += 1
+                        raise PoolTimeout(
+                            msg=f'Timed out after {timeout}s waiting for a '
+                                f'database connection (pool size {self.size})'
+                        )
+                    self._waiting += 1
+                    try:
+                        self._cond.wait(remaining)
+                    finally:
+                        self._waiting -= 1
+
+                if self._idle:
+                    # LIFO keeps a warm working set and lets the rest age out
+                    entry = self._idle.pop()
+                else:
+                    # Reserve the slot before connecting outside the lock
+                    self._total += 1
+
+            if entry is None:
+                try:
+                    entry = _PoolEntry(self._connect())
+                except Exception:
+                    with self._cond:
+                        self._total -= 1
+                        self._cond.notify()
+                    raise
+                with self._cond:
+                    self._created += 1
+            elif not self._is_usable(entry):
+                self._evict(entry)
+                continue
+
+            entry.uses += 1
+            with self._cond:
+                self._in_use += 1
+                self._checkouts += 1
+            return PooledConnection(self, entry)
+
+    def _is_usable(self, entry):
+        now = time.monotonic()
+        if self.max_lifetime and now - entry.created_at >= self.max_lifetime:
+            return False
+        if self.max_uses and entry.uses >= self.max_uses:
+            return False
+        if now - entry.last_used >= self.ping_interval:
+            try:
+                entry.raw.ping(reconnect=False)
+            except Exception:
+                return False
+        return True
+
+    def _release(self, entry):
+        healthy = True
+        try:
+            # Never hand the next borrower someone else's open transaction
+            if entry.raw.in_transaction:
+                entry.raw.rollback()
+        except Exception:
+            healthy = False
+
+        entry.last_used = time.monotonic()
+        with self._cond:
+            self._in_use -= 1
+            if healthy:
+                self._idle.append(entry)
+                self._cond.notify()
+                return
+        self._evict(entry)
+
+    def _discard(self, entry):
+        with self._cond:
+            self._in_use -= 1
+        self._evict(entry)
+
+    def _evict(self, entry):
+        try:
+            entry.raw.close()
+        except Exception:
+            pass
+        with self._cond:
+            self._total -= 1
+            self._evicted += 1
+            self._cond.notify()
+
+    def close(self):
+        with self._cond:
+            idle, self._idle = list(self._idle), deque()
+        for entry in idle:
+            self._evict(entry)
+
+    def stats(self):
+        with self._cond:
+            return {
+                'size': self.size,
+                'open': self._total,
+                'idle': len(self._idle),
+                'in_use': self._in_use,
+                'waiting': self._waiting,
+                'created': self._created,
+                'evicted': self._evicted,
+                'timeouts': self._timeouts,
+                'checkouts': self._checkouts,
+            }
+
+
+def pool_from_env(connect, wrap_cursor=None):
+    return ConnectionPool(
+        connect,
+        wrap_cursor=wrap_cursor,
+        size=int(os.getenv('DB_POOL_SIZE', '10')),
+        timeout=float(os.getenv('DB_POOL_TIMEOUT', '5')),
+        max_uses=int(os.getenv('DB_POOL_MAX_USES', '1000')),
+        max_lifetime=float(os.getenv('DB_POOL_RECYCLE', '1800')),
+        ping_interval=float(os.getenv('DB_POOL_PING_INTERVAL', '5')),
+    )
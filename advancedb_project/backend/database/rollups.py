@@ -0,0 +1,136 @@
+"""Per-shop, per-day order rollups in shop_daily_stats.
+
+A row holds, for the orders a shop received on one day, how many are in
+each status and the total_amount / kilo_amount of those not cancelled.
+Orders are bucketed by the day they were created, so a status change
+moves counts between columns of the same row.
+
+Rows are kept up to date by statements that run inside the transaction
+that changes the order (see record_order and ROLLUP_TRANSITION), so they
+commit or roll back with it. For history from before the table existed,
+or after fixing data by hand:
+
+    python -m database.rollups                  # rebuild every shop
+    python -m database.rollups --shop-id 12     # one shop
+"""
+import argparse
+
+from dotenv import load_dotenv
+
+STATUS_COLUMNS = (
+    ('Pending', 'pending_count'),
+    ('Processing', 'processing_count'),
+    ('Completed', 'completed_count'),
+    ('Cancelled', 'cancelled_count'),
+)
+
+# A new order lands in its shop's row for the day it was created
+RECORD_ORDER = """
+    INSERT INTO shop_daily_stats (
+        shop_id, day, order_count, pending_count, total_amount, kilo_amount
+    )
+    SELECT shop_id, DATE(created_at), 1, 1, total_amount, COALESCE(kilo_amount, 0)
+    FROM transactions
+    WHERE id = %s
+    ON DUPLICATE KEY UPDATE
+        order_count = order_count + 1,
+        pending_count = pending_count + 1,
+        total_amount = shop_daily_stats.total_amount + VALUES(total_amount),
+        kilo_amount = shop_daily_stats.kilo_amount + VALUES(kilo_amount)
+"""
+
+# Moves one order from {from_status} to its current status. {from_status}
+# is an SQL expression: a placeholder, or the session variable the guarded
+# status UPDATE stashed the old status in. {guard} lets that batch skip the
+# statement when its UPDATE matched nothing.
+ROLLUP_TRANSITION = """
+    UPDATE shop_daily_stats s
+    JOIN transactions t
+      ON t.shop_id = s.shop_id AND s.day = DATE(t.created_at)
+    SET {counts},
+        s.total_amount = s.total_amount
+            - IF(t.status = 'Cancelled', t.total_amount, 0)
+            + IF({from_status} = 'Cancelled', t.total_amount, 0),
+        s.kilo_amount = s.kilo_amount
+            - IF(t.status = 'Cancelled', COALESCE(t.kilo_amount, 0), 0)
+            + IF({from_status} = 'Cancelled', COALESCE(t.kilo_amount, 0), 0)
+    WHERE t.id = {transaction_id}
+      AND t.status <> {from_status}
+      {guard}
+"""
+
+def transition_sql(from_status, transaction_id, guard=''):
+    counts = ',\n        '.join(
+        f"s.{column} = s.{column} - ({from_status} = '{status}') + (t.status = '{status}')"
+        for status, column in STATUS_COLUMNS
+    )
+    return ROLLUP_TRANSITION.format(
+        counts=counts, from_status=from_status, transaction_id=transaction_id, guard=guard)
+
+RECORD_TRANSITION = transition_sql('%(from_status)s', '%(id)s')
+
+def record_order(cursor, transaction_id):
+    cursor.execute(RECORD_ORDER, (transaction_id,))
+
+def record_transition(cursor, transaction_id, from_status):
+    """Apply a status change already written on cursor's transaction."""
+    cursor.execute(RECORD_TRANSITION, {'id': transaction_id, 'from_status': from_status})
+
+REBUILD_INSERT = """
+    INSERT INTO shop_daily_stats (
+        shop_id, day, order_count, {columns}, total_amount, kilo_amount
+    )
+    SELECT shop_id, DATE(created_at), COUNT(*),
+           {sums},
+           COALESCE(SUM(IF(status <> 'Cancelled', total_amount, 0)), 0),
+           COALESCE(SUM(IF(status <> 'Cancelled', COALESCE(kilo_amount, 0), 0)), 0)
+    FROM transactions
+    {where}
+    GROUP BY shop_id, DATE(created_at)
+"""
+
+def rebuild(conn, shop_id=None):
+    """Recompute rollups from transactions, for one shop or all of them.
+
+    Delete and re-insert run in one transaction, so readers see either
+    the old rows or the new ones. Returns the number of day rows written.
+    """
+    where = 'WHERE shop_id = %s' if shop_id is not None else ''
+    values = (shop_id,) if shop_id is not None else ()
+    cursor = conn.cursor()
+    try:
+        conn.start_transaction()
+        cursor.execute(f"DELETE FROM shop_daily_stats {where}", values)
+        cursor.execute(REBUILD_INSERT.format(
+            columns=', '.join(column for _, column in STATUS_COLUMNS),
+            sums=', '.join(f"SUM(status = '{status}')" for status, _ in STATUS_COLUMNS),
+            where=where
+        ), values)
+        written = cursor.rowcount
+        conn.commit()
+        return written
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+
+def main():
+    parser = argparse.ArgumentParser(description='Rebuild shop_daily_stats from transactions')
+    parser.add_argument('--shop-id', type=int, help='only this shop')
+    args = parser.parse_args()
+
+    load_dotenv()
+    from database.connection import create_connection
+
+    conn = create_connection()
+    if not conn:
+        raise SystemExit('Database connection failed')
+    try:
+        written = rebuild(conn, args.shop_id)
+        print(f"Rebuilt {written} day rows")
+    finally:
+        conn.close()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,44 @@
+import os
+
+from database.connection import create_connection
+
+DEFAULT_CHUNK_SIZE = int(os.getenv('STREAM_CHUNK_SIZE', '500'))
+
+def stream_rows(query, values=(), chunk_size=None):
+    """Run query now and return a generator over its rows.
+
+    The cursor is unbuffered, so rows stay on the server and are pulled
+    chunk_size at a time while the generator is consumed; memory does not
+    grow with the result. The query runs before this returns, so SQL and
+    connection errors surface while a proper error response can still be
+    sent. The connection is held until the generator finishes; one that
+    is abandoned half read is discarded rather than returned to the pool.
+    """
+    chunk_size = chunk_size or DEFAULT_CHUNK_SIZE
+    conn = create_connection()
+    if not conn:
+        raise ConnectionError('Database connection failed')
+    try:
+        cursor = conn.cursor(dictionary=True)
+        cursor.execute(query, values)
+        first = cursor.fetchmany(chunk_size)
+    except Exception:
+        conn.discard()
+        raise
+
+    def rows():
+        finished = False
+        try:
+            chunk = first
+            while chunk:
+                yield from chunk
+                chunk = cursor.fetchmany(chunk_size)
+            finished = True
+        finally:
+            if finished:
+                cursor.close()
+                conn.close()
+            else:
+                conn.discard()
+
+    return rows()
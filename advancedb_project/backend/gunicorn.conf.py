@@ -0,0 +1,46 @@
+"""gunicorn settings for the Flask-SocketIO app: gunicorn -c gunicorn.conf.py wsgi:app
+
+Each eventlet worker holds its Socket.IO clients as green threads, so one
+worker serves thousands of join_user_room / join_shop_room connections.
+Raise the open-file limit (ulimit -n) to at least worker_connections.
+
+More than one worker needs EVENT_BUS=redis and REDIS_URL pointing at a
+Redis server (a local `redis-server` or `docker run -p 6379:6379 redis`
+is enough). The bus carries room events to the clients connected to
+other workers, and numbers each room's events in one Redis counter, so
+the seq a reconnecting client sends back means the same thing to every
+worker's replay buffer. With the default in-memory bus each worker
+would number events on its own; the server refuses to start that way.
+Use EVENT_BUS=redis instead of SOCKETIO_MESSAGE_QUEUE, not with it:
+with both, every event is delivered twice. The mobile client
+connects with the websocket transport only, which keeps every connection
+on the worker that accepted it; clients that fall back to long-polling
+would need sticky sessions in front of gunicorn.
+"""
+import os
+
+os.environ.setdefault('SOCKETIO_ASYNC_MODE', 'eventlet')
+os.environ.setdefault('DB_USE_PURE', '1')
+
+bind = os.getenv('BIND', f"0.0.0.0:{os.getenv('PORT', '5000')}")
+worker_class = 'eventlet'
+workers = int(os.getenv('GUNICORN_WORKERS', '1'))
+worker_connections = int(os.getenv('GUNICORN_WORKER_CONNECTIONS', '4000'))
+# Socket.IO connections are long lived; the timeout only has to catch
+# workers whose hub is stuck
+timeout = int(os.getenv('GUNICORN_TIMEOUT', '60'))
+graceful_timeout = 30
+keepalive = 5
+accesslog = os.getenv('GUNICORN_ACCESS_LOG') or None
+errorlog = '-'
+loglevel = os.getenv('LOG_LEVEL', 'info').lower()
+
+
+def on_starting(server):
+    # server.cfg has -w/--workers applied on top of this file
+    if server.cfg.workers > 1 and os.getenv('EVENT_BUS', 'memory').lower() != 'redis':
+        server.log.error(
+            "%s workers need EVENT_BUS=redis: with a per-worker bus, "
+            "room events and their sequence numbers differ between workers", server.cfg.workers
+        )
+        raise SystemExit(1)
@@ -0,0 +1,33 @@
+import os
+import sys
+
+import pytest
+
+# The backend modules import each other from the backend directory
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fakeDb import FakeDatabase  # noqa: E402
+
+
+KILO_PRICES = {
+    1: [
+        {'min_kilo': 0, 'max_kilo': 5, 'price_per_kilo': 40},
+        {'min_kilo': 5.01, 'max_kilo': 10, 'price_per_kilo': 35},
+    ],
+}
+
+
+@pytest.fixture
+def fake_db(monkeypatch):
+    """A FakeDatabase behind every create_connection() of the controllers."""
+    database = FakeDatabase()
+    for module in ('controllers.transactionController', 'database.streaming'):
+        monkeypatch.setattr(f'{module}.create_connection', database.create_connection)
+    return database
+
+
+@pytest.fixture
+def transactions(fake_db):
+    from controllers.transactionController import TransactionController
+    from utils.kiloPriceIndex import KiloPriceIndex
+    return TransactionController(KiloPriceIndex(lambda shop_id: KILO_PRICES.get(shop_id, [])))
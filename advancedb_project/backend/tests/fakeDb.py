@@ -0,0 +1,139 @@
+"""In-memory stand-in for mysql.connector, enough to drive the controllers.
+
+A FakeDatabase answers every statement through its handler, which gets
+(operation, params) and returns a list of Result objects: one per statement
+of a multi-statement batch, or a single one for plain execute(). Its
+connections go through the real ConnectionPool and TracingCursor, so the
+statements the tracer sees are the ones the controllers run.
+"""
+from mysql.connector import FieldType
+
+from database.pool import ConnectionPool
+from utils.queryTracer import TracingCursor
+
+
+class Result:
+    """One statement's outcome: rows for a read, rowcount for a write."""
+
+    def __init__(self, rows=None, rowcount=0, lastrowid=None, types=None):
+        self.with_rows = rows is not None
+        self._rows = [dict(row) for row in rows or ()]
+        self.rowcount = len(self._rows) if self.with_rows else rowcount
+        self.lastrowid = lastrowid
+        self.description = None
+        if self.with_rows:
+            types = types or {}
+            columns = self._rows[0] if self._rows else {}
+            self.description = [(name, types.get(name, FieldType.VAR_STRING)) for name in columns]
+        self._dictionary = True
+
+    def _shape(self, row):
+        return row if self._dictionary else tuple(row.values())
+
+    def fetchone(self):
+        return self._shape(self._rows.pop(0)) if self._rows else None
+
+    def fetchmany(self, size=1):
+        rows, self._rows = self._rows[:size], self._rows[size:]
+        return [self._shape(row) for row in rows]
+
+    def fetchall(self):
+        rows, self._rows = self._rows, []
+        return [self._shape(row) for row in rows]
+
+
+class FakeCursor:
+    def __init__(self, connection, dictionary=False):
+        self._connection = connection
+        self._dictionary = dictionary
+        self._result = Result()
+
+    @property
+    def with_rows(self):
+        return self._result.with_rows
+
+    @property
+    def rowcount(self):
+        return self._result.rowcount
+
+    @property
+    def lastrowid(self):
+        return self._result.lastrowid
+
+    @property
+    def description(self):
+        return self._result.description
+
+    def _run(self, operation, params):
+        self._connection.database.statements.append((operation, params))
+        results = self._connection.database.handler(operation, params)
+        for result in results:
+            result._dictionary = self._dictionary
+        return results
+
+    def execute(self, operation, params=None, multi=False):
+        results = self._run(operation, params)
+        if multi:
+            return iter(results)
+        self._result = results[0] if results else Result()
+        return None
+
+    def executemany(self, operation, seq_params):
+        for params in seq_params:
+            self.execute(operation, params)
+
+    def fetchone(self):
+        return self._result.fetchone()
+
+    def fetchmany(self, size=1):
+        return self._result.fetchmany(size)
+
+    def fetchall(self):
+        return self._result.fetchall()
+
+    def __iter__(self):
+        return iter(self.fetchall())
+
+    def close(self):
+        pass
+
+
+class FakeConnection:
+    in_transaction = False
+
+    def __init__(self, database):
+        self.database = database
+
+    def cursor(self, dictionary=False, **kwargs):
+        return FakeCursor(self, dictionary=dictionary)
+
+    def start_transaction(self, **kwargs):
+        pass
+
+    def commit(self):
+        self.database.commits += 1
+
+    def rollback(self):
+        self.database.rollbacks += 1
+
+    def ping(self, reconnect=False):
+        pass
+
+    def is_connected(self):
+        return True
+
+    def close(self):
+        pass
+
+
+class FakeDatabase:
+    def __init__(self, handler=None):
+        self.handler = handler or (lambda operation, params: [Result()])
+        self.statements = []
+        self.commits = 0
+        self.rollbacks = 0
+        self.pool = ConnectionPool(lambda: FakeConnection(self), size=2,
+                                   wrap_cursor=TracingCursor)
+
+    def create_connection(self):
+        return self.pool.acquire()
@@ -0,0 +1,132 @@
+"""Catalog caching: the LRU and Redis backends and ShopCatalogCache."""
+import time
+from decimal import Decimal
+
+import pytest
+
+from utils.cache import LRUCache, RedisCache, ShopCatalogCache
+from utils.fakeRedis import FakeRedis
+
+
+@pytest.fixture(params=['memory', 'redis'])
+def backend(request):
+    if request.param == 'memory':
+        return LRUCache(max_entries=100, ttl=60)
+    return RedisCache(FakeRedis(), ttl=60)
+
+
+class Loader:
+    def __init__(self, value):
+        self.value = value
+        self.calls = 0
+        self.during = None
+
+    def __call__(self):
+        self.calls += 1
+        if self.during:
+            self.during()
+        return self.value
+
+
+def test_lru_evicts_the_least_recently_used():
+    cache = LRUCache(max_entries=2, ttl=0)
+    cache.set('a', 1)
+    cache.set('b', 2)
+    cache.get('a')
+    cache.set('c', 3)
+
+    assert cache.get('b') is None
+    assert (cache.get('a'), cache.get('c')) == (1, 3)
+    assert cache.stats()['evictions'] == 1
+
+
+def test_lru_entries_expire():
+    cache = LRUCache(ttl=0.01)
+    cache.set('a', 1)
+    cache.set('b', 2, ttl=60)
+    time.sleep(0.02)
+
+    assert cache.get('a', 'gone') == 'gone'
+    assert cache.get('b') == 2
+    assert cache.stats()['expirations'] == 1
+
+
+def test_redis_values_go_through_json():
+    cache = RedisCache(FakeRedis())
+    cache.set('k', [{'price': Decimal('12.50')}])
+
+    assert cache.get('k') == [{'price': 12.5}]
+
+
+def test_a_redis_outage_is_a_miss():
+    class Down:
+        def get(self, key):
+            raise ConnectionError('redis is down')
+        set = delete = get
+
+    cache = RedisCache(Down())
+    cache.set('k', 1)
+    cache.delete('k')
+
+    assert cache.get('k', 'miss') == 'miss'
+    assert cache.stats()['errors'] == 3
+
+
+def test_hits_skip_the_loader(backend):
+    catalog = ShopCatalogCache(backend)
+    loader = Loader([{'service_name': 'Wash'}])
+
+    first = catalog.get_or_load(1, 'services', loader)
+    second = catalog.get_or_load(1, 'services', loader)
+
+    assert first == second == [{'service_name': 'Wash'}]
+    assert loader.calls == 1
+
+
+def test_none_is_not_cached(backend):
+    catalog = ShopCatalogCache(backend)
+    loader = Loader(None)
+
+    catalog.get_or_load(1, 'shop', loader)
+    catalog.get_or_load(1, 'shop', loader)
+
+    assert loader.calls == 2
+
+
+def test_an_empty_section_is_cached(backend):
+    catalog = ShopCatalogCache(backend)
+    loader = Loader([])
+
+    catalog.get_or_load(1, 'kilo_prices', loader)
+    catalog.get_or_load(1, 'kilo_prices', loader)
+
+    assert loader.calls == 1
+
+
+def test_invalidation_drops_every_section_of_that_shop_only(backend):
+    catalog = ShopCatalogCache(backend)
+    for section in ('shop', 'services', 'full'):
+        catalog.get_or_load(1, section, Loader(section))
+    other = Loader('other')
+    catalog.get_or_load(2, 'services', other)
+
+    catalog.invalidate_shop(1)
+
+    reload = Loader('fresh')
+    for section in ('shop', 'services', 'full'):
+        assert catalog.get_or_load(1, section, reload) == 'fresh'
+    assert reload.calls == 3
+    catalog.get_or_load(2, 'services', other)
+    assert other.calls == 1
+
+
+def test_a_write_during_a_load_keeps_the_old_rows_out(backend):
+    catalog = ShopCatalogCache(backend)
+    stale = Loader('before the write')
+    stale.during = lambda: catalog.invalidate_shop(1)
+
+    assert catalog.get_or_load(1, 'services', stale) == 'before the write'
+
+    fresh = Loader('after the write')
+    assert catalog.get_or_load(1, 'services', fresh) == 'after the write'
+    assert fresh.calls == 1
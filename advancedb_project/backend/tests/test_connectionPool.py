@@ -0,0 +1,155 @@
+"""ConnectionPool: reuse, the size bound, health checks and recycling."""
+import threading
+
+import pytest
+
+from database.pool import ConnectionPool, PoolTimeout
+
+
+class RawConnection:
+    def __init__(self, number):
+        self.number = number
+        self.in_transaction = False
+        self.alive = True
+        self.closed = False
+        self.rollbacks = 0
+
+    def ping(self, reconnect=False):
+        if not self.alive:
+            raise OSError('server has gone away')
+
+    def rollback(self):
+        self.rollbacks += 1
+        self.in_transaction = False
+
+    def close(self):
+        self.closed = True
+
+
+class Connector:
+    def __init__(self):
+        self.made = []
+        self.fail = False
+
+    def __call__(self):
+        if self.fail:
+            raise OSError("Can't connect")
+        self.made.append(RawConnection(len(self.made) + 1))
+        return self.made[-1]
+
+
+@pytest.fixture
+def connect():
+    return Connector()
+
+
+def pool_of(connect, **options):
+    options.setdefault('ping_interval', 60)
+    return ConnectionPool(connect, **options)
+
+
+def test_released_connections_are_reused(connect):
+    pool = pool_of(connect, size=2)
+
+    first = pool.acquire()
+    number = first.number
+    first.close()
+    second = pool.acquire()
+
+    assert second.number == number
+    assert len(connect.made) == 1
+    assert pool.stats()['checkouts'] == 2
+
+
+def test_a_full_pool_times_out(connect):
+    pool = pool_of(connect, size=1)
+    held = pool.acquire()  # noqa: F841 -- kept alive so it is not released
+
+    with pytest.raises(PoolTimeout):
+        pool.acquire(timeout=0.05)
+    assert pool.stats()['timeouts'] == 1
+    assert len(connect.made) == 1
+
+
+def test_a_waiter_gets_the_released_connection(connect):
+    pool = pool_of(connect, size=1)
+    held = pool.acquire()
+    got = []
+    waiter = threading.Thread(target=lambda: got.append(pool.acquire(timeout=2)))
+    waiter.start()
+
+    held.close()
+    waiter.join(2)
+
+    assert got and got[0].number == 1
+    assert len(connect.made) == 1
+
+
+def test_an_open_transaction_is_rolled_back_on_release(connect):
+    pool = pool_of(connect)
+    conn = pool.acquire()
+    connect.made[0].in_transaction = True
+
+    conn.close()
+
+    assert connect.made[0].rollbacks == 1
+    assert pool.stats()['idle'] == 1
+
+
+def test_a_returned_proxy_cannot_be_used(connect):
+    pool = pool_of(connect)
+    conn = pool.acquire()
+    conn.close()
+
+    with pytest.raises(Exception):
+        conn.ping()
+    # A second close() does not release the connection twice
+    conn.close()
+    assert pool.stats()['in_use'] == 0
+
+
+def test_a_dead_idle_connection_is_replaced(connect):
+    pool = pool_of(connect, ping_interval=0)
+    pool.acquire().close()
+    connect.made[0].alive = False
+
+    conn = pool.acquire()
+
+    assert conn.number == 2
+    assert connect.made[0].closed
+    assert pool.stats()['evicted'] == 1
+
+
+def test_connections_are_recycled_after_max_uses(connect):
+    pool = pool_of(connect, max_uses=2)
+    pool.acquire().close()
+    pool.acquire().close()
+
+    assert pool.acquire().number == 2
+    assert connect.made[0].closed
+
+
+def test_a_failed_connect_frees_its_slot(connect):
+    pool = pool_of(connect, size=1)
+    connect.fail = True
+    with pytest.raises(OSError):
+        pool.acquire()
+
+    connect.fail = False
+    assert pool.acquire(timeout=0.05).number == 1
+
+
+def test_discard_drops_the_connection(connect):
+    pool = pool_of(connect, size=1)
+    pool.acquire().discard()
+
+    assert connect.made[0].closed
+    assert pool.stats()['open'] == 0
+    assert pool.acquire().number == 2
+
+
+def test_a_leaked_checkout_goes_back_to_the_pool(connect):
+    pool = pool_of(connect, size=1)
+    pool.acquire()  # dropped without close()
+
+    assert pool.acquire(timeout=0.05).number == 1
@@ -0,0 +1,114 @@
+"""EmitScheduler: per-room coalescing windows and status_update supersession."""
+import threading
+import time
+
+from utils.emitScheduler import EmitScheduler
+
+
+class Recorder:
+    """emit() stand-in; wait(n) blocks until n frames went out."""
+
+    def __init__(self, fail_rooms=()):
+        self.frames = []
+        self.fail_rooms = set(fail_rooms)
+        self._cond = threading.Condition()
+
+    def __call__(self, event, data, room):
+        with self._cond:
+            self.frames.append((event, data, room))
+            self._cond.notify_all()
+        if room in self.fail_rooms:
+            raise RuntimeError('socket gone')
+
+    def wait(self, count, timeout=2):
+        with self._cond:
+            assert self._cond.wait_for(lambda: len(self.frames) >= count, timeout), \
+                f'expected {count} frames, got {self.frames}'
+            return list(self.frames)
+
+
+def status(transaction_id, value):
+    return {'transaction_id': transaction_id, 'status': value}
+
+
+def test_window_zero_emits_right_away():
+    emit = Recorder()
+    scheduler = EmitScheduler(emit, window_ms=0)
+
+    scheduler.send('new_transaction', {'transaction_id': 1}, 'shop_1')
+
+    assert emit.frames == [('new_transaction', {'transaction_id': 1}, 'shop_1')]
+    assert scheduler._thread is None
+
+
+def test_a_lone_event_keeps_its_own_name():
+    emit = Recorder()
+    scheduler = EmitScheduler(emit, window_ms=20)
+
+    scheduler.send('new_transaction', {'transaction_id': 1}, 'shop_1')
+
+    assert emit.wait(1) == [('new_transaction', {'transaction_id': 1}, 'shop_1')]
+
+
+def test_events_in_one_window_go_out_as_one_frame_per_room():
+    emit = Recorder()
+    scheduler = EmitScheduler(emit, window_ms=50)
+
+    scheduler.send('new_transaction', {'transaction_id': 1}, 'shop_1')
+    scheduler.send('order_counts', {'shop_id': 1}, 'shop_1')
+    scheduler.send('new_transaction', {'transaction_id': 2}, 'shop_2')
+
+    frames = {room: (event, data) for event, data, room in emit.wait(2)}
+    assert frames['shop_1'] == ('updates', {'events': [
+        {'event': 'new_transaction', 'data': {'transaction_id': 1}},
+        {'event': 'order_counts', 'data': {'shop_id': 1}},
+    ]})
+    assert frames['shop_2'] == ('new_transaction', {'transaction_id': 2})
+    time.sleep(0.1)
+    assert len(emit.frames) == 2
+    assert scheduler.stats()['frames'] == 2
+    assert scheduler.stats()['pending_rooms'] == 0
+
+
+def test_a_later_status_update_replaces_the_pending_one_and_moves_last():
+    emit = Recorder()
+    scheduler = EmitScheduler(emit, window_ms=50)
+
+    scheduler.send('status_update', status(7, 'Processing'), 'shop_1')
+    scheduler.send('status_update', status(8, 'Processing'), 'shop_1')
+    scheduler.send('order_counts', {'shop_id': 1}, 'shop_1')
+    # Ids arrive as ints from one path and strings from another
+    scheduler.send('status_update', status('7', 'Completed'), 'shop_1')
+
+    (event, data, room), = emit.wait(1)
+    assert event == 'updates'
+    assert data['events'] == [
+        {'event': 'status_update', 'data': status(8, 'Processing')},
+        {'event': 'order_counts', 'data': {'shop_id': 1}},
+        {'event': 'status_update', 'data': status('7', 'Completed')},
+    ]
+    assert scheduler.stats()['superseded'] == 1
+    assert scheduler.stats()['events'] == 4
+
+
+def test_other_events_are_never_superseded():
+    emit = Recorder()
+    scheduler = EmitScheduler(emit, window_ms=50)
+
+    scheduler.send('new_transaction', {'transaction_id': 1}, 'shop_1')
+    scheduler.send('new_transaction', {'transaction_id': 1}, 'shop_1')
+
+    (event, data, room), = emit.wait(1)
+    assert len(data['events']) == 2
+    assert scheduler.stats()['superseded'] == 0
+
+
+def test_a_failing_emit_does_not_stop_later_windows():
+    emit = Recorder(fail_rooms={'shop_1'})
+    scheduler = EmitScheduler(emit, window_ms=10)
+
+    scheduler.send('new_transaction', {'transaction_id': 1}, 'shop_1')
+    emit.wait(1)
+    scheduler.send('new_transaction', {'transaction_id': 2}, 'shop_2')
+
+    assert emit.wait(2)[-1] == ('new_transaction', {'transaction_id': 2}, 'shop_2')
@@ -0,0 +1,70 @@
+"""Cross-worker fan-out through RedisEventBus on a shared broker."""
+import time
+
+from utils.eventBus import RedisEventBus
+from utils.fakeRedis import FakeRedis
+
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, 'timed out'
+        time.sleep(0.01)
+
+
+def test_events_reach_every_worker_including_the_sender():
+    broker = FakeRedis()
+    received = {name: [] for name in ('a', 'b')}
+    buses = {name: RedisEventBus(broker, lambda event, data, room, name=name:
+                                 received[name].append((event, data, room)), poll_timeout=0.05)
+             for name in received}
+    for bus in buses.values():
+        bus.start()
+    try:
+        buses['a'].publish('status_update', {'transaction_id': 7}, 'user_3')
+        wait_for(lambda: all(received.values()))
+
+        assert received['a'] == received['b'] == [('status_update', {'transaction_id': 7}, 'user_3')]
+        assert buses['b'].stats()['delivered'] == 1
+    finally:
+        for bus in buses.values():
+            bus.close()
+
+
+def test_nothing_is_delivered_before_start():
+    broker = FakeRedis()
+    received = []
+    bus = RedisEventBus(broker, lambda *event: received.append(event), poll_timeout=0.05)
+    try:
+        # e.g. another worker's change while this one is still importing
+        broker.publish(bus.channel, bus._envelope('catalog_changed', {'shop_id': 1}, '_changes'))
+        time.sleep(0.2)
+        assert received == []
+
+        bus.start()
+        wait_for(lambda: received)
+        assert received == [('catalog_changed', {'shop_id': 1}, '_changes')]
+    finally:
+        bus.close()
+
+
+def test_a_failing_delivery_is_counted_and_the_listener_goes_on():
+    broker = FakeRedis()
+    received = []
+
+    def deliver(event, data, room):
+        if data.get('bad'):
+            raise RuntimeError('boom')
+        received.append(event)
+
+    bus = RedisEventBus(broker, deliver, poll_timeout=0.05)
+    bus.start()
+    try:
+        bus.publish('first', {'bad': True}, 'shop_1')
+        bus.publish('second', {}, 'shop_1')
+        wait_for(lambda: received)
+
+        assert received == ['second']
+        assert bus.stats()['dropped'] == 1
+    finally:
+        bus.close()
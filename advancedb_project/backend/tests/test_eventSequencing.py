@@ -0,0 +1,123 @@
+"""Room sequence numbers across workers and the replay of missed events."""
+import threading
+import time
+
+import pytest
+
+from utils.eventBus import LocalEventBus, RedisEventBus
+from utils.eventReplay import EventReplayBuffer
+from utils.fakeRedis import FakeRedis
+
+
+class Node:
+    """One worker process: a bus on the shared broker and what it delivered."""
+
+    def __init__(self, broker):
+        self.delivered = []
+        self.bus = RedisEventBus(broker, self.deliver, poll_timeout=0.05)
+        self.bus.start()
+
+    def deliver(self, event, data, room):
+        self.delivered.append((event, data, room))
+
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, 'timed out'
+        time.sleep(0.01)
+
+
+@pytest.fixture
+def nodes():
+    broker = FakeRedis()
+    nodes = [Node(broker) for _ in range(3)]
+    yield nodes
+    for node in nodes:
+        node.bus.close()
+
+
+def test_every_worker_gets_a_room_in_seq_order(nodes):
+    per_node = 50
+
+    def publish(node):
+        for i in range(per_node):
+            node.bus.publish_sequenced('new_transaction', {'n': i}, 'shop_1')
+
+    threads = [threading.Thread(target=publish, args=(node,)) for node in nodes]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    total = per_node * len(nodes)
+    wait_for(lambda: all(len(node.delivered) == total for node in nodes))
+
+    for node in nodes:
+        assert [data['seq'] for _, data, _ in node.delivered] == list(range(1, total + 1))
+    assert nodes[0].bus.current_seq('shop_1') == total
+
+
+def test_rooms_are_numbered_separately(nodes):
+    nodes[0].bus.publish_sequenced('status_update', {}, 'user_1')
+    nodes[1].bus.publish_sequenced('status_update', {}, 'user_2')
+    nodes[2].bus.publish_sequenced('status_update', {}, 'user_1')
+    wait_for(lambda: len(nodes[0].delivered) == 3)
+
+    assert [(room, data['seq']) for _, data, room in nodes[0].delivered] == [
+        ('user_1', 1), ('user_2', 1), ('user_1', 2)]
+
+
+def test_unsequenced_events_carry_no_seq(nodes):
+    nodes[0].bus.publish('catalog_changed', {'shop_id': 1}, '_changes')
+    wait_for(lambda: len(nodes[1].delivered) == 1)
+
+    assert nodes[1].delivered == [('catalog_changed', {'shop_id': 1}, '_changes')]
+
+
+def test_local_bus_numbers_each_room():
+    delivered = []
+    bus = LocalEventBus(lambda event, data, room: delivered.append((room, data['seq'])))
+    for room in ('shop_1', 'shop_1', 'shop_2'):
+        bus.publish_sequenced('order_counts', {}, room)
+
+    assert delivered == [('shop_1', 1), ('shop_1', 2), ('shop_2', 1)]
+    assert bus.current_seq('shop_1') == 2
+
+
+def buffer_with(*seqs, size=200):
+    buffer = EventReplayBuffer(size=size)
+    for seq in seqs:
+        buffer.record('shop_1', seq, 'new_transaction', {'seq': seq})
+    return buffer
+
+
+def replayed(events):
+    return [data['seq'] for _, data in events]
+
+
+def test_replay_returns_exactly_the_missed_events():
+    assert replayed(buffer_with(1, 2, 3, 4, 5).since('shop_1', 2, 5)) == [3, 4, 5]
+    assert buffer_with(1, 2).since('shop_1', 2, 2) == []
+
+
+def test_replay_orders_by_seq():
+    assert replayed(buffer_with(1, 3, 2, 4).since('shop_1', 1, 4)) == [2, 3, 4]
+
+
+def test_replay_stops_short_of_events_still_in_transit():
+    # current_seq is read from the broker; seq 4 has not reached this worker
+    # yet and will arrive live
+    assert replayed(buffer_with(1, 2, 3).since('shop_1', 1, 4)) == [2, 3]
+
+
+@pytest.mark.parametrize('seqs, last_seq, current_seq', [
+    ((1, 2, 4, 5), 1, 5),            # a hole inside the missed run
+    ((3, 4, 5), 1, 5),               # the oldest missed event is gone
+    (tuple(range(1, 11)), 2, 10),    # pushed out of a small buffer
+    ((1, 2), 7, 2),                  # the sequence restarted
+])
+def test_gaps_ask_for_a_resync(seqs, last_seq, current_seq):
+    buffer = buffer_with(*seqs, size=5)
+
+    assert buffer.since('shop_1', last_seq, current_seq) is None
+    assert buffer.stats()['resyncs'] == 1
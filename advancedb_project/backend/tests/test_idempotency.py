@@ -0,0 +1,118 @@
+"""Idempotency-Key replay on POST /create_transaction, in one worker and
+across workers sharing a Redis store."""
+import threading
+from datetime import datetime, timedelta
+
+import jwt
+import pytest
+
+from utils.fakeRedis import FakeRedis
+from utils.idempotency import IdempotencyStore, RedisIdempotencyStore
+
+ORDER = {'shop_id': 1, 'service_name': 'Wash', 'total_amount': 120}
+
+
+@pytest.fixture
+def api(monkeypatch):
+    import app as backend
+    created = []
+
+    def create_transaction(user_id, data):
+        if data.get('fail'):
+            return {'status': 500, 'message': 'Database connection failed'}
+        created.append((user_id, data))
+        return {'status': 201, 'message': 'Transaction created successfully',
+                'transaction_id': 100 + len(created)}
+
+    secret = 'x' * 32
+    monkeypatch.setitem(backend.app.config, 'SECRET_KEY', secret)
+    monkeypatch.setattr(backend, 'ASYNC_ORDERS', False)
+    monkeypatch.setattr(backend, 'announce_transaction', lambda *args: None)
+    monkeypatch.setattr(backend.transaction_controller, 'create_transaction', create_transaction)
+    monkeypatch.setattr(backend, 'idempotency_keys', IdempotencyStore())
+
+    token = jwt.encode({'user_id': 5, 'exp': datetime.utcnow() + timedelta(hours=1)},
+                       secret, algorithm='HS256')
+    client = backend.app.test_client()
+
+    def post(key=None, user_id=5, data=ORDER):
+        headers = {'Authorization': f'Bearer {token}'}
+        if key:
+            headers['Idempotency-Key'] = key
+        return client.post(f'/create_transaction/{user_id}', json=data, headers=headers)
+
+    post.backend = backend
+    post.created = created
+    return post
+
+
+def test_retry_gets_the_first_response(api):
+    first = api(key='order-1')
+    retry = api(key='order-1')
+
+    assert first.status_code == retry.status_code == 201
+    assert retry.get_json() == first.get_json()
+    assert len(api.created) == 1
+
+
+def test_without_a_key_every_request_creates(api):
+    api()
+    api()
+
+    assert len(api.created) == 2
+
+
+def test_keys_are_scoped_to_the_user(api):
+    api(key='order-1', user_id=5)
+    api(key='order-1', user_id=6)
+
+    assert [user_id for user_id, _ in api.created] == [5, 6]
+
+
+def test_retry_after_a_server_error_runs_again(api):
+    failed = api(key='order-1', data=dict(ORDER, fail=True))
+    retry = api(key='order-1')
+
+    assert (failed.status_code, retry.status_code) == (500, 201)
+    assert len(api.created) == 1
+
+
+def test_request_still_in_flight_conflicts(api):
+    api.backend.idempotency_keys.begin('5:order-1')
+
+    response = api(key='order-1')
+
+    assert response.status_code == 409
+    assert api.created == []
+
+
+def test_retry_on_another_worker_gets_the_first_response(api, monkeypatch):
+    shared = FakeRedis()
+    monkeypatch.setattr(api.backend, 'idempotency_keys', RedisIdempotencyStore(shared))
+    first = api(key='order-1')
+    monkeypatch.setattr(api.backend, 'idempotency_keys', RedisIdempotencyStore(shared))
+    retry = api(key='order-1')
+
+    assert retry.status_code == 201
+    assert retry.get_json() == first.get_json()
+    assert len(api.created) == 1
+
+
+def test_one_claim_wins_across_workers():
+    shared = FakeRedis()
+    workers = [RedisIdempotencyStore(shared) for _ in range(20)]
+    claims = []
+    barrier = threading.Barrier(len(workers))
+
+    def claim(store):
+        barrier.wait()
+        claims.append(store.begin('5:order-1'))
+
+    threads = [threading.Thread(target=claim, args=(store,)) for store in workers]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert claims.count(None) == 1
+    assert [claim for claim in claims if claim is not None] == [{'state': 'in_flight'}] * 19
@@ -0,0 +1,145 @@
+"""Keyset pages of the transaction listings, walked against an in-memory
+table that applies the cursor condition and LIMIT the way MySQL would."""
+import re
+from datetime import datetime, timedelta
+
+import pytest
+
+from fakeDb import Result
+from utils.pagination import encode_cursor
+
+START = datetime(2024, 5, 1, 8, 0, 0)
+
+
+def make_rows(count, per_second=3):
+    # Several orders share each created_at, so pages must break ties on id
+    return [{'id': i, 'shop_id': 1, 'status': 'Pending' if i % 2 else 'Completed',
+             'created_at': START + timedelta(seconds=i // per_second)}
+            for i in range(1, count + 1)]
+
+
+def listing(rows):
+    def handler(operation, params):
+        values = list(params)
+        owner_id = values.pop(0)
+        matched = [row for row in rows if row['shop_id'] == owner_id]
+        if 't.status = %s' in operation:
+            status = values.pop(0)
+            matched = [row for row in matched if row['status'] == status]
+        statuses = re.search(r't\.status IN \(([%s, ]+)\)', operation)
+        if statuses:
+            statuses = [values.pop(0) for _ in range(statuses.group(1).count('%s'))]
+            matched = [row for row in matched if row['status'] in statuses]
+        if 't.created_at < %s' in operation:
+            created_at, same_created_at, last_id = values[:3]
+            values = values[3:]
+            assert created_at == same_created_at
+            created_at = datetime.strptime(created_at, '%Y-%m-%d %H:%M:%S')
+            matched = [row for row in matched
+                       if (row['created_at'], row['id']) < (created_at, last_id)]
+        matched.sort(key=lambda row: (row['created_at'], row['id']), reverse=True)
+        if 'LIMIT %s' in operation:
+            matched = matched[:values.pop(0)]
+        assert not values
+        return [Result(rows=matched)]
+    return handler
+
+
+def walk(transactions, params, stream=False):
+    pages = []
+    cursor = None
+    while True:
+        page_params = dict(params, **({'cursor': cursor} if cursor else {}))
+        if stream:
+            response = transactions.stream_transactions('shop', 1, page_params)
+            ids = [row['id'] for row in response['transactions']]
+            cursor = response['page']['next_cursor']
+        else:
+            response = transactions.list_transactions('shop', 1, page_params)
+            ids = [row['id'] for row in response['transactions']]
+            cursor = response['next_cursor']
+        assert response['status'] == 200
+        pages.append(ids)
+        if cursor is None:
+            return pages
+        assert len(pages) < 50, 'pagination does not terminate'
+
+
+@pytest.mark.parametrize('stream', [False, True])
+@pytest.mark.parametrize('count, limit, sizes', [
+    (10, 4, [4, 4, 2]),
+    (12, 4, [4, 4, 4]),   # the last page is full: no cursor to an empty page
+    (3, 4, [3]),
+    (0, 4, [0]),
+])
+def test_pages_cover_every_row_once(fake_db, transactions, stream, count, limit, sizes):
+    rows = make_rows(count)
+    fake_db.handler = listing(rows)
+
+    pages = walk(transactions, {'limit': str(limit)}, stream=stream)
+
+    assert [len(page) for page in pages] == sizes
+    expected = sorted(rows, key=lambda row: (row['created_at'], row['id']), reverse=True)
+    assert [i for page in pages for i in page] == [row['id'] for row in expected]
+
+
+def test_pages_with_a_status_filter(fake_db, transactions):
+    rows = make_rows(11)
+    fake_db.handler = listing(rows)
+
+    pages = walk(transactions, {'limit': '2', 'status': 'completed'})
+
+    assert [i for page in pages for i in page] == [10, 8, 6, 4, 2]
+
+
+def test_active_statuses_in_one_request(fake_db, transactions):
+    rows = make_rows(9)
+    rows[2]['status'] = 'Processing'
+    rows[3]['status'] = 'Cancelled'
+    fake_db.handler = listing(rows)
+
+    pages = walk(transactions, {'limit': '2', 'status': 'pending,processing'})
+
+    assert [i for page in pages for i in page] == [9, 7, 5, 3, 1]
+    assert 't.status IN (%s, %s)' in fake_db.statements[-1][0]
+
+
+def test_without_limit_or_cursor_one_capped_page_comes_back(fake_db, transactions):
+    fake_db.handler = listing(make_rows(130))
+
+    response = transactions.list_transactions('shop', 1, {})
+
+    assert [row['id'] for row in response['transactions']] == list(range(130, 80, -1))
+    assert response['next_cursor'] is not None
+    rest = walk(transactions, {'cursor': response['next_cursor'], 'limit': '100'})
+    assert [i for page in rest for i in page] == list(range(80, 0, -1))
+
+
+def test_page_size_zero_restores_the_whole_history(fake_db, monkeypatch):
+    from controllers.transactionController import TransactionController
+    from utils.kiloPriceIndex import KiloPriceIndex
+    monkeypatch.setenv('TRANSACTION_PAGE_SIZE', '0')
+    fake_db.handler = listing(make_rows(130))
+    transactions = TransactionController(KiloPriceIndex(lambda shop_id: []))
+
+    response = transactions.list_transactions('shop', 1, {})
+
+    assert len(response['transactions']) == 130
+    assert response['next_cursor'] is None
+    assert 'LIMIT' not in fake_db.statements[-1][0]
+
+
+@pytest.mark.parametrize('params', [
+    {'cursor': 'not-a-cursor'},
+    # Well-formed tokens whose values have the wrong type
+    {'cursor': encode_cursor(None, [1])},
+    {'cursor': encode_cursor('2024-05-01 08:00:00', 'seven')},
+    {'cursor': encode_cursor('yesterday', 7)},
+    {'cursor': encode_cursor('2024-05-01 08:00:00', 7, 8)},
+    {'limit': '0'},
+    {'limit': 'ten'},
+    {'status': 'Lost'},
+])
+def test_bad_page_parameters(fake_db, transactions, params):
+    assert transactions.list_transactions('shop', 1, params)['status'] == 400
+    assert fake_db.statements == []
@@ -0,0 +1,129 @@
+"""Compiled kilo price lookups against the SQL condition they replaced."""
+import random
+from decimal import Decimal
+
+import pytest
+
+from utils.kiloPriceIndex import KiloPriceIndex, KiloPriceTable
+
+ROWS = [
+    {'min_kilo': 5.01, 'max_kilo': 10, 'price_per_kilo': 35},
+    {'min_kilo': 0, 'max_kilo': 5, 'price_per_kilo': 40},
+    {'min_kilo': Decimal('10.01'), 'max_kilo': Decimal('20.00'), 'price_per_kilo': 30},
+]
+
+
+def sql_price(rows, kilos):
+    # WHERE min_kilo <= %s AND max_kilo >= %s
+    kilos = Decimal(str(kilos))
+    for row in rows:
+        if Decimal(str(row['min_kilo'])) <= kilos <= Decimal(str(row['max_kilo'])):
+            return row['price_per_kilo']
+    return None
+
+
+@pytest.mark.parametrize('kilos, price', [
+    (0, 40),
+    (5, 40),
+    ('5.00', 40),
+    (5.005, None),   # between two ranges
+    (5.01, 35),      # the float 5.01 must not land just below the edge
+    (10, 35),
+    (20, 30),
+    (20.01, None),
+    (-1, None),
+])
+def test_range_edges(kilos, price):
+    assert KiloPriceTable(ROWS).price_for(kilos) == price
+
+
+def test_matches_the_sql_condition():
+    table = KiloPriceTable(ROWS)
+    rng = random.Random(7)
+    for _ in range(500):
+        kilos = round(rng.uniform(-1, 22), 2)
+        assert table.price_for(kilos) == sql_price(ROWS, kilos), kilos
+
+
+def test_overlapping_legacy_rows_still_resolve():
+    rows = [
+        {'min_kilo': 0, 'max_kilo': 20, 'price_per_kilo': 50},
+        {'min_kilo': 2, 'max_kilo': 3, 'price_per_kilo': 45},
+    ]
+    table = KiloPriceTable(rows)
+
+    assert table.price_for(2.5) == 45
+    # Past the short range, the wide one still covers the point
+    assert table.price_for(10) == 50
+
+
+@pytest.mark.parametrize('new_range, overlaps', [
+    ((5.001, 5.009), False),
+    ((4, 6), True),
+    ((20, 25), True),
+    ((20.01, 25), False),
+    ((-3, -1), False),
+])
+def test_overlaps(new_range, overlaps):
+    assert KiloPriceTable(ROWS).overlaps(*new_range) is overlaps
+
+
+def test_invalid_kilos():
+    with pytest.raises(ValueError):
+        KiloPriceTable(ROWS).price_for('lots')
+
+
+class Loader:
+    def __init__(self):
+        self.rows = {1: ROWS}
+        self.calls = 0
+        self.during = None
+
+    def __call__(self, shop_id):
+        self.calls += 1
+        rows = self.rows.get(shop_id, [])
+        if self.during:
+            self.during()
+        return rows
+
+
+def test_index_compiles_once_until_invalidated():
+    loader = Loader()
+    index = KiloPriceIndex(loader, max_age=0)
+
+    assert index.price_for(1, 3) == 40
+    assert index.price_for(1, 7) == 35
+    assert loader.calls == 1
+
+    loader.rows[1] = [{'min_kilo': 0, 'max_kilo': 10, 'price_per_kilo': 25}]
+    index.invalidate(1)
+    assert index.price_for(1, 7) == 25
+    assert loader.calls == 2
+
+
+def test_a_shop_without_ranges_prices_nothing():
+    assert KiloPriceIndex(Loader()).price_for(9, 3) is None
+
+
+def test_a_table_outdated_mid_load_is_not_kept():
+    loader = Loader()
+    index = KiloPriceIndex(loader, max_age=0)
+    loader.during = lambda: index.invalidate(1)
+
+    index.price_for(1, 3)
+    loader.during = None
+    index.price_for(1, 3)
+
+    assert loader.calls == 2
+
+
+def test_tables_are_reloaded_after_max_age():
+    loader = Loader()
+    index = KiloPriceIndex(loader, max_age=300)
+    index.price_for(1, 3)
+    table, loaded_at = index._tables[1]
+    index._tables[1] = (table, loaded_at - 301)
+
+    index.price_for(1, 3)
+
+    assert loader.calls == 2
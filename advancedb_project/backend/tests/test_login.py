@@ -0,0 +1,36 @@
+from flask import Flask
+
+from fakeDb import FakeDatabase, Result
+from utils.passwordHasher import HasherBusy
+
+
+class BusyRehashHasher:
+    """Verifies every password, but has no slot left for a new hash."""
+
+    def check(self, password, hashed):
+        return True
+
+    def needs_rehash(self, hashed):
+        return True
+
+    def hash(self, password):
+        raise HasherBusy('Password hashing queue is full')
+
+
+def test_busy_rehash_keeps_a_verified_login(monkeypatch):
+    from controllers.userController import UserController
+    database = FakeDatabase(lambda operation, params: [
+        Result(rows=[{'id': 7, 'email': 'a@example.com', 'password': '$2b$04$old'}])])
+    monkeypatch.setattr('controllers.userController.create_connection', database.create_connection)
+    controller = UserController()
+    controller.hasher = BusyRehashHasher()
+
+    app = Flask(__name__)
+    app.config['SECRET_KEY'] = 'x' * 32
+    with app.app_context():
+        response = controller.login({'email': 'a@example.com', 'password': 'secret'})
+
+    assert response['status'] == 200
+    assert response['user']['id'] == 7
+    # The stored hash was left alone
+    assert not [sql for sql, _ in database.statements if sql.startswith('UPDATE')]
@@ -0,0 +1,115 @@
+"""Metrics: sharded counters, histograms, the text format and per-route DB time."""
+import threading
+
+import pytest
+from flask import Flask
+
+from utils.metrics import Metrics, TimedCursor, instrument_flask, metrics, record_acquire
+
+
+def samples(text):
+    """{'name{labels}': value} of a rendered scrape, comments skipped."""
+    lines = [line for line in text.splitlines() if line and not line.startswith('#')]
+    return {line.rsplit(' ', 1)[0]: float(line.rsplit(' ', 1)[1]) for line in lines}
+
+
+@pytest.fixture
+def registry():
+    registry = Metrics()
+    registry.counter('jobs_total', 'Jobs')
+    registry.histogram('job_seconds', 'Job time', buckets=(0.1, 1.0))
+    return registry
+
+
+def test_counters_from_every_thread_are_summed(registry):
+    def work():
+        for _ in range(1000):
+            registry.inc('jobs_total', (('kind', 'wash'),))
+
+    threads = [threading.Thread(target=work) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    registry.inc('jobs_total', (('kind', 'dry'),), 2)
+
+    scraped = samples(registry.render())
+    assert scraped['jobs_total{kind="wash"}'] == 4000
+    assert scraped['jobs_total{kind="dry"}'] == 2
+
+
+def test_histogram_buckets_are_cumulative(registry):
+    for value in (0.05, 0.1, 0.5, 3):
+        registry.observe('job_seconds', value)
+
+    text = registry.render()
+    scraped = samples(text)
+    assert scraped['job_seconds_bucket{le="0.1"}'] == 2
+    assert scraped['job_seconds_bucket{le="1.0"}'] == 3
+    assert scraped['job_seconds_bucket{le="+Inf"}'] == 4
+    assert scraped['job_seconds_count'] == 4
+    assert scraped['job_seconds_sum'] == pytest.approx(3.65)
+    assert '# TYPE job_seconds histogram' in text
+
+
+def test_label_values_are_escaped(registry):
+    registry.inc('jobs_total', (('kind', 'say "hi"\n'),))
+
+    assert 'jobs_total{kind="say \\"hi\\"\\n"} 1' in registry.render()
+
+
+def test_collectors_run_on_scrape_and_a_failing_one_is_skipped(registry):
+    registry.collector(lambda: [('pool_idle', 'gauge', 'Idle connections', [((), 3)])])
+
+    @registry.collector
+    def broken():
+        raise RuntimeError('pool is gone')
+
+    text = registry.render()
+    assert samples(text)['pool_idle'] == 3
+    assert '# TYPE pool_idle gauge' in text
+
+
+class Cursor:
+    def execute(self, operation, params=None, multi=False):
+        if multi:
+            return iter(['first', 'second'])
+
+    def fetchall(self):
+        return [{'id': 1}]
+
+
+def test_requests_are_charged_their_db_work():
+    app = Flask(__name__)
+    instrument_flask(app)
+
+    @app.route('/metrics_test_orders')
+    def metrics_test_orders():
+        record_acquire(0.002)
+        cursor = TimedCursor(Cursor())
+        cursor.execute('SELECT 1')
+        cursor.fetchall()
+        assert list(cursor.execute('SELECT 1; SELECT 2', multi=True)) == ['first', 'second']
+        return 'ok'
+
+    @app.route('/metrics_test_ping')
+    def metrics_test_ping():
+        return 'pong'
+
+    client = app.test_client()
+    before = samples(metrics.render())
+    client.get('/metrics_test_orders')
+    client.get('/metrics_test_orders')
+    client.get('/metrics_test_ping')
+    after = samples(metrics.render())
+
+    def grew(key):
+        return after.get(key, 0) - before.get(key, 0)
+
+    orders = 'endpoint="metrics_test_orders"'
+    assert grew(f'http_requests_total{{{orders},method="GET",status="200"}}') == 2
+    assert grew(f'http_db_queries_total{{{orders}}}') == 4
+    assert grew(f'http_db_acquire_seconds_total{{{orders}}}') == pytest.approx(0.004)
+    assert grew(f'http_request_duration_seconds_count{{{orders}}}') == 2
+    # A route without DB work gets no DB series
+    assert 'http_db_queries_total{endpoint="metrics_test_ping"}' not in after
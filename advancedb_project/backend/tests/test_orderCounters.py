@@ -0,0 +1,120 @@
+"""Shop order tab counters, per process and shared through Redis."""
+import pytest
+
+from utils.fakeRedis import FakeRedis
+from utils.orderCounters import OrderCounters, RedisOrderCounters
+
+
+class Orders:
+    """status_counts() stand-in over a dict the test writes to."""
+
+    def __init__(self, **shops):
+        self.shops = {int(key[4:]): dict(counts) for key, counts in shops.items()}
+        self.loads = []
+
+    def __call__(self, shop_id=None):
+        self.loads.append(shop_id)
+        if shop_id is None:
+            return {key: dict(counts) for key, counts in self.shops.items()}
+        return {shop_id: dict(self.shops.get(shop_id, {}))}
+
+    def commit(self, shop_id, from_status, to_status):
+        counts = self.shops.setdefault(shop_id, {})
+        if from_status:
+            counts[from_status] -= 1
+        counts[to_status] = counts.get(to_status, 0) + 1
+
+
+def public(pending=0, processing=0, completed=0, cancelled=0):
+    return {'pending': pending, 'processing': processing,
+            'completed': completed, 'cancelled': cancelled}
+
+
+@pytest.fixture(params=['memory', 'redis'])
+def make_counters(request):
+    broker = FakeRedis()
+
+    def make(load, max_age=300):
+        if request.param == 'redis':
+            return RedisOrderCounters(broker, load, max_age=max_age)
+        return OrderCounters(load, max_age=max_age)
+    make.broker = broker
+    return make
+
+
+def test_seeded_counts_follow_adjustments(make_counters):
+    orders = Orders(shop1={'Pending': 2, 'Completed': 1})
+    counters = make_counters(orders)
+    counters.seed()
+
+    orders.commit(1, None, 'Pending')
+    counts, delta = counters.adjust(1, None, 'Pending')
+    assert (counts, delta) == (public(pending=3, completed=1), {'pending': 1})
+
+    orders.commit(1, 'Pending', 'Processing')
+    counts, delta = counters.adjust(1, 'Pending', 'Processing')
+    assert (counts, delta) == (public(pending=2, processing=1, completed=1),
+                               {'pending': -1, 'processing': 1})
+    assert counters.get(1) == public(pending=2, processing=1, completed=1)
+    assert orders.loads == [None]
+
+
+def test_an_unknown_shop_is_loaded_once_with_the_write_counted(make_counters):
+    orders = Orders()
+    counters = make_counters(orders)
+
+    # The order is committed before the adjustment runs
+    orders.commit(7, None, 'Pending')
+    counts, _ = counters.adjust(7, None, 'Pending')
+    assert counts == public(pending=1)
+
+    orders.commit(7, None, 'Pending')
+    assert counters.adjust(7, None, 'Pending')[0] == public(pending=2)
+    assert orders.loads == [7]
+
+
+def test_counts_never_go_negative(make_counters):
+    counters = make_counters(Orders(shop1={'Pending': 0}))
+    counters.seed()
+
+    assert counters.adjust(1, 'Pending', 'Cancelled')[0] == public(cancelled=1)
+
+
+def test_workers_share_one_count_per_shop():
+    broker = FakeRedis()
+    orders = Orders(shop1={'Pending': 1})
+    workers = [RedisOrderCounters(broker, orders) for _ in range(3)]
+    workers[0].seed()
+
+    pushed = []
+    for worker in workers:
+        orders.commit(1, None, 'Pending')
+        pushed.append(worker.adjust(1, None, 'Pending')[0]['pending'])
+
+    # Each worker pushes the next count, not its own idea of it
+    assert pushed == [2, 3, 4]
+    assert all(worker.get(1) == public(pending=4) for worker in workers)
+
+
+def test_a_later_seed_does_not_overwrite_adjusted_counts():
+    broker = FakeRedis()
+    orders = Orders(shop1={'Pending': 1})
+    first, second = RedisOrderCounters(broker, orders), RedisOrderCounters(broker, Orders(shop1={}))
+    first.seed()
+    first.adjust(1, None, 'Pending')
+
+    second.seed()
+
+    assert second.get(1) == public(pending=2)
+
+
+def test_expired_counts_are_reloaded():
+    broker = FakeRedis()
+    orders = Orders(shop1={'Pending': 1})
+    counters = RedisOrderCounters(broker, orders, max_age=60)
+    counters.seed()
+    orders.commit(1, None, 'Completed')  # e.g. written by hand
+
+    broker.delete(counters.prefix + '1')
+
+    assert counters.get(1) == public(pending=1, completed=1)
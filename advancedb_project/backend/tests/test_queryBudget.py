@@ -0,0 +1,36 @@
+import pytest
+
+from fakeDb import Result
+from utils.queryTracer import assert_max_queries
+
+
+def detail_batch(operation, params):
+    ids = params[:len(params) // 2]
+    return [
+        Result(rows=[{'id': i, 'shop_id': 1, 'status': 'Pending', 'kilo_amount': 3}
+                     for i in ids]),
+        Result(rows=[{'transaction_id': i, 'name': 'Shirt', 'quantity': 2} for i in ids]),
+    ]
+
+
+def test_batch_detail_read_is_one_statement(fake_db, transactions):
+    fake_db.handler = detail_batch
+
+    with assert_max_queries(1) as statements:
+        response = transactions.get_transactions([1, 2, 3])
+
+    assert response['status'] == 200
+    assert [t['id'] for t in response['data']] == [1, 2, 3]
+    assert [t['price_per_kilo'] for t in response['data']] == [40.0] * 3
+    # Recorded once the batch was consumed, with the rows of both result sets
+    assert len(statements) == 1
+    assert statements[0]['rows'] == 6
+
+
+def test_per_id_reads_exceed_the_budget(fake_db, transactions):
+    fake_db.handler = detail_batch
+
+    with pytest.raises(AssertionError, match='3 queries, expected at most 1'):
+        with assert_max_queries(1):
+            for transaction_id in (1, 2, 3):
+                transactions.get_transactions([transaction_id])
@@ -0,0 +1,113 @@
+"""shop_daily_stats transitions: the SET clause transition_sql generates is
+evaluated against Python rows and compared with a rebuild from scratch."""
+import re
+from types import SimpleNamespace
+
+import pytest
+
+from database.rollups import STATUS_COLUMNS, record_transition, transition_sql
+from fakeDb import FakeDatabase, Result
+
+LEGAL_MOVES = [
+    ('Pending', 'Processing'),
+    ('Processing', 'Completed'),
+    ('Pending', 'Cancelled'),
+    ('Processing', 'Cancelled'),
+]
+
+
+def to_python(sql):
+    sql = sql.replace('<>', '!=').replace('COALESCE(', 'coalesce(').replace('IF(', 'if_(')
+    sql = re.sub(r'(?<![!<>=])=(?!=)', '==', sql)
+    return '(' + sql.replace(' AND ', ' and ') + ')'
+
+
+def compile_transition():
+    """(assignments, where) of the transition statement as Python code."""
+    sql = transition_sql('from_status', 'transaction_id')
+    set_clause, where = sql.split('SET', 1)[1].split('WHERE')
+    assignments = {}
+    for column, expression in re.findall(r's\.(\w+) = (.*?)(?=,\s*s\.\w+ = |\Z)', set_clause.strip(), re.S):
+        assignments[column] = compile(to_python(expression.strip()), column, 'eval')
+    return assignments, compile(to_python(where.strip()), 'where', 'eval')
+
+
+def rebuild(orders):
+    """What python -m database.rollups writes for one shop-day."""
+    row = {column: sum(order.status == status for order in orders) for status, column in STATUS_COLUMNS}
+    live = [order for order in orders if order.status != 'Cancelled']
+    row['total_amount'] = sum(order.total_amount for order in live)
+    row['kilo_amount'] = sum(order.kilo_amount or 0 for order in live)
+    return row
+
+
+def apply_transition(stats, order, from_status):
+    assignments, where = compile_transition()
+    scope = {
+        's': SimpleNamespace(**stats), 't': order, 'from_status': from_status,
+        'transaction_id': order.id,
+        'if_': lambda condition, then, otherwise: then if condition else otherwise,
+        'coalesce': lambda value, default: default if value is None else value,
+    }
+    if not eval(where, scope):
+        return stats
+    return {column: eval(code, scope) for column, code in assignments.items()}
+
+
+def orders():
+    return [
+        SimpleNamespace(id=1, status='Pending', total_amount=150, kilo_amount=3),
+        SimpleNamespace(id=2, status='Processing', total_amount=90, kilo_amount=None),
+        SimpleNamespace(id=3, status='Completed', total_amount=200, kilo_amount=6),
+    ]
+
+
+def test_every_column_has_a_transition():
+    assignments, _ = compile_transition()
+    assert set(assignments) == {column for _, column in STATUS_COLUMNS} | {'total_amount', 'kilo_amount'}
+
+
+@pytest.mark.parametrize('kilo_amount', [4, None])
+@pytest.mark.parametrize('from_status, to_status', LEGAL_MOVES)
+def test_transition_matches_a_rebuild(from_status, to_status, kilo_amount):
+    day = orders()
+    moving = SimpleNamespace(id=4, status=from_status, total_amount=80, kilo_amount=kilo_amount)
+    day.append(moving)
+    stats = rebuild(day)
+
+    moving.status = to_status
+
+    assert apply_transition(stats, moving, from_status) == rebuild(day)
+
+
+def test_transition_to_the_same_status_changes_nothing():
+    day = orders()
+    stats = rebuild(day)
+
+    assert apply_transition(stats, day[0], 'Pending') == stats
+
+
+def test_a_whole_order_life_keeps_the_rollup_in_step():
+    day = orders()
+    moving = SimpleNamespace(id=4, status='Pending', total_amount=80, kilo_amount=2)
+    day.append(moving)
+    stats = rebuild(day)
+    for to_status in ('Processing', 'Completed', 'Cancelled'):
+        from_status, moving.status = moving.status, to_status
+        stats = apply_transition(stats, moving, from_status)
+
+    assert stats == rebuild(day)
+    assert stats['total_amount'] == 440
+
+
+def test_record_transition_passes_the_status_left():
+    database = FakeDatabase(lambda operation, params: [Result(rowcount=1)])
+    conn = database.create_connection()
+    cursor = conn.cursor()
+
+    record_transition(cursor, 7, 'Processing')
+
+    operation, params = database.statements[0]
+    assert params == {'id': 7, 'from_status': 'Processing'}
+    assert "%(from_status)s = 'Processing'" in operation
+    conn.close()
@@ -0,0 +1,105 @@
+"""ShopSearchIndex: prefix search, live updates and refreshes."""
+import pytest
+
+from utils.pagination import encode_cursor
+from utils.searchIndex import ShopSearchIndex
+
+SHOPS = [
+    {'id': 1, 'shop_name': 'Bubble Wash', 'street': 'Rizal St', 'barangay': 'San Roque'},
+    {'id': 2, 'shop_name': 'Fresh Fold', 'street': 'Mabini', 'barangay': 'Poblacion'},
+    {'id': 3, 'shop_name': 'Clean Corner', 'street': 'Rizal Ave', 'barangay': 'San Roque'},
+]
+SERVICES = [
+    {'id': 10, 'shop_id': 1, 'service_name': 'Dry Cleaning', 'price': 120},
+    {'id': 11, 'shop_id': 2, 'service_name': 'Wash and Fold', 'price': 60},
+]
+
+
+@pytest.fixture
+def index():
+    index = ShopSearchIndex(max_age=0)
+    index.rebuild(SHOPS, SERVICES)
+    return index
+
+
+def ids(result):
+    shops, _ = result
+    return [shop['id'] for shop in shops]
+
+
+def test_terms_are_prefixes_over_shop_fields_and_services(index):
+    assert ids(index.search(q='wash')) == [1, 2]
+    assert ids(index.search(q='riz')) == [1, 3]
+    assert ids(index.search(q='riz clean')) == [1, 3]
+    assert ids(index.search(service='dry')) == [1]
+    assert ids(index.search(barangay='san  ROQUE')) == [1, 3]
+
+
+def test_pages_follow_shop_ids(index):
+    shops, has_more = index.search(limit=2)
+    assert ([shop['id'] for shop in shops], has_more) == ([1, 2], True)
+    shops, has_more = index.search(after_id=2, limit=2)
+    assert ([shop['id'] for shop in shops], has_more) == ([3], False)
+
+
+def test_edited_shop_keeps_its_services(index):
+    index.add_shop({'id': 1, 'shop_name': 'Bubble Laundry', 'street': 'Rizal St',
+                    'barangay': 'Poblacion'})
+
+    assert ids(index.search(service='dry')) == [1]
+    assert ids(index.search(q='laundry')) == [1]
+    assert ids(index.search(q='wash')) == [2]
+    assert ids(index.search(barangay='san roque')) == [3]
+    shop = index.search(q='laundry')[0][0]
+    assert [service['name'] for service in shop['services']] == ['Dry Cleaning']
+
+    index.remove_service(10)
+    assert ids(index.search(service='dry')) == []
+
+
+def test_service_changes(index):
+    index.add_service(3, 12, 'Steam Pressing', 80)
+    index.update_service(11, 'Folding only', 50)
+
+    assert ids(index.search(service='steam')) == [3]
+    assert ids(index.search(q='wash')) == [1]
+    assert ids(index.search(service='fold')) == [2]
+
+
+def test_removed_shop_is_gone_with_its_services(index):
+    index.remove_shop(2)
+
+    assert ids(index.search()) == [1, 3]
+    assert ids(index.search(q='fold')) == []
+
+
+def test_failed_refresh_keeps_the_old_index():
+    index = ShopSearchIndex(max_age=0.001)
+    index.ensure_loaded(lambda: (SHOPS, SERVICES))
+    index.loaded_at -= 1
+
+    def broken():
+        raise RuntimeError('database down')
+    index.ensure_loaded(broken)
+
+    assert ids(index.search(q='wash')) == [1, 2]
+
+
+def test_first_load_failure_is_raised():
+    def broken():
+        raise RuntimeError('database down')
+
+    with pytest.raises(RuntimeError):
+        ShopSearchIndex().ensure_loaded(broken)
+
+
+@pytest.mark.parametrize('cursor', [
+    'not-a-cursor',
+    encode_cursor([2]),
+    encode_cursor('2'),
+    encode_cursor(2, 3),
+])
+def test_search_rejects_bad_cursors(cursor):
+    from controllers.shopController import ShopController
+
+    assert ShopController().search_shops({'cursor': cursor})['status'] == 400
@@ -0,0 +1,97 @@
+"""Row serialization: one set of formats, whichever path a row takes."""
+import json
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+
+import pytest
+from flask import Flask, jsonify
+from mysql.connector import FieldType
+
+from utils.serialization import (RowJSONEncoder, field_converter, json_default,
+                                 row_converter)
+
+ROW = {
+    'id': 7,
+    'total_amount': Decimal('350.50'),
+    'created_at': datetime(2024, 5, 1, 8, 30, 5, 123456),
+    'pickup_date': date(2024, 5, 2),
+    'opening_time': timedelta(hours=8, minutes=5),
+    'note': None,
+}
+EXPECTED = {
+    'id': 7,
+    'total_amount': 350.5,
+    'created_at': '2024-05-01 08:30:05',
+    'pickup_date': '2024-05-02',
+    'opening_time': '08:05:00',
+    'note': None,
+}
+DESCRIPTION = [
+    ('id', FieldType.LONG),
+    ('total_amount', FieldType.NEWDECIMAL),
+    ('created_at', FieldType.DATETIME),
+    ('pickup_date', FieldType.DATE),
+    ('opening_time', FieldType.TIME),
+    ('note', FieldType.VAR_STRING),
+]
+
+
+class Stamp(datetime):
+    pass
+
+
+@pytest.mark.parametrize('value, encoded', [
+    (Decimal('1.10'), 1.1),
+    (datetime(2024, 1, 2, 3, 4, 5), '2024-01-02 03:04:05'),
+    (Stamp(2024, 1, 2, 3, 4, 5), '2024-01-02 03:04:05'),
+    (date(2024, 1, 2), '2024-01-02'),
+    (time(3, 4, 5), '03:04:05'),
+    (timedelta(hours=26, seconds=7), '26:00:07'),
+    (-timedelta(minutes=90), '-01:30:00'),
+])
+def test_json_default(value, encoded):
+    assert json_default(value) == encoded
+
+
+def test_json_default_rejects_other_types():
+    with pytest.raises(TypeError):
+        json_default(object())
+
+
+@pytest.mark.parametrize('use_orjson', [False, True])
+def test_jsonify_writes_rows_as_they_come(monkeypatch, use_orjson):
+    monkeypatch.setattr(RowJSONEncoder, 'use_orjson', use_orjson)
+    app = Flask(__name__)
+    app.json_encoder = RowJSONEncoder
+
+    with app.app_context():
+        body = jsonify({'transactions': [dict(ROW)], 'count': 1}).get_data(as_text=True)
+
+    assert json.loads(body) == {'transactions': [EXPECTED], 'count': 1}
+
+
+def test_row_converter_uses_the_description():
+    convert = row_converter(DESCRIPTION)
+
+    assert convert(dict(ROW)) == EXPECTED
+
+
+def test_row_converter_overrides():
+    convert = row_converter(DESCRIPTION, overrides={'total_amount': str})
+
+    assert convert(dict(ROW))['total_amount'] == '350.50'
+
+
+def test_row_converter_without_typed_columns_is_identity():
+    convert = row_converter([('id', FieldType.LONG)])
+    row = {'id': 1}
+
+    assert convert(row) is row
+
+
+def test_field_converter_touches_only_its_fields():
+    convert = field_converter(total_amount=str, missing=str)
+
+    row = convert({'total_amount': Decimal('350.00'), 'id': 1, 'note': None})
+
+    assert row == {'total_amount': '350.00', 'id': 1, 'note': None}
@@ -0,0 +1,97 @@
+"""ShopSpatialIndex: radius queries over the grid, with live moves."""
+import pytest
+
+from utils.spatialIndex import ShopSpatialIndex, haversine_km
+
+CENTER = (14.5995, 120.9842)
+SHOPS = [
+    {'id': 1, 'shop_name': 'Next Door', 'latitude': 14.6000, 'longitude': 120.9842},
+    {'id': 2, 'shop_name': 'Down The Road', 'latitude': 14.6100, 'longitude': 120.9842},
+    {'id': 3, 'shop_name': 'Across Town', 'latitude': 14.6995, 'longitude': 120.9842},
+    {'id': 4, 'shop_name': 'No Pin', 'latitude': None, 'longitude': None},
+    # Just across a cell edge, west of the centre
+    {'id': 5, 'shop_name': 'West Side', 'latitude': 14.5995, 'longitude': 120.9790},
+]
+
+
+@pytest.fixture
+def index():
+    index = ShopSpatialIndex(max_age=0)
+    index.rebuild(SHOPS)
+    return index
+
+
+def ids(results):
+    return [shop['id'] for shop in results]
+
+
+def brute_force(lat, lng, radius_km, shops):
+    hits = sorted(
+        (haversine_km(lat, lng, shop['latitude'], shop['longitude']), shop['id'])
+        for shop in shops if shop['latitude'] is not None
+    )
+    return [shop_id for distance, shop_id in hits if distance <= radius_km]
+
+
+def test_haversine_of_one_degree_of_latitude():
+    assert haversine_km(0, 0, 1, 0) == pytest.approx(111.2, abs=0.1)
+
+
+@pytest.mark.parametrize('radius_km', [0.01, 0.1, 0.7, 1.5, 5, 20])
+def test_matches_a_scan_of_every_shop(index, radius_km):
+    assert ids(index.nearby(*CENTER, radius_km)) == brute_force(*CENTER, radius_km, SHOPS)
+
+
+def test_results_carry_the_distance_closest_first(index):
+    first, second = index.nearby(*CENTER, 1.5)[:2]
+
+    assert (first['id'], first['distance']) == (1, '0.1 km')
+    assert first['distance_km'] < second['distance_km']
+    assert 'distance_km' not in SHOPS[0]
+
+
+def test_limit_keeps_the_closest(index):
+    assert ids(index.nearby(*CENTER, 20, limit=2)) == [1, 5]
+
+
+def test_a_moved_shop_leaves_its_old_cell(index):
+    index.put({'id': 1, 'shop_name': 'Next Door', 'latitude': 14.6995, 'longitude': 120.9842})
+
+    assert 1 not in ids(index.nearby(*CENTER, 1.5))
+    assert sorted(ids(index.nearby(14.6995, 120.9842, 0.1))) == [1, 3]
+
+
+def test_removed_and_unpinned_shops_are_not_found(index):
+    index.remove(1)
+    index.put({'id': 2, 'shop_name': 'Down The Road', 'latitude': None, 'longitude': None})
+
+    assert ids(index.nearby(*CENTER, 20)) == [5, 3]
+
+
+def test_put_before_the_first_load_is_ignored():
+    index = ShopSpatialIndex()
+    index.put(SHOPS[0])
+
+    assert index.nearby(*CENTER, 5) == []
+    index.ensure_loaded(lambda: SHOPS[:1])
+    assert ids(index.nearby(*CENTER, 5)) == [1]
+
+
+def test_a_failed_refresh_keeps_the_old_index():
+    calls = []
+
+    def loader():
+        calls.append(1)
+        if len(calls) > 1:
+            raise RuntimeError('Database connection failed')
+        return SHOPS
+
+    index = ShopSpatialIndex(max_age=300)
+    index.ensure_loaded(loader)
+    index.loaded_at -= 301
+
+    index.ensure_loaded(loader)
+    index.ensure_loaded(loader)
+
+    assert len(calls) == 2  # the failure counts as a refresh; no retry storm
+    assert ids(index.nearby(*CENTER, 1.5)) == [1, 5, 2]
@@ -0,0 +1,158 @@
+"""update_transaction_status and cancel_transaction against a one-table
+model that applies their WHERE guards the way MySQL would."""
+import pytest
+
+from fakeDb import Result
+
+
+class TransactionsTable:
+    def __init__(self, **rows):
+        self.rows = {int(key[1:]): dict(row, user_id=5, shop_id=1) for key, row in rows.items()}
+        self.transitions = []
+
+    def status_batch(self, operation, params):
+        row = self.rows.get(params['id'])
+        sources = [value for key, value in params.items() if key.startswith('from_')]
+        matched = (
+            row is not None
+            and f"status IN ({', '.join(f'%({key})s' for key in params if key.startswith('from_'))})" in operation
+            and row['status'] in sources
+            and ('version = %(expected_version)s' not in operation
+                 or row['version'] == params['expected_version'])
+        )
+        captured = {'user_id': None, 'shop_id': None, 'version': None, 'previous_status': None}
+        if matched:
+            captured = {'user_id': row['user_id'], 'shop_id': row['shop_id'],
+                        'version': row['version'] + 1, 'previous_status': row['status']}
+            row['status'] = params['status']
+            row['version'] += 1
+            # The rollup statement is skipped when @tx_version stayed NULL
+            assert 'AND @tx_version IS NOT NULL' in operation
+            self.transitions.append((params['id'], captured['previous_status'], row['status']))
+        return [Result(), Result(rowcount=int(matched)), Result(rowcount=int(matched)),
+                Result(rows=[captured])]
+
+    def handler(self, operation, params):
+        if 'SET @tx_from_status' in operation:
+            return self.status_batch(operation, params)
+        if operation.startswith('SELECT status, version'):
+            row = self.rows.get(params[0])
+            return [Result(rows=[{'status': row['status'], 'version': row['version']}] if row else [])]
+        if 'FOR UPDATE' in operation:
+            row = self.rows.get(params[0])
+            return [Result(rows=[{'id': params[0], 'status': row['status'], 'shop_id': row['shop_id'],
+                                  'version': row['version']}] if row else [])]
+        if operation.lstrip().startswith('UPDATE transactions'):
+            notes, transaction_id, status, version = params
+            row = self.rows[transaction_id]
+            matched = row['status'] == status and row['version'] == version
+            if matched:
+                row.update(status='Cancelled', version=version + 1)
+            return [Result(rowcount=int(matched))]
+        if operation.lstrip().startswith('UPDATE shop_daily_stats'):
+            self.transitions.append((params['id'], params['from_status'], 'Cancelled'))
+            return [Result(rowcount=1)]
+        raise AssertionError(f'Unexpected statement: {operation}')
+
+
+@pytest.fixture
+def table(fake_db):
+    table = TransactionsTable(t1={'status': 'Pending', 'version': 0})
+    fake_db.handler = table.handler
+    return table
+
+
+def test_each_move_bumps_the_version(fake_db, transactions, table):
+    processing = transactions.update_transaction_status(1, 'processing')
+    completed = transactions.update_transaction_status(1, 'Completed', expected_version=1)
+
+    assert (processing['status'], processing['previous_status'], processing['version']) == (200, 'Pending', 1)
+    assert (completed['status'], completed['previous_status'], completed['version']) == (200, 'Processing', 2)
+    assert table.transitions == [(1, 'Pending', 'Processing'), (1, 'Processing', 'Completed')]
+    assert fake_db.commits == 2
+
+
+def test_racing_devices_have_one_winner(fake_db, transactions, table):
+    first = transactions.update_transaction_status(1, 'Cancelled', expected_version=0)
+    second = transactions.update_transaction_status(1, 'Processing', expected_version=0)
+
+    assert first['status'] == 200
+    assert second['status'] == 409
+    assert (second['transaction_status'], second['version']) == ('Cancelled', 1)
+    assert table.transitions == [(1, 'Pending', 'Cancelled')]
+
+
+def test_stale_version_is_refused(transactions, table):
+    response = transactions.update_transaction_status(1, 'Processing', expected_version=3)
+
+    assert response['status'] == 409
+    assert table.rows[1] == {'status': 'Pending', 'version': 0, 'user_id': 5, 'shop_id': 1}
+    assert table.transitions == []
+
+
+@pytest.mark.parametrize('status, target', [
+    ('Pending', 'Completed'),
+    ('Completed', 'Processing'),
+    ('Cancelled', 'Processing'),
+])
+def test_illegal_moves_are_refused(transactions, table, status, target):
+    table.rows[1]['status'] = status
+
+    response = transactions.update_transaction_status(1, target)
+
+    assert response['status'] == 409
+    assert response['transaction_status'] == status
+    assert table.transitions == []
+
+
+@pytest.mark.parametrize('status', ['Pending', 'Unknown', None])
+def test_unreachable_targets_never_touch_the_database(fake_db, transactions, status):
+    assert transactions.update_transaction_status(1, status)['status'] == 400
+    assert fake_db.statements == []
+
+
+def test_missing_transaction_is_not_found(transactions, table):
+    assert transactions.update_transaction_status(9, 'Processing')['status'] == 404
+
+
+@pytest.mark.parametrize('status', ['Pending', 'Processing'])
+def test_cancel_records_the_status_it_left(fake_db, transactions, table, status):
+    table.rows[1].update(status=status, version=2)
+
+    response = transactions.cancel_transaction(1, reason='Damaged')
+    again = transactions.cancel_transaction(1, reason='Damaged')
+
+    assert (response['status'], response['previous_status'], response['version']) == (200, status, 3)
+    assert (again['status'], again['message']) == (200, 'Transaction already cancelled')
+    assert table.transitions == [(1, status, 'Cancelled')]
+
+
+def test_completed_orders_cannot_be_cancelled(fake_db, transactions, table):
+    # Same state machine as update_transaction_status
+    table.rows[1].update(status='Completed', version=2)
+
+    response = transactions.cancel_transaction(1, reason='Damaged')
+
+    assert (response['status'], response['transaction_status'], response['version']) == (409, 'Completed', 2)
+    assert transactions.update_transaction_status(1, 'Cancelled')['status'] == 409
+    assert table.rows[1]['status'] == 'Completed'
+    assert table.transitions == []
+    assert fake_db.commits == 0
+
+
+def test_cancel_losing_a_race_records_nothing(fake_db, transactions, table):
+    read = table.handler
+
+    def concurrent_edit(operation, params):
+        results = read(operation, params)
+        if 'FOR UPDATE' in operation:
+            # Another writer moves the row between the read and the UPDATE
+            table.rows[1].update(status='Processing', version=1)
+        return results
+    fake_db.handler = concurrent_edit
+
+    response = transactions.cancel_transaction(1, reason='Changed mind')
+
+    assert response['status'] == 409
+    assert table.transitions == []
+    assert fake_db.commits == 0
@@ -0,0 +1,98 @@
+"""VerifiedTokenCache: cached payloads never outlive what PyJWT would accept."""
+import time
+
+import jwt
+import pytest
+
+from utils.tokenCache import VerifiedTokenCache
+
+KEY = 'k' * 32
+ALGORITHMS = ['HS256']
+
+
+def token(key=KEY, **claims):
+    claims.setdefault('user_id', 1)
+    claims.setdefault('exp', int(time.time()) + 3600)
+    return jwt.encode(claims, key, algorithm='HS256')
+
+
+def test_a_verified_token_is_served_from_the_cache():
+    cache = VerifiedTokenCache()
+    value = token()
+
+    assert cache.decode(value, KEY, ALGORITHMS)['user_id'] == 1
+    assert cache.decode(value, KEY, ALGORITHMS)['user_id'] == 1
+    assert cache.stats()['hits'] == 1
+    assert cache.stats()['misses'] == 1
+
+
+def test_callers_get_a_copy():
+    cache = VerifiedTokenCache()
+    value = token()
+
+    cache.decode(value, KEY, ALGORITHMS)['user_id'] = 99
+
+    assert cache.decode(value, KEY, ALGORITHMS)['user_id'] == 1
+
+
+def test_a_cached_token_goes_back_to_pyjwt_after_its_exp(monkeypatch):
+    cache = VerifiedTokenCache()
+    value = token(exp=int(time.time()) + 60)
+    cache.decode(value, KEY, ALGORITHMS)
+
+    # Only the cache's clock moves on (PyJWT reads datetime), so PyJWT
+    # accepts the token again; what matters is that it was asked
+    later = time.time() + 120
+    monkeypatch.setattr(time, 'time', lambda: later)
+    cache.decode(value, KEY, ALGORITHMS)
+
+    assert cache.stats()['hits'] == 0
+    assert cache.stats()['misses'] == 2
+
+
+def test_an_expired_token_is_rejected():
+    cache = VerifiedTokenCache()
+
+    with pytest.raises(jwt.ExpiredSignatureError):
+        cache.decode(token(exp=int(time.time()) - 10), KEY, ALGORITHMS)
+    assert cache.stats()['size'] == 0
+
+
+def test_a_bad_signature_is_never_cached():
+    cache = VerifiedTokenCache()
+    forged = token(key='f' * 32)
+
+    for _ in range(2):
+        with pytest.raises(jwt.InvalidSignatureError):
+            cache.decode(forged, KEY, ALGORITHMS)
+    assert cache.stats()['size'] == 0
+
+
+def test_a_hit_needs_the_same_key():
+    cache = VerifiedTokenCache()
+    value = token()
+    cache.decode(value, KEY, ALGORITHMS)
+
+    with pytest.raises(jwt.InvalidSignatureError):
+        cache.decode(value, 'r' * 32, ALGORITHMS)
+
+
+def test_a_token_that_is_not_valid_yet_is_not_cached():
+    cache = VerifiedTokenCache()
+    value = token(nbf=int(time.time()) + 60)
+
+    for _ in range(2):
+        with pytest.raises(jwt.ImmatureSignatureError):
+            cache.decode(value, KEY, ALGORITHMS)
+    assert cache.stats()['size'] == 0
+
+
+def test_the_cache_is_bounded():
+    cache = VerifiedTokenCache(max_entries=2)
+    first, second, third = (token(user_id=i) for i in (1, 2, 3))
+    for value in (first, second, third):
+        cache.decode(value, KEY, ALGORITHMS)
+
+    assert cache.stats()['size'] == 2
+    cache.decode(first, KEY, ALGORITHMS)
+    assert cache.stats()['hits'] == 0
@@ -0,0 +1,48 @@
+from fakeDb import Result
+
+
+def test_details_without_kilo_amount_have_no_rate(fake_db, transactions):
+    fake_db.handler = lambda operation, params: [
+        Result(rows=[
+            {'id': 1, 'shop_id': 1, 'status': 'Pending', 'kilo_amount': None},
+            {'id': 2, 'shop_id': 1, 'status': 'Pending', 'kilo_amount': 7},
+        ]),
+        Result(rows=[]),
+    ]
+
+    response = transactions.get_transactions([1, 2])
+
+    assert response['status'] == 200
+    assert [t['price_per_kilo'] for t in response['data']] == [None, 35.0]
+
+
+def detail_rows(statuses):
+    def handler(operation, params):
+        ids = params[:len(params) // 2]
+        return [
+            Result(rows=[{'id': i, 'shop_id': 1, 'status': statuses[i], 'kilo_amount': 3} for i in ids]),
+            Result(rows=[{'transaction_id': i, 'name': 'Shirt', 'quantity': 1} for i in ids]),
+        ]
+    return handler
+
+
+def test_only_details_no_transition_leaves_are_cached(fake_db, transactions):
+    statuses = {1: 'Pending', 2: 'Processing', 3: 'Completed', 4: 'Cancelled'}
+    fake_db.handler = detail_rows(statuses)
+    transactions.get_transactions([1, 2, 3, 4])
+
+    statuses.update({1: 'Cancelled', 2: 'Completed'})
+    fake_db.statements.clear()
+    response = transactions.get_transactions([1, 2, 3, 4])
+
+    assert [t['status'] for t in response['data']] == ['Cancelled', 'Completed', 'Completed', 'Cancelled']
+    # Only the two that could still change were read again
+    assert fake_db.statements[0][1] == (1, 2, 1, 2)
+
+
+def test_cached_statuses_are_the_ones_no_transition_leaves():
+    from controllers.transactionController import STATUS_TRANSITIONS, TERMINAL_STATUSES
+
+    assert TERMINAL_STATUSES == ('Completed', 'Cancelled')
+    assert not any(status in sources for status in TERMINAL_STATUSES
+                   for sources in STATUS_TRANSITIONS.values())
@@ -0,0 +1,232 @@
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from utils.serialization import json_default
+
+_MISSING = object()
+
+
+class LRUCache:
+    """Thread-safe in-process cache with a size bound and per-entry TTL."""
+
+    def __init__(self, max_entries=1024, ttl=60):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._data = OrderedDict()  # key -> (expires_at, value)
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._data.get(key, _MISSING)
+            if entry is _MISSING:
+                self.misses += 1
+                return default
+            expires_at, value = entry
+            if expires_at is not None and expires_at <= time.monotonic():
+                del self._data[key]
+                self.expirations += 1
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key, value, ttl=None):
+        ttl = self.ttl if ttl is None else ttl
+        expires_at = time.monotonic() + ttl if ttl else None
+        with self._lock:
+            self._data[key] = (expires_at, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def delete(self, *keys):
+        with self._lock:
+            for key in keys:
+                self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def stats(self):
+        with self._lock:
+            return {
+                'backend': 'memory',
+                'size': len(self._data),
+                'max_entries': self.max_entries,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+            }
+
+
+class RedisCache:
+    """Cache backend on top of any redis-py compatible client.
+
+    Values are stored as JSON, so only JSON-ready data should be cached.
+    Capacity eviction is Redis' own business (maxmemory-policy), hence the
+    evictions counter stays at zero here.
+    """
+
+    def __init__(self, client, ttl=60, prefix='labaride:'):
+        self.client = client
+        self.ttl = ttl
+        self.prefix = prefix
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+
+    def get(self, key, default=None):
+        try:
+            raw = self.client.get(self.prefix + key)
+        except Exception as e:
+            # A cache outage must degrade to a miss, never to a 500
+            print(f"Cache get failed for {key}: {e}")
+            raw = None
+            with self._lock:
+                self.errors += 1
+        with self._lock:
+            if raw is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        if raw is None:
+            return default
+        return json.loads(raw)
+
+    def set(self, key, value, ttl=None):
+        ttl = self.ttl if ttl is None else ttl
+        try:
+            self.client.set(self.prefix + key,
+                            json.dumps(value, default=json_default),
+                            ex=ttl or None)
+        except Exception as e:
+            print(f"Cache set failed for {key}: {e}")
+            with self._lock:
+                self.errors += 1
+
+    def delete(self, *keys):
+        if not keys:
+            return
+        try:
+            self.client.delete(*(self.prefix + key for key in keys))
+        except Exception as e:
+            print(f"Cache delete failed for {keys}: {e}")
+            with self._lock:
+                self.errors += 1
+
+    def stats(self):
+        with self._lock:
+            return {
+                'backend': 'redis',
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': 0,
+                'errors': self.errors,
+            }
+
+
+class ShopCatalogCache:
+    """Read-through cache for per-shop catalog reads.
+
+    Keys are shop:<id>:<section>. Every section of a shop is dropped
+    together whenever one of its catalog tables is written to.
+    """
+
+    SECTIONS = ('shop', 'services', 'kilo_prices', 'clothing_types',
+                'household_items', 'full')
+
+    def __init__(self, backend):
+        self.backend = backend
+        self._lock = threading.Lock()
+        self._generations = {}  # shop_id -> bumped on every invalidation
+
+    @staticmethod
+    def key(shop_id, section):
+        return f"shop:{shop_id}:{section}"
+
+    def get_or_load(self, shop_id, section, loader):
+        """Return the cached section, or loader()'s result on a miss.
+
+        loader returns None when there is nothing to cache (e.g. the shop
+        does not exist or the query failed); that result is not stored.
+        """
+        key = self.key(shop_id, section)
+        value = self.backend.get(key, _MISSING)
+        if value is not _MISSING:
+            return value
+        with self._lock:
+            generation = self._generations.get(shop_id, 0)
+        value = loader()
+        with self._lock:
+            # Skip the fill if a write invalidated the shop mid-load,
+            # otherwise the pre-write rows would be cached until the TTL
+            stale = self._generations.get(shop_id, 0) != generation
+        if value is not None and not stale:
+            self.backend.set(key, value)
+        return value
+
+    def invalidate_shop(self, shop_id):
+        with self._lock:
+            self._generations[shop_id] = self._generations.get(shop_id, 0) + 1
+        self.backend.delete(*(self.key(shop_id, section) for section in self.SECTIONS))
+
+    def stats(self):
+        return self.backend.stats()
+
+
+def cache_backend_from_env():
+    ttl = float(os.getenv('CACHE_TTL', '60'))
+    backend = os.getenv('CACHE_BACKEND', 'memory').lower()
+    if backend == 'fakeredis':
+        # Exercises the Redis code path without a server
+        from utils.fakeRedis import FakeRedis
+        return RedisCache(FakeRedis(), ttl=ttl)
+    if backend == 'redis':
+        try:
+            import redis
+        except ImportError:
+            print("CACHE_BACKEND=redis but the redis package is not installed; "
+                  "falling back to the in-process cache")
+        else:
+            client = redis.Redis.from_url(os.getenv('REDIS_URL', 'redis://localhost:6379/0'))
+            return RedisCache(client, ttl=ttl)
+    return LRUCache(max_entries=int(os.getenv('CACHE_MAX_ENTRIES', '1024')), ttl=ttl)
+
+
+def shared_redis_from_env(setting):
+    """Redis client for state every worker process must see, or None to
+    keep it in process.
+
+    The setting (memory, redis or fakeredis) chooses; left unset, Redis is
+    used with EVENT_BUS=redis (which several workers require) or as soon as
+    GUNICORN_WORKERS is above 1, since per-process state is only correct
+    with a single worker.
+    """
+    shared = (os.getenv('EVENT_BUS', 'memory').lower() == 'redis'
+              or int(os.getenv('GUNICORN_WORKERS', '1')) > 1)
+    default = 'redis' if shared else 'memory'
+    backend = os.getenv(setting, default).lower()
+    if backend == 'fakeredis':
+        from utils.fakeRedis import FakeRedis
+        return FakeRedis()
+    if backend == 'redis':
+        try:
+            import redis
+        except ImportError:
+            print(f"{setting}=redis but the redis package is not installed; "
+                  "falling back to per-process state, which workers do not share")
+            return None
+        return redis.Redis.from_url(os.getenv('REDIS_URL', 'redis://localhost:6379/0'))
+    return None
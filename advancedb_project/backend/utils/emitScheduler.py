@@ -0,0 +1,100 @@
+import heapq
+import os
+import threading
+import time
+
+# Events a later one of the same name and transaction_id fully replaces
+SUPERSEDABLE_EVENTS = ('status_update',)
+
+
+class EmitScheduler:
+    """Coalesces room events over a short window into one `updates` frame.
+
+    The first event for a room opens a window of window_ms; everything sent
+    to that room before it closes goes out as a single
+    updates {'events': [{'event': ..., 'data': ...}, ...]} frame. A window
+    that only caught one event emits it under its own name, as before.
+
+    A status_update replaces a pending status_update for the same
+    transaction_id and moves to the end of the frame, so the events of a
+    transaction always arrive in the order they were sent. window_ms=0
+    turns coalescing off and emits immediately.
+    """
+
+    def __init__(self, emit, window_ms=50):
+        self.emit = emit
+        self.window = window_ms / 1000.0
+        self._cond = threading.Condition()
+        self._pending = {}   # room -> [(event, data)]
+        self._deadlines = []  # heap of (flush_at, room)
+        self._thread = None
+        self.frames = 0
+        self.events = 0
+        self.superseded = 0
+
+    def send(self, event, data, room):
+        if self.window <= 0:
+            self.emit(event, data, room)
+            return
+        with self._cond:
+            self.events += 1
+            pending = self._pending.get(room)
+            if pending is None:
+                pending = self._pending[room] = []
+                heapq.heappush(self._deadlines, (time.monotonic() + self.window, room))
+                self._ensure_thread()
+                self._cond.notify()
+            if event in SUPERSEDABLE_EVENTS and isinstance(data, dict) and 'transaction_id' in data:
+                key = str(data['transaction_id'])
+                for i, (queued_event, queued_data) in enumerate(pending):
+                    if queued_event == event and str(queued_data.get('transaction_id')) == key:
+                        del pending[i]
+                        self.superseded += 1
+                        break
+            pending.append((event, data))
+
+    def _ensure_thread(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name='emit-scheduler', daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._deadlines:
+                    self._cond.wait()
+                flush_at, room = self._deadlines[0]
+                delay = flush_at - time.monotonic()
+                if delay > 0:
+                    self._cond.wait(delay)
+                    continue
+                heapq.heappop(self._deadlines)
+                pending = self._pending.pop(room, [])
+                self.frames += 1
+            self._flush(room, pending)
+
+    def _flush(self, room, pending):
+        try:
+            if len(pending) == 1:
+                event, data = pending[0]
+                self.emit(event, data, room)
+            elif pending:
+                self.emit('updates', {
+                    'events': [{'event': event, 'data': data} for event, data in pending]
+                }, room)
+        except Exception as e:
+            print(f"Emit to {room} failed: {e}")
+
+    def stats(self):
+        with self._cond:
+            return {
+                'window_ms': self.window * 1000,
+                'events': self.events,
+                'frames': self.frames,
+                'superseded': self.superseded,
+                'pending_rooms': len(self._pending),
+            }
+
+
+def emit_scheduler_from_env(emit):
+    return EmitScheduler(emit, window_ms=float(os.getenv('EMIT_COALESCE_MS', '50')))
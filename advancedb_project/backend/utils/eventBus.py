@@ -0,0 +1,227 @@
+import json
+import os
+import threading
+import time
+import uuid
+
+
+class EventStats:
+    """Counters shared by the event bus backends."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.published = 0
+        self.delivered = 0
+        self.dropped = 0
+        self.latency_total_ms = 0.0
+        self.latency_max_ms = 0.0
+
+    def count(self, field, amount=1):
+        with self._lock:
+            setattr(self, field, getattr(self, field) + amount)
+
+    def record_delivery(self, latency_ms):
+        with self._lock:
+            self.delivered += 1
+            self.latency_total_ms += latency_ms
+            self.latency_max_ms = max(self.latency_max_ms, latency_ms)
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                'published': self.published,
+                'delivered': self.delivered,
+                'dropped': self.dropped,
+                'latency_avg_ms': round(self.latency_total_ms / self.delivered, 3) if self.delivered else 0.0,
+                'latency_max_ms': round(self.latency_max_ms, 3),
+            }
+
+
+class LocalEventBus:
+    """Single-process bus: publish() hands the event straight to deliver."""
+
+    backend = 'memory'
+
+    def __init__(self, deliver):
+        self.deliver = deliver
+        self.counters = EventStats()
+        self._seq_lock = threading.Lock()
+        self._seqs = {}  # room -> last sequence number handed out
+
+    def publish_sequenced(self, event, data, room):
+        """publish() with data['seq'] set to the room's next sequence number.
+
+        Numbering and delivery happen under one lock, so the room's events
+        are delivered in seq order.
+        """
+        with self._seq_lock:
+            seq = self._seqs.get(room, 0) + 1
+            self._seqs[room] = seq
+            self.publish(event, {**data, 'seq': seq}, room)
+
+    def current_seq(self, room):
+        with self._seq_lock:
+            return self._seqs.get(room, 0)
+
+    def publish(self, event, data, room):
+        self.counters.count('published')
+        start = time.monotonic()
+        try:
+            self.deliver(event, data, room)
+        except Exception as e:
+            print(f"Event {event} to {room} dropped: {e}")
+            self.counters.count('dropped')
+            return
+        self.counters.record_delivery((time.monotonic() - start) * 1000)
+
+    def start(self):
+        pass
+
+    def stats(self):
+        return {'backend': self.backend, **self.counters.snapshot()}
+
+    def close(self):
+        pass
+
+
+# Sequenced events: Redis runs a script atomically, so INCR and PUBLISH
+# here cannot interleave with another node's. The seq goes out in front of
+# the envelope ("<seq>|<json>"); listeners put it into the event's data.
+PUBLISH_SEQUENCED = """
+local seq = redis.call('INCR', KEYS[1])
+redis.call('PUBLISH', ARGV[1], seq .. '|' .. ARGV[2])
+return seq
+"""
+
+
+class RedisEventBus:
+    """Fans room events out to every process through a Redis channel.
+
+    publish() sends the event to the broker once; each process, the sender
+    included, runs a listener thread that receives it and calls deliver
+    for its own locally connected clients. The channel is subscribed on
+    construction, but nothing is delivered until start(): messages that
+    arrive while the app is still wiring up wait in the subscription. Latency is measured from the
+    sender's clock to delivery on the receiving node, so it includes
+    clock skew between hosts.
+    """
+
+    backend = 'redis'
+
+    def __init__(self, client, deliver, channel='labaride:events', poll_timeout=1.0):
+        self.client = client
+        self.deliver = deliver
+        self.channel = channel
+        self.seq_prefix = channel + ':seq:'
+        self.poll_timeout = poll_timeout
+        self.node_id = uuid.uuid4().hex
+        self.counters = EventStats()
+        self._stop = threading.Event()
+        self._publish_sequenced = client.register_script(PUBLISH_SEQUENCED)
+        self._pubsub = client.pubsub()
+        self._pubsub.subscribe(channel)
+        self._thread = threading.Thread(target=self._listen, name='event-bus', daemon=True)
+
+    def start(self):
+        if not self._thread.is_alive():
+            self._thread.start()
+
+    def current_seq(self, room):
+        try:
+            return int(self.client.get(self.seq_prefix + room) or 0)
+        except Exception as e:
+            print(f"Sequence for {room} unavailable: {e}")
+            return None
+
+    @staticmethod
+    def _envelope(event, data, room):
+        return json.dumps({
+            'event': event,
+            'data': data,
+            'room': room,
+            'sent_at': time.time(),
+        }, default=str)
+
+    def publish(self, event, data, room):
+        self.counters.count('published')
+        try:
+            self.client.publish(self.channel, self._envelope(event, data, room))
+        except Exception as e:
+            # The broker is down: nobody, not even this node, gets the event
+            print(f"Event {event} to {room} dropped, publish failed: {e}")
+            self.counters.count('dropped')
+
+    def publish_sequenced(self, event, data, room):
+        """publish() with data['seq'] set to the room's next sequence number.
+
+        One counter per room on the broker numbers the room's events the
+        same way for every node, and the script takes the number and
+        publishes in one atomic step: no other node can publish a later
+        seq of the room first.
+        """
+        self.counters.count('published')
+        try:
+            self._publish_sequenced(keys=[self.seq_prefix + room],
+                                    args=[self.channel, self._envelope(event, data, room)])
+        except Exception as e:
+            print(f"Event {event} to {room} dropped, publish failed: {e}")
+            self.counters.count('dropped')
+
+    def _listen(self):
+        while not self._stop.is_set():
+            try:
+                message = self._pubsub.get_message(ignore_subscribe_messages=True,
+                                                   timeout=self.poll_timeout)
+            except Exception as e:
+                print(f"Event bus listener error: {e}")
+                time.sleep(self.poll_timeout)
+                continue
+            if not message or message.get('type') != 'message':
+                continue
+            self._handle(message['data'])
+
+    def _handle(self, raw):
+        try:
+            if isinstance(raw, str):
+                raw = raw.encode('utf-8')
+            seq = None
+            if not raw.startswith(b'{'):
+                seq, _, raw = raw.partition(b'|')
+            envelope = json.loads(raw)
+            if seq is not None:
+                envelope['data']['seq'] = int(seq)
+            self.deliver(envelope['event'], envelope['data'], envelope['room'])
+        except Exception as e:
+            print(f"Event bus message dropped: {e}")
+            self.counters.count('dropped')
+            return
+        latency_ms = max(0.0, (time.time() - envelope['sent_at']) * 1000)
+        self.counters.record_delivery(latency_ms)
+
+    def stats(self):
+        return {'backend': self.backend, 'node_id': self.node_id,
+                **self.counters.snapshot()}
+
+    def close(self):
+        self._stop.set()
+        if self._thread.is_alive():
+            self._thread.join(timeout=self.poll_timeout * 2)
+        self._pubsub.close()
+
+
+def event_bus_from_env(deliver):
+    backend = os.getenv('EVENT_BUS', 'memory').lower()
+    if backend == 'fakeredis':
+        # Exercises the broker path in one process without a Redis server
+        from utils.fakeRedis import FakeRedis
+        return RedisEventBus(FakeRedis(), deliver)
+    if backend == 'redis':
+        try:
+            import redis
+        except ImportError:
+            print("EVENT_BUS=redis but the redis package is not installed; "
+                  "falling back to in-process delivery")
+        else:
+            client = redis.Redis.from_url(os.getenv('REDIS_URL', 'redis://localhost:6379/0'))
+            return RedisEventBus(client, deliver)
+    return LocalEventBus(deliver)
@@ -0,0 +1,70 @@
+import os
+import threading
+from collections import OrderedDict, deque
+
+
+class EventReplayBuffer:
+    """Last `size` events of each room, keyed by their room sequence number.
+
+    A client that reconnects with the last seq it saw gets exactly the
+    events it missed, as long as they are all still buffered. Rooms are
+    kept in LRU order and capped at max_rooms so idle rooms age out.
+    """
+
+    def __init__(self, size=200, max_rooms=10000):
+        self.size = size
+        self.max_rooms = max_rooms
+        self._lock = threading.Lock()
+        self._rooms = OrderedDict()  # room -> deque of (seq, event, data)
+        self.replayed = 0
+        self.resyncs = 0
+
+    def record(self, room, seq, event, data):
+        with self._lock:
+            events = self._rooms.get(room)
+            if events is None:
+                events = self._rooms[room] = deque(maxlen=self.size)
+                while len(self._rooms) > self.max_rooms:
+                    self._rooms.popitem(last=False)
+            else:
+                self._rooms.move_to_end(room)
+            events.append((seq, event, data))
+
+    def since(self, room, last_seq, current_seq):
+        """Events after last_seq as [(event, data)], or None when the gap
+        cannot be replayed and the client has to refetch."""
+        if last_seq == current_seq:
+            return []
+        if last_seq > current_seq:
+            # The sequence restarted (e.g. an in-memory bus after a restart)
+            with self._lock:
+                self.resyncs += 1
+            return None
+        with self._lock:
+            events = sorted((entry for entry in self._rooms.get(room, ()) if entry[0] > last_seq),
+                            key=lambda entry: entry[0])
+            # Only a run without holes from last_seq + 1 can be replayed; a
+            # hole means a missed event was pushed out of the buffer (or
+            # never reached this worker). Events after the run but not yet
+            # here arrive live: the client has already joined the room.
+            if not events or any(entry[0] != last_seq + 1 + i for i, entry in enumerate(events)):
+                self.resyncs += 1
+                return None
+            self.replayed += len(events)
+        return [(event, data) for _, event, data in events]
+
+    def stats(self):
+        with self._lock:
+            return {
+                'rooms': len(self._rooms),
+                'size': self.size,
+                'replayed': self.replayed,
+                'resyncs': self.resyncs,
+            }
+
+
+def replay_buffer_from_env():
+    return EventReplayBuffer(
+        size=int(os.getenv('EVENT_REPLAY_SIZE', '200')),
+        max_rooms=int(os.getenv('EVENT_REPLAY_ROOMS', '10000')),
+    )
@@ -0,0 +1,202 @@
+import queue
+import threading
+import time
+
+from utils.eventBus import PUBLISH_SEQUENCED
+from utils.orderCounters import ADJUST_COUNTS, SEED_COUNTS
+
+
+class FakeRedis:
+    """In-process stand-in for the subset of redis-py the backend uses.
+
+    Lets the Redis code paths run locally and in load tests without a Redis
+    server: pass an instance wherever a redis.Redis client is expected.
+    Values are stored as bytes, like the real client returns them.
+    """
+
+    def __init__(self):
+        # Reentrant: scripts run the commands under the lock they hold
+        self._lock = threading.RLock()
+        self._data = {}  # key -> (expires_at, value)
+        self._channels = {}  # channel -> set of FakePubSub
+
+    def _live(self, key):
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at is not None and expires_at <= time.monotonic():
+            del self._data[key]
+            return None
+        return value
+
+    @staticmethod
+    def _encode(value):
+        if isinstance(value, bytes):
+            return value
+        return str(value).encode('utf-8')
+
+    def get(self, key):
+        with self._lock:
+            return self._live(key)
+
+    def set(self, key, value, ex=None, nx=False):
+        expires_at = time.monotonic() + ex if ex else None
+        with self._lock:
+            if nx and self._live(key) is not None:
+                return None
+            self._data[key] = (expires_at, self._encode(value))
+        return True
+
+    def delete(self, *keys):
+        removed = 0
+        with self._lock:
+            for key in keys:
+                if self._live(key) is not None:
+                    removed += 1
+                self._data.pop(key, None)
+        return removed
+
+    def incr(self, key, amount=1):
+        with self._lock:
+            current = self._live(key)
+            value = int(current or 0) + amount
+            expires_at = self._data[key][0] if current is not None else None
+            self._data[key] = (expires_at, self._encode(value))
+            return value
+
+    def exists(self, *keys):
+        with self._lock:
+            return sum(self._live(key) is not None for key in keys)
+
+    def expire(self, key, seconds):
+        with self._lock:
+            value = self._live(key)
+            if value is None:
+                return False
+            self._data[key] = (time.monotonic() + seconds, value)
+            return True
+
+    def hgetall(self, key):
+        with self._lock:
+            return dict(self._live(key) or {})
+
+    def hset(self, key, field=None, value=None, mapping=None):
+        items = dict(mapping or {})
+        if field is not None:
+            items[field] = value
+        with self._lock:
+            entry = self._data.get(key)
+            fields = self._live(key)
+            if fields is None:
+                entry, fields = None, {}
+            added = 0
+            for name, item in items.items():
+                added += self._encode(name) not in fields
+                fields[self._encode(name)] = self._encode(item)
+            self._data[key] = (entry[0] if entry else None, fields)
+            return added
+
+    def hincrby(self, key, field, amount=1):
+        with self._lock:
+            fields = self._live(key) or {}
+            value = int(fields.get(self._encode(field), 0)) + int(amount)
+            self.hset(key, field, value)
+            return value
+
+    def flushall(self):
+        with self._lock:
+            self._data.clear()
+        return True
+
+    def publish(self, channel, message):
+        with self._lock:
+            subscribers = list(self._channels.get(channel, ()))
+        for pubsub in subscribers:
+            pubsub._deliver(channel, self._encode(message))
+        return len(subscribers)
+
+    def pubsub(self):
+        return FakePubSub(self)
+
+    def register_script(self, script):
+        """Lua does not run here: the scripts the backend uses have a Python
+        twin in SCRIPTS, run under the server lock to be just as atomic."""
+        twin = SCRIPTS.get(script)
+        if twin is None:
+            raise NotImplementedError('FakeRedis cannot run this script')
+
+        def run(keys=(), args=(), client=None):
+            with self._lock:
+                return twin(self, list(keys), list(args))
+        return run
+
+
+class FakePubSub:
+    """redis-py PubSub look-alike: subscribe() then poll get_message().
+
+    Several FakePubSub objects on one FakeRedis behave like several
+    processes subscribed to the same Redis server.
+    """
+
+    def __init__(self, server):
+        self._server = server
+        self._messages = queue.Queue()
+        self._channels = set()
+
+    def _deliver(self, channel, data):
+        self._messages.put({'type': 'message', 'pattern': None,
+                            'channel': channel.encode('utf-8'), 'data': data})
+
+    def subscribe(self, *channels):
+        with self._server._lock:
+            for channel in channels:
+                self._server._channels.setdefault(channel, set()).add(self)
+                self._channels.add(channel)
+
+    def unsubscribe(self, *channels):
+        with self._server._lock:
+            for channel in channels or tuple(self._channels):
+                self._server._channels.get(channel, set()).discard(self)
+                self._channels.discard(channel)
+
+    def get_message(self, ignore_subscribe_messages=False, timeout=0.0):
+        try:
+            return self._messages.get(timeout=timeout) if timeout else self._messages.get_nowait()
+        except queue.Empty:
+            return None
+
+    def close(self):
+        self.unsubscribe()
+
+
+def _publish_sequenced(server, keys, args):
+    seq = server.incr(keys[0])
+    server.publish(args[0], f'{seq}|'.encode('utf-8') + server._encode(args[1]))
+    return seq
+
+
+def _adjust_counts(server, keys, args):
+    if not server.exists(keys[0]):
+        return None
+    for field, change in zip(args[::2], args[1::2]):
+        if server.hincrby(keys[0], field, change) < 0:
+            server.hset(keys[0], field, 0)
+    fields = server.hgetall(keys[0])
+    return [item for pair in fields.items() for item in pair]
+
+
+def _seed_counts(server, keys, args):
+    if server.exists(keys[0]):
+        return 0
+    server.hset(keys[0], mapping=dict(zip(args[1::2], args[2::2])))
+    if int(args[0]) > 0:
+        server.expire(keys[0], int(args[0]))
+    return 1
+
+
+SCRIPTS = {
+    PUBLISH_SEQUENCED: _publish_sequenced,
+    ADJUST_COUNTS: _adjust_counts,
+    SEED_COUNTS: _seed_counts,
+}
@@ -0,0 +1,90 @@
+import json
+import os
+import threading
+
+from utils.cache import LRUCache, shared_redis_from_env
+from utils.serialization import json_default
+
+
+class IdempotencyStore:
+    """Remembers the outcome of each Idempotency-Key for ttl seconds.
+
+    begin() atomically claims a key. It returns None for a new key, or the
+    stored entry: {'state': 'in_flight'} while the first request is still
+    running, {'state': 'done', 'status': ..., 'body': ...} afterwards.
+
+    Keys live in this process only; with several workers a retry may land
+    on another one, so use RedisIdempotencyStore there.
+    """
+
+    def __init__(self, ttl=24 * 3600, max_entries=10000):
+        self._lock = threading.Lock()
+        self._entries = LRUCache(max_entries=max_entries, ttl=ttl)
+
+    def begin(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._entries.set(key, {'state': 'in_flight'})
+            return entry
+
+    def complete(self, key, status, body):
+        self._entries.set(key, {'state': 'done', 'status': status, 'body': body})
+
+    def release(self, key):
+        # For retryable failures: let the client's retry run for real
+        self._entries.delete(key)
+
+
+class RedisIdempotencyStore:
+    """IdempotencyStore shared by every worker through Redis.
+
+    The claim is a single SET NX, so two workers racing on the same key
+    cannot both win. An in-flight claim expires after in_flight_ttl, so a
+    worker that dies mid-request does not block the key for a day. If
+    Redis is unreachable, requests go through unguarded rather than fail.
+    """
+
+    def __init__(self, client, ttl=24 * 3600, in_flight_ttl=300, prefix='labaride:idempotency:'):
+        self.client = client
+        self.ttl = ttl
+        self.in_flight_ttl = in_flight_ttl
+        self.prefix = prefix
+
+    def begin(self, key):
+        try:
+            # The claim can expire between a failed SET NX and the GET; one
+            # retry settles that race
+            for _ in range(2):
+                if self.client.set(self.prefix + key, json.dumps({'state': 'in_flight'}),
+                                   ex=self.in_flight_ttl, nx=True):
+                    return None
+                raw = self.client.get(self.prefix + key)
+                if raw is not None:
+                    return json.loads(raw)
+        except Exception as e:
+            print(f"Idempotency key {key} not checked: {e}")
+        return None
+
+    def complete(self, key, status, body):
+        try:
+            self.client.set(self.prefix + key,
+                            json.dumps({'state': 'done', 'status': status, 'body': body},
+                                       default=json_default),
+                            ex=self.ttl)
+        except Exception as e:
+            print(f"Idempotency key {key} not stored: {e}")
+
+    def release(self, key):
+        try:
+            self.client.delete(self.prefix + key)
+        except Exception as e:
+            print(f"Idempotency key {key} not released: {e}")
+
+
+def idempotency_store_from_env():
+    ttl = float(os.getenv('IDEMPOTENCY_TTL', str(24 * 3600)))
+    client = shared_redis_from_env('IDEMPOTENCY_BACKEND')
+    if client is not None:
+        return RedisIdempotencyStore(client, ttl=ttl)
+    return IdempotencyStore(ttl=ttl)
@@ -0,0 +1,103 @@
+import os
+import threading
+import time
+from bisect import bisect_right
+from decimal import Decimal, InvalidOperation
+
+
+def to_kilos(value):
+    """Exact Decimal for a kilo amount coming from JSON or MySQL."""
+    try:
+        return Decimal(str(value))
+    except (InvalidOperation, ValueError):
+        raise ValueError(f'Invalid kilo amount: {value!r}')
+
+
+class KiloPriceTable:
+    """A shop's kilo price ranges compiled into sorted boundaries.
+
+    Ranges are closed intervals [min_kilo, max_kilo], matching the
+    min_kilo <= x AND max_kilo >= x condition the SQL used.
+    """
+
+    def __init__(self, rows):
+        ranges = sorted(
+            (to_kilos(row['min_kilo']), to_kilos(row['max_kilo']), row['price_per_kilo'])
+            for row in rows
+        )
+        self.mins = [r[0] for r in ranges]
+        self.maxs = [r[1] for r in ranges]
+        self.prices = [r[2] for r in ranges]
+        # reach[i] = largest max_kilo among the first i + 1 ranges, so we
+        # can tell in O(1) whether any range starting at or before a point
+        # still covers it
+        self.reach = []
+        highest = None
+        for upper in self.maxs:
+            highest = upper if highest is None or upper > highest else highest
+            self.reach.append(highest)
+
+    def __len__(self):
+        return len(self.mins)
+
+    def price_for(self, kilos):
+        """price_per_kilo of the range containing kilos, or None."""
+        kilos = to_kilos(kilos)
+        i = bisect_right(self.mins, kilos) - 1
+        if i < 0 or self.reach[i] < kilos:
+            return None
+        # Ranges should not overlap, but rows written before the overlap
+        # check existed might; walk back to the range that covers the point
+        while self.maxs[i] < kilos:
+            i -= 1
+        return self.prices[i]
+
+    def overlaps(self, min_kilo, max_kilo):
+        """Whether [min_kilo, max_kilo] intersects any existing range."""
+        i = bisect_right(self.mins, to_kilos(max_kilo)) - 1
+        return i >= 0 and self.reach[i] >= to_kilos(min_kilo)
+
+
+class KiloPriceIndex:
+    """Per-shop compiled kilo price tables, built lazily from loader(shop_id).
+
+    invalidate() drops a shop's table in this process; other workers hear
+    of price edits over the event bus (ShopController.apply_change), and
+    max_age seconds bound how long a table is trusted if they do not
+    (0 keeps tables until invalidated).
+    """
+
+    def __init__(self, loader, max_age=300):
+        self._loader = loader
+        self.max_age = max_age
+        self._lock = threading.Lock()
+        self._tables = {}       # shop_id -> (table, loaded_at)
+        self._generations = {}
+
+    def table(self, shop_id):
+        entry = self._tables.get(shop_id)
+        if entry is not None and (not self.max_age or time.monotonic() - entry[1] < self.max_age):
+            return entry[0]
+        with self._lock:
+            generation = self._generations.get(shop_id, 0)
+        table = KiloPriceTable(self._loader(shop_id))
+        with self._lock:
+            # Do not install a table that a concurrent write already outdated
+            if self._generations.get(shop_id, 0) == generation:
+                self._tables[shop_id] = (table, time.monotonic())
+        return table
+
+    def price_for(self, shop_id, kilos):
+        return self.table(shop_id).price_for(kilos)
+
+    def overlaps(self, shop_id, min_kilo, max_kilo):
+        return self.table(shop_id).overlaps(min_kilo, max_kilo)
+
+    def invalidate(self, shop_id):
+        with self._lock:
+            self._generations[shop_id] = self._generations.get(shop_id, 0) + 1
+            self._tables.pop(shop_id, None)
+
+
+def kilo_price_index_from_env(loader):
+    return KiloPriceIndex(loader, max_age=float(os.getenv('KILO_PRICES_MAX_AGE', '300')))
@@ -0,0 +1,257 @@
+"""In-process metrics, exposed in Prometheus text format on /metrics.
+
+Hot-path updates go to a shard owned by the calling OS thread, so they
+take no lock: only that thread writes its shard, and the scrape merges
+all shards. Under eventlet every greenlet of a worker shares one shard,
+which is just as safe since greenlets only switch on I/O.
+
+The database layer reports connection checkouts and query time through
+record_acquire() and TimedCursor; while a Flask request is running they
+are also charged to its endpoint.
+"""
+import threading
+import time
+from bisect import bisect_left
+
+from flask import request
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+DB_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+
+
+class Metrics:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._shards = {}      # native thread id -> (counters, histograms)
+        self._meta = {}        # name -> (type, help)
+        self._buckets = {}     # histogram name -> bucket bounds
+        self._collectors = []  # callables run at scrape time
+
+    def counter(self, name, help):
+        self._meta[name] = ('counter', help)
+
+    def histogram(self, name, help, buckets=LATENCY_BUCKETS):
+        self._meta[name] = ('histogram', help)
+        self._buckets[name] = tuple(buckets)
+
+    def collector(self, fn):
+        """fn() -> [(name, type, help, [(labels, value)])], run on scrape;
+        for values that are cheaper to read when asked (gauges)."""
+        self._collectors.append(fn)
+        return fn
+
+    def _shard(self):
+        ident = threading.get_native_id()
+        shard = self._shards.get(ident)
+        if shard is None:
+            with self._lock:
+                shard = self._shards.setdefault(ident, ({}, {}))
+        return shard
+
+    def inc(self, name, labels=(), value=1):
+        counters = self._shard()[0]
+        key = (name, labels)
+        counters[key] = counters.get(key, 0) + value
+
+    def observe(self, name, value, labels=()):
+        histograms = self._shard()[1]
+        key = (name, labels)
+        entry = histograms.get(key)
+        buckets = self._buckets[name]
+        if entry is None:
+            # One slot per bucket plus +Inf, then sum and count
+            entry = histograms[key] = [0] * (len(buckets) + 3)
+        entry[bisect_left(buckets, value)] += 1
+        entry[-2] += value
+        entry[-1] += 1
+
+    @staticmethod
+    def _snapshot(table):
+        # The owning thread may be inserting while we copy; retry
+        while True:
+            try:
+                return [(key, list(value) if isinstance(value, list) else value)
+                        for key, value in list(table.items())]
+            except RuntimeError:
+                continue
+
+    def _merge(self):
+        counters, histograms = {}, {}
+        with self._lock:
+            shards = list(self._shards.values())
+        for shard_counters, shard_histograms in shards:
+            for key, value in self._snapshot(shard_counters):
+                counters[key] = counters.get(key, 0) + value
+            for key, value in self._snapshot(shard_histograms):
+                total = histograms.get(key)
+                if total is None:
+                    histograms[key] = value
+                else:
+                    for i, n in enumerate(value):
+                        total[i] += n
+        return counters, histograms
+
+    def render(self):
+        counters, histograms = self._merge()
+        series = {}
+        for (name, labels), value in sorted(counters.items()):
+            series.setdefault(name, []).append(_line(name, labels, value))
+        # Buckets stay in le order, so histogram lines are not sorted later
+        for (name, labels), entry in sorted(histograms.items()):
+            lines = series.setdefault(name, [])
+            cumulative = 0
+            for bound, n in zip(self._buckets[name] + ('+Inf',), entry):
+                cumulative += n
+                lines.append(_line(f'{name}_bucket', labels + (('le', str(bound)),), cumulative))
+            lines.append(_line(f'{name}_sum', labels, entry[-2]))
+            lines.append(_line(f'{name}_count', labels, entry[-1]))
+
+        meta = dict(self._meta)
+        for collect in self._collectors:
+            try:
+                collected = collect()
+            except Exception as e:
+                print(f"Metrics collector {collect.__name__} failed: {e}")
+                continue
+            for name, kind, help, samples in collected:
+                meta[name] = (kind, help)
+                series[name] = [_line(name, labels, value) for labels, value in samples]
+
+        out = []
+        for name in sorted(series):
+            kind, help = meta.get(name, ('untyped', ''))
+            out.append(f'# HELP {name} {help}')
+            out.append(f'# TYPE {name} {kind}')
+            out.extend(series[name])
+        return '\n'.join(out) + '\n'
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+def _line(name, labels, value):
+    if labels:
+        name += '{' + ','.join(f'{key}="{_escape(val)}"' for key, val in labels) + '}'
+    return f'{name} {value!r}' if isinstance(value, float) else f'{name} {value}'
+
+
+metrics = Metrics()
+
+metrics.counter('http_requests_total', 'Requests by endpoint, method and status code')
+metrics.histogram('http_request_duration_seconds', 'Request latency by endpoint')
+metrics.counter('http_db_queries_total', 'Queries run while serving the endpoint')
+metrics.counter('http_db_query_seconds_total', 'Time spent executing queries and reading rows while serving the endpoint')
+metrics.counter('http_db_acquire_seconds_total', 'Time spent checking out connections while serving the endpoint')
+metrics.histogram('db_query_duration_seconds', 'Time in execute, per statement sent', DB_BUCKETS)
+metrics.counter('db_fetch_seconds_total', 'Time reading result rows after execute')
+metrics.histogram('db_acquire_duration_seconds', 'Connection checkout time', DB_BUCKETS)
+metrics.counter('socketio_connects_total', 'Socket.IO client connects')
+metrics.counter('socketio_disconnects_total', 'Socket.IO client disconnects')
+metrics.counter('socketio_emits_total', 'Events emitted to rooms, by event name')
+
+# Per-request tally of DB work; threading.local is per greenlet under eventlet
+_request_scope = threading.local()
+
+def record_acquire(seconds):
+    metrics.observe('db_acquire_duration_seconds', seconds)
+    tally = getattr(_request_scope, 'db', None)
+    if tally is not None:
+        tally[2] += seconds
+
+def record_query(seconds):
+    metrics.observe('db_query_duration_seconds', seconds)
+    tally = getattr(_request_scope, 'db', None)
+    if tally is not None:
+        tally[0] += 1
+        tally[1] += seconds
+
+def record_fetch(seconds):
+    # Rows of unbuffered cursors are read here, after execute returned
+    metrics.inc('db_fetch_seconds_total', value=seconds)
+    tally = getattr(_request_scope, 'db', None)
+    if tally is not None:
+        tally[1] += seconds
+
+
+class TimedCursor:
+    """Cursor proxy that reports execute and fetch time to the metrics."""
+
+    def __init__(self, cursor):
+        self._cursor = cursor
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+    def __iter__(self):
+        return iter(self._cursor)
+
+    def execute(self, operation, params=None, multi=False):
+        start = time.perf_counter()
+        try:
+            result = self._cursor.execute(operation, params, multi=multi)
+        finally:
+            record_query(time.perf_counter() - start)
+        if multi:
+            return self._timed_results(result)
+        return result
+
+    def _timed_results(self, results):
+        # Statements after the first are read as the batch is iterated
+        while True:
+            start = time.perf_counter()
+            result = next(results, None)
+            record_fetch(time.perf_counter() - start)
+            if result is None:
+                return
+            yield result
+
+    def executemany(self, operation, seq_params):
+        start = time.perf_counter()
+        try:
+            return self._cursor.executemany(operation, seq_params)
+        finally:
+            record_query(time.perf_counter() - start)
+
+    def _timed_fetch(self, fetch, *args):
+        start = time.perf_counter()
+        try:
+            return fetch(*args)
+        finally:
+            record_fetch(time.perf_counter() - start)
+
+    def fetchone(self):
+        return self._timed_fetch(self._cursor.fetchone)
+
+    def fetchmany(self, size=1):
+        return self._timed_fetch(self._cursor.fetchmany, size)
+
+    def fetchall(self):
+        return self._timed_fetch(self._cursor.fetchall)
+
+
+def instrument_flask(app):
+    """Count requests and latency per endpoint, with the DB work each did."""
+
+    @app.before_request
+    def start_request_metrics():
+        _request_scope.start = time.perf_counter()
+        _request_scope.db = [0, 0.0, 0.0]  # queries, query seconds, acquire seconds
+
+    @app.after_request
+    def record_request_metrics(response):
+        start = getattr(_request_scope, 'start', None)
+        if start is None:
+            return response
+        tally = _request_scope.db
+        _request_scope.start = _request_scope.db = None
+
+        endpoint = request.endpoint or 'unmatched'
+        metrics.inc('http_requests_total', (
+            ('endpoint', endpoint), ('method', request.method), ('status', str(response.status_code))))
+        labels = (('endpoint', endpoint),)
+        metrics.observe('http_request_duration_seconds', time.perf_counter() - start, labels)
+        if tally[0] or tally[2]:
+            metrics.inc('http_db_queries_total', labels, tally[0])
+            metrics.inc('http_db_query_seconds_total', labels, tally[1])
+            metrics.inc('http_db_acquire_seconds_total', labels, tally[2])
+        return response
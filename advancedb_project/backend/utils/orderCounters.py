@@ -0,0 +1,219 @@
+import os
+import threading
+import time
+
+from utils.cache import shared_redis_from_env
+
+STATUSES = ('Pending', 'Processing', 'Completed', 'Cancelled')
+
+
+class OrderCounters:
+    """Per-shop order counts by status, kept in memory for the order tabs.
+
+    seed() fills every shop from one grouped query; a shop missing from
+    it (no orders yet, or seeding failed) is loaded on first use. Writes
+    adjust the counts after they commit. The counts live in this process
+    and only see its own writes: this is the single-worker backend (see
+    RedisOrderCounters). A shop's counts are re-read once they are older
+    than max_age seconds (0 keeps them until restart).
+    """
+
+    def __init__(self, load, max_age=300):
+        # load(shop_id=None) -> {shop_id: {status: count}}; None means all shops
+        self.load = load
+        self.max_age = max_age
+        self._lock = threading.Lock()
+        self._counts = {}   # shop_id -> {status: count}
+        self._loaded_at = {}
+        self.loads = 0
+        self.adjustments = 0
+
+    @staticmethod
+    def _public(counts):
+        return {status.lower(): counts.get(status, 0) for status in STATUSES}
+
+    def seed(self):
+        loaded = self.load()
+        now = time.monotonic()
+        with self._lock:
+            self.loads += 1
+            for shop_id, counts in loaded.items():
+                self._counts[shop_id] = dict(counts)
+                self._loaded_at[shop_id] = now
+        return len(loaded)
+
+    def _fresh(self, shop_id, now):
+        loaded_at = self._loaded_at.get(shop_id)
+        if loaded_at is None:
+            return False
+        return not self.max_age or now - loaded_at < self.max_age
+
+    def _ensure(self, shop_id):
+        """Load shop_id's counts unless fresh ones are held; True if loaded."""
+        with self._lock:
+            if self._fresh(shop_id, time.monotonic()):
+                return False
+        counts = self.load(shop_id).get(shop_id, {})
+        with self._lock:
+            self.loads += 1
+            self._counts[shop_id] = dict(counts)
+            self._loaded_at[shop_id] = time.monotonic()
+        return True
+
+    def get(self, shop_id):
+        """{'pending': n, 'processing': n, 'completed': n, 'cancelled': n}"""
+        self._ensure(shop_id)
+        with self._lock:
+            return self._public(self._counts.get(shop_id, {}))
+
+    def adjust(self, shop_id, from_status=None, to_status=None):
+        """Move one order between statuses (from_status None: a new order).
+
+        Returns (counts, delta) in get() form, for pushing to the shop.
+        """
+        # Adjustments run after the commit, so a load made here already
+        # counts this order and must not be adjusted again
+        reloaded = self._ensure(shop_id)
+        delta = {}
+        with self._lock:
+            self.adjustments += 1
+            counts = self._counts.setdefault(shop_id, {})
+            if from_status in STATUSES:
+                delta[from_status] = -1
+            if to_status in STATUSES:
+                delta[to_status] = delta.get(to_status, 0) + 1
+            if not reloaded:
+                for status, change in delta.items():
+                    counts[status] = max(0, counts.get(status, 0) + change)
+            return self._public(counts), {status.lower(): change for status, change in delta.items()}
+
+    def stats(self):
+        with self._lock:
+            return {
+                'backend': 'memory',
+                'shops': len(self._counts),
+                'max_age': self.max_age,
+                'loads': self.loads,
+                'adjustments': self.adjustments,
+            }
+
+
+# Applies a delta only to counts that are already held: a missing hash is
+# loaded from MySQL on the next read, and that load already includes the
+# write being counted. Counts never go below zero.
+ADJUST_COUNTS = """
+if redis.call('EXISTS', KEYS[1]) == 0 then
+    return nil
+end
+for i = 1, #ARGV, 2 do
+    if redis.call('HINCRBY', KEYS[1], ARGV[i], ARGV[i + 1]) < 0 then
+        redis.call('HSET', KEYS[1], ARGV[i], 0)
+    end
+end
+return redis.call('HGETALL', KEYS[1])
+"""
+
+# Stores loaded counts unless another worker got there first (its load is
+# as good, and adjustments may already have been applied on top of it).
+# ARGV: ttl seconds (0: none), then status/count pairs.
+SEED_COUNTS = """
+if redis.call('EXISTS', KEYS[1]) == 1 then
+    return 0
+end
+redis.call('HSET', KEYS[1], unpack(ARGV, 2))
+if tonumber(ARGV[1]) > 0 then
+    redis.call('EXPIRE', KEYS[1], ARGV[1])
+end
+return 1
+"""
+
+
+class RedisOrderCounters:
+    """OrderCounters shared by every worker, one Redis hash per shop.
+
+    Every worker adjusts the same hash with HINCRBY, so all of them push
+    the same counts to a shop's room. A hash expires max_age seconds after
+    it was loaded from MySQL, which bounds any drift (e.g. a write counted
+    while another worker was loading the shop).
+    """
+
+    def __init__(self, client, load, max_age=300, prefix='labaride:order_counts:'):
+        self.client = client
+        self.load = load
+        self.max_age = max_age
+        self.prefix = prefix
+        self._adjust = client.register_script(ADJUST_COUNTS)
+        self._seed = client.register_script(SEED_COUNTS)
+        self._lock = threading.Lock()
+        self.loads = 0
+        self.adjustments = 0
+
+    @staticmethod
+    def _decode(raw):
+        if isinstance(raw, list):
+            raw = dict(zip(raw[::2], raw[1::2]))
+        return {
+            (key.decode('utf-8') if isinstance(key, bytes) else key): int(value)
+            for key, value in (raw or {}).items()
+        }
+
+    def _store(self, shop_id, counts):
+        args = [int(self.max_age) if self.max_age else 0]
+        for status in STATUSES:
+            args.extend([status, counts.get(status, 0)])
+        self._seed(keys=[self.prefix + str(shop_id)], args=args)
+
+    def seed(self):
+        loaded = self.load()
+        with self._lock:
+            self.loads += 1
+        for shop_id, counts in loaded.items():
+            self._store(shop_id, counts)
+        return len(loaded)
+
+    def _counts(self, shop_id):
+        counts = self._decode(self.client.hgetall(self.prefix + str(shop_id)))
+        if counts:
+            return counts
+        counts = self.load(shop_id).get(shop_id, {})
+        with self._lock:
+            self.loads += 1
+        self._store(shop_id, counts)
+        # Another worker's load may have won; either way, what is stored now
+        return self._decode(self.client.hgetall(self.prefix + str(shop_id))) or counts
+
+    def get(self, shop_id):
+        return OrderCounters._public(self._counts(shop_id))
+
+    def adjust(self, shop_id, from_status=None, to_status=None):
+        delta = {}
+        if from_status in STATUSES:
+            delta[from_status] = -1
+        if to_status in STATUSES:
+            delta[to_status] = delta.get(to_status, 0) + 1
+        args = []
+        for status, change in delta.items():
+            args.extend([status, change])
+        with self._lock:
+            self.adjustments += 1
+        counts = self._adjust(keys=[self.prefix + str(shop_id)], args=args) if args else None
+        counts = self._decode(counts) if counts is not None else self._counts(shop_id)
+        return OrderCounters._public(counts), {status.lower(): change for status, change in delta.items()}
+
+    def stats(self):
+        with self._lock:
+            return {
+                'backend': 'redis',
+                'max_age': self.max_age,
+                'loads': self.loads,
+                'adjustments': self.adjustments,
+            }
+
+
+def order_counters_from_env(load):
+    max_age = float(os.getenv('ORDER_COUNTS_MAX_AGE', '300'))
+    # Per-worker counts would each push their own numbers to the same room
+    client = shared_redis_from_env('ORDER_COUNTS_BACKEND')
+    if client is not None:
+        return RedisOrderCounters(client, load, max_age=max_age)
+    return OrderCounters(load, max_age=max_age)
@@ -0,0 +1,143 @@
+import os
+import queue
+import threading
+import time
+import uuid
+
+from utils.cache import LRUCache, RedisCache, shared_redis_from_env
+
+
+class QueueFull(Exception):
+    pass
+
+
+class OrderQueue:
+    """Bounded in-process queue of orders, drained by worker threads.
+
+    Workers pull up to batch_size orders (waiting at most linger seconds
+    for a batch to fill) and hand them to process_batch, which commits them
+    together and returns one result dict per order. on_result is called for
+    every order afterwards, e.g. to push Socket.IO notifications.
+
+    results holds each provisional id's state for status(); by default an
+    in-process LRUCache, a RedisCache when a client polling
+    /transaction_request may reach another worker than the one that
+    queued its order.
+    """
+
+    def __init__(self, process_batch, on_result=None, max_size=1000, workers=2,
+                 batch_size=20, linger=0.01, result_ttl=3600, results=None):
+        self._process_batch = process_batch
+        self._on_result = on_result
+        self._queue = queue.Queue(maxsize=max_size)
+        self.workers = workers
+        self.batch_size = batch_size
+        self.linger = linger
+        self._results = results or LRUCache(max_entries=max(max_size * 10, 1000), ttl=result_ttl)
+
+        self._lock = threading.Lock()
+        self._threads = []
+        self._counters = {
+            'submitted': 0, 'rejected': 0, 'committed': 0,
+            'failed': 0, 'batches': 0,
+        }
+
+    def _count(self, name, amount=1):
+        with self._lock:
+            self._counters[name] += amount
+
+    def _ensure_workers(self):
+        # Started on first use so forked server workers each get their own
+        if self._threads:
+            return
+        with self._lock:
+            if self._threads:
+                return
+            for i in range(self.workers):
+                thread = threading.Thread(
+                    target=self._run, name=f'order-worker-{i}', daemon=True)
+                thread.start()
+                self._threads.append(thread)
+
+    def submit(self, user_id, data):
+        """Queue an order and return its provisional id. Raises QueueFull."""
+        self._ensure_workers()
+        provisional_id = uuid.uuid4().hex
+        self._results.set(provisional_id, {'state': 'queued'})
+        try:
+            self._queue.put_nowait((provisional_id, user_id, data))
+        except queue.Full:
+            self._results.delete(provisional_id)
+            self._count('rejected')
+            raise QueueFull()
+        self._count('submitted')
+        return provisional_id
+
+    def status(self, provisional_id):
+        return self._results.get(provisional_id)
+
+    def _next_batch(self):
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.linger
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                if remaining > 0:
+                    batch.append(self._queue.get(timeout=remaining))
+                else:
+                    batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            try:
+                results = self._process_batch([(user_id, data) for _, user_id, data in batch])
+            except Exception as e:
+                print(f"Error processing order batch: {e}")
+                results = [{'status': 500, 'message': str(e)}] * len(batch)
+            self._count('batches')
+
+            for (provisional_id, user_id, data), result in zip(batch, results):
+                if result['status'] == 201:
+                    self._count('committed')
+                    self._results.set(provisional_id, {
+                        'state': 'committed',
+                        'transaction_id': result['transaction_id']
+                    })
+                else:
+                    self._count('failed')
+                    self._results.set(provisional_id, {
+                        'state': 'failed',
+                        'error_status': result['status'],
+                        'message': result.get('message')
+                    })
+                if self._on_result:
+                    try:
+                        self._on_result(user_id, data, result)
+                    except Exception as e:
+                        print(f"Error in order result callback: {e}")
+                self._queue.task_done()
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._counters)
+        stats['depth'] = self._queue.qsize()
+        stats['capacity'] = self._queue.maxsize
+        return stats
+
+
+def order_queue_from_env(process_batch, on_result=None):
+    client = shared_redis_from_env('ORDER_RESULTS_BACKEND')
+    results = RedisCache(client, ttl=3600, prefix='labaride:order_request:') if client else None
+    return OrderQueue(
+        process_batch,
+        on_result,
+        max_size=int(os.getenv('ORDER_QUEUE_SIZE', '1000')),
+        workers=int(os.getenv('ORDER_WORKERS', '2')),
+        batch_size=int(os.getenv('ORDER_BATCH_SIZE', '20')),
+        linger=float(os.getenv('ORDER_BATCH_LINGER_MS', '10')) / 1000,
+        results=results,
+    )
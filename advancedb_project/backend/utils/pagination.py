@@ -0,0 +1,66 @@
+import base64
+import json
+import os
+from datetime import datetime
+
+
+def encode_cursor(*values):
+    """Pack the sort key of the last row on a page into an opaque token."""
+    raw = json.dumps(list(values), separators=(',', ':'), default=str)
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor, *fields):
+    """Inverse of encode_cursor; fields convert each packed value in turn.
+
+    Raises ValueError for tampered tokens, including ones whose values
+    do not survive their converter (a list where an id should be).
+    """
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+    except Exception:
+        raise ValueError('Invalid cursor')
+    if not isinstance(values, list) or len(values) != len(fields):
+        raise ValueError('Invalid cursor')
+    try:
+        return [field(value) for field, value in zip(fields, values)]
+    except (TypeError, ValueError):
+        raise ValueError('Invalid cursor')
+
+
+def cursor_id(value):
+    # int() would take True, 1.5 or '7'; encode_cursor only writes ints
+    if type(value) is not int:
+        raise TypeError(f'expected an id, got {value!r}')
+    return value
+
+
+def cursor_time(value):
+    """A DATETIME packed as '%Y-%m-%d %H:%M:%S'; passed through as text."""
+    datetime.strptime(value, '%Y-%m-%d %H:%M:%S')
+    return value
+
+
+def parse_limit(value, default=20, maximum=100):
+    if value in (None, ''):
+        return default
+    try:
+        limit = int(value)
+    except (TypeError, ValueError):
+        raise ValueError('limit must be an integer')
+    if limit < 1:
+        raise ValueError('limit must be positive')
+    return min(limit, maximum)
+
+
+def page_size_from_env(setting, default):
+    """Rows returned when a listing is requested without a limit.
+
+    0 turns the cap off and brings back the unbounded responses that app
+    builds from before paging rely on.
+    """
+    value = int(os.getenv(setting, str(default)))
+    if value < 0:
+        raise ValueError(f'{setting} must not be negative')
+    return value or None
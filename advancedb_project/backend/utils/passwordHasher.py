@@ -0,0 +1,116 @@
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+import bcrypt
+
+
+class HasherBusy(Exception):
+    """Too many password hashes are already waiting for a worker."""
+
+
+def _hash(password, rounds):
+    return bcrypt.hashpw(password, bcrypt.gensalt(rounds)).decode('utf-8')
+
+
+def _check(password, hashed):
+    return bcrypt.checkpw(password, hashed)
+
+
+def _encode(value):
+    return value if isinstance(value, bytes) else value.encode('utf-8')
+
+
+def hash_rounds(hashed):
+    """Cost factor of a stored $2b$<rounds>$... hash, or None if unreadable."""
+    try:
+        return int(_encode(hashed).split(b'$')[2])
+    except (IndexError, ValueError):
+        return None
+
+
+class PasswordHasher:
+    """Runs bcrypt in a pool of worker processes.
+
+    bcrypt is CPU bound for hundreds of milliseconds per call; on the
+    request thread a burst of logins starves every other request in the
+    process. At most max_pending hashes may be queued or running at once;
+    callers beyond that wait up to wait_timeout seconds for a slot and then
+    get HasherBusy, so a login storm is shed instead of piling up.
+
+    workers=0 hashes inline on the calling thread (development, tests).
+    """
+
+    def __init__(self, workers=2, max_pending=64, wait_timeout=2.0, rounds=12,
+                 start_method='spawn'):
+        self.workers = workers
+        self.max_pending = max_pending
+        self.wait_timeout = wait_timeout
+        self.rounds = rounds
+        self.start_method = start_method
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._lock = threading.Lock()
+        self._executor = None
+        self.submitted = 0
+        self.rejected = 0
+
+    def _get_executor(self):
+        # Started on first use so importing the app never forks or spawns
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ProcessPoolExecutor(
+                        max_workers=self.workers,
+                        mp_context=multiprocessing.get_context(self.start_method)
+                    )
+        return self._executor
+
+    def _run(self, fn, *args):
+        if not self.workers:
+            return fn(*args)
+        if not self._slots.acquire(timeout=self.wait_timeout):
+            with self._lock:
+                self.rejected += 1
+            raise HasherBusy('Password hashing queue is full')
+        try:
+            with self._lock:
+                self.submitted += 1
+            return self._get_executor().submit(fn, *args).result()
+        finally:
+            self._slots.release()
+
+    def hash(self, password):
+        return self._run(_hash, _encode(password), self.rounds)
+
+    def check(self, password, hashed):
+        return self._run(_check, _encode(password), _encode(hashed))
+
+    def needs_rehash(self, hashed):
+        return hash_rounds(hashed) != self.rounds
+
+    def stats(self):
+        with self._lock:
+            return {
+                'workers': self.workers,
+                'max_pending': self.max_pending,
+                'rounds': self.rounds,
+                'submitted': self.submitted,
+                'rejected': self.rejected,
+            }
+
+    def shutdown(self):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown()
+                self._executor = None
+
+
+def password_hasher_from_env():
+    return PasswordHasher(
+        workers=int(os.getenv('BCRYPT_WORKERS', '2')),
+        max_pending=int(os.getenv('BCRYPT_MAX_PENDING', '64')),
+        wait_timeout=float(os.getenv('BCRYPT_QUEUE_TIMEOUT', '2')),
+        rounds=int(os.getenv('BCRYPT_ROUNDS', '12')),
+        start_method=os.getenv('BCRYPT_START_METHOD', 'spawn'),
+    )
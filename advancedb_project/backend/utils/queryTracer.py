@@ -0,0 +1,267 @@
+"""Per-request statement traces, slow-query log and N+1 detection.
+
+Every cursor from create_connection() is a TracingCursor. With tracing
+on (QUERY_TRACE=1, or inside assert_max_queries) each statement is
+recorded with its normalized text, the shape of its parameters (types,
+never values), duration and row count:
+
+- statements slower than QUERY_SLOW_MS (default 100) are logged as one
+  JSON object on the 'queries' logger, in or out of a request;
+- at the end of a request, a normalized statement run QUERY_REPEAT_LIMIT
+  (default 5) times or more is logged as a likely N+1 loop, and the
+  response carries X-Query-Count.
+
+With tracing off the cursor only feeds the metrics.
+"""
+import json
+import logging
+import os
+import re
+import threading
+import time
+from contextlib import contextmanager
+
+from flask import request
+
+from utils.metrics import TimedCursor, metrics
+
+logger = logging.getLogger('queries')
+
+_STRING = re.compile(r"'(?:[^'\\]|\\.|'')*'")
+_NUMBER = re.compile(r'\b\d+(?:\.\d+)?\b')
+_PLACEHOLDER = re.compile(r'%(?:\(\w+\))?s')
+_IN_LIST = re.compile(r'\bIN\s*\(\s*\?(?:\s*,\s*\?)*\s*\)', re.IGNORECASE)
+_VALUES_LIST = re.compile(r'\)(?:\s*,\s*\(\s*\?(?:\s*,\s*\?)*\s*\))+')
+_SPACE = re.compile(r'\s+')
+
+def normalize(operation):
+    """Statement text with literals and placeholders as ?, IN lists and
+    multi-row VALUES folded, whitespace collapsed: one key per query shape."""
+    text = _STRING.sub('?', operation)
+    text = _PLACEHOLDER.sub('?', text)
+    text = _NUMBER.sub('?', text)
+    text = _IN_LIST.sub('IN (...)', text)
+    text = _VALUES_LIST.sub('), ...', text)
+    return _SPACE.sub(' ', text).strip()
+
+def params_shape(params):
+    if params is None:
+        return None
+    if isinstance(params, dict):
+        return {key: type(value).__name__ for key, value in params.items()}
+    if isinstance(params, (list, tuple)):
+        return [type(value).__name__ for value in params]
+    return type(params).__name__
+
+
+class QueryTracer:
+    def __init__(self, enabled=False, slow_ms=100, repeat_limit=5, max_statements=1000):
+        self.enabled = enabled
+        self.slow_ms = slow_ms
+        self.repeat_limit = repeat_limit
+        self.max_statements = max_statements
+        self._local = threading.local()  # per greenlet under eventlet
+        self._normalized = {}
+        self._captures = []
+        self._lock = threading.Lock()
+        self.slow = 0
+        self.flagged = 0
+
+    @property
+    def active(self):
+        return self.enabled or bool(self._captures)
+
+    def _normalize(self, operation):
+        text = self._normalized.get(operation)
+        if text is None:
+            text = normalize(operation)
+            if len(self._normalized) < 4096:
+                self._normalized[operation] = text
+        return text
+
+    def record(self, operation, params, seconds, rows, many=None):
+        statement = {
+            'sql': self._normalize(operation),
+            'params': params_shape(params) if many is None else f'{many} x {params_shape(params)}',
+            'ms': round(seconds * 1000, 3),
+            'rows': rows,
+        }
+        trace = getattr(self._local, 'trace', None)
+        if trace is not None and len(trace) < self.max_statements:
+            trace.append(statement)
+        for capture in list(self._captures):
+            capture.append(statement)
+        if statement['ms'] >= self.slow_ms:
+            with self._lock:
+                self.slow += 1
+            logger.warning(json.dumps({
+                'event': 'slow_query',
+                'endpoint': getattr(self._local, 'endpoint', None),
+                **statement
+            }, default=str))
+        return statement
+
+    def begin(self, endpoint):
+        self._local.trace = []
+        self._local.endpoint = endpoint
+
+    def end(self):
+        """Close the current request's trace; returns its statements."""
+        trace = getattr(self._local, 'trace', None)
+        endpoint = getattr(self._local, 'endpoint', None)
+        self._local.trace = self._local.endpoint = None
+        if not trace:
+            return trace or []
+
+        counts = {}
+        for statement in trace:
+            entry = counts.setdefault(statement['sql'], [0, 0.0])
+            entry[0] += 1
+            entry[1] += statement['ms']
+        for sql, (count, ms) in counts.items():
+            if count >= self.repeat_limit:
+                with self._lock:
+                    self.flagged += 1
+                logger.warning(json.dumps({
+                    'event': 'repeated_query',
+                    'endpoint': endpoint,
+                    'sql': sql,
+                    'count': count,
+                    'total_ms': round(ms, 3),
+                }))
+        return trace
+
+    def install(self, app):
+        @app.before_request
+        def begin_query_trace():
+            if self.active:
+                self.begin(request.endpoint)
+
+        @app.after_request
+        def end_query_trace(response):
+            if getattr(self._local, 'trace', None) is not None:
+                response.headers['X-Query-Count'] = str(len(self.end()))
+            return response
+
+    @contextmanager
+    def capture(self):
+        """Collect every statement run inside the block, from any thread."""
+        statements = []
+        with self._lock:
+            self._captures.append(statements)
+        try:
+            yield statements
+        finally:
+            with self._lock:
+                self._captures.remove(statements)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'enabled': self.enabled,
+                'slow_ms': self.slow_ms,
+                'repeat_limit': self.repeat_limit,
+                'slow': self.slow,
+                'flagged': self.flagged,
+            }
+
+
+tracer = QueryTracer(
+    enabled=os.getenv('QUERY_TRACE', '0').lower() in ('1', 'true', 'yes'),
+    slow_ms=float(os.getenv('QUERY_SLOW_MS', '100')),
+    repeat_limit=int(os.getenv('QUERY_REPEAT_LIMIT', '5')),
+)
+
+
+@metrics.collector
+def tracer_metrics():
+    stats = tracer.stats()
+    return [
+        ('db_slow_queries_total', 'counter', 'Statements over QUERY_SLOW_MS (tracing on)',
+         [((), stats['slow'])]),
+        ('db_repeated_queries_total', 'counter', 'Requests flagged for repeating a statement (tracing on)',
+         [((), stats['flagged'])]),
+    ]
+
+
+@contextmanager
+def assert_max_queries(limit, tracer=tracer):
+    """Fail when the block runs more than limit statements, e.g.
+
+        with assert_max_queries(2):
+            client.get('/transactions?ids=1,2,3')
+
+    The error lists the statements, so a new N+1 loop shows up as such.
+    """
+    with tracer.capture() as statements:
+        yield statements
+    if len(statements) > limit:
+        listing = '\n'.join(f"  {s['ms']:>8.2f} ms  {s['sql']}" for s in statements)
+        raise AssertionError(f'{len(statements)} queries, expected at most {limit}:\n{listing}')
+
+
+class TracingCursor(TimedCursor):
+    """TimedCursor that also reports each statement to the tracer."""
+
+    _statement = None
+
+    def execute(self, operation, params=None, multi=False):
+        if not tracer.active:
+            return super().execute(operation, params, multi=multi)
+        start = time.perf_counter()
+        result = super().execute(operation, params, multi=multi)
+        if multi:
+            self._statement = None
+            return self._traced_results(operation, params, start, result)
+        self._statement = tracer.record(
+            operation, params, time.perf_counter() - start, self._rowcount())
+        return result
+
+    def _traced_results(self, operation, params, start, results):
+        # A batch runs as its results are consumed: it is recorded once
+        # the caller is done with it, with the rows every statement
+        # returned or changed (rowcount of a read result counts the rows
+        # fetched from it)
+        rows = 0
+        try:
+            for result in results:
+                yield result
+                rowcount = getattr(result, 'rowcount', -1)
+                if isinstance(rowcount, int) and rowcount > 0:
+                    rows += rowcount
+        finally:
+            tracer.record(operation, params, time.perf_counter() - start, rows)
+
+    def executemany(self, operation, seq_params):
+        if not tracer.active:
+            return super().executemany(operation, seq_params)
+        seq_params = list(seq_params)
+        start = time.perf_counter()
+        result = super().executemany(operation, seq_params)
+        self._statement = tracer.record(
+            operation, seq_params[0] if seq_params else None,
+            time.perf_counter() - start, self._rowcount(), many=len(seq_params))
+        return result
+
+    def _rowcount(self):
+        # Result rows are counted as they are fetched (None until then);
+        # rowcount is only meaningful here for writes
+        if getattr(self._cursor, 'with_rows', False):
+            return None
+        rowcount = getattr(self._cursor, 'rowcount', -1)
+        return rowcount if isinstance(rowcount, int) and rowcount >= 0 else 0
+
+    def _count_rows(self, rows):
+        if self._statement is not None and rows:
+            self._statement['rows'] = (self._statement['rows'] or 0) + (
+                len(rows) if isinstance(rows, list) else 1)
+        return rows
+
+    def fetchone(self):
+        return self._count_rows(super().fetchone())
+
+    def fetchmany(self, size=1):
+        return self._count_rows(super().fetchmany(size))
+
+    def fetchall(self):
+        return self._count_rows(super().fetchall())
@@ -0,0 +1,257 @@
+import heapq
+import os
+import re
+import threading
+import time
+from bisect import bisect_left, bisect_right, insort
+
+_TOKEN_RE = re.compile(r'[a-z0-9]+')
+
+
+def tokenize(text):
+    if not text:
+        return []
+    return _TOKEN_RE.findall(str(text).lower())
+
+
+def normalize(text):
+    return ' '.join(tokenize(text))
+
+
+class ShopSearchIndex:
+    """In-process inverted index over shop name, street, barangay and services.
+
+    Every query term is treated as a prefix, so "wash" matches "washing".
+    Results come back ordered by shop id, which keeps cursor pagination
+    stable while shops are being added.
+
+    Writes in other worker processes arrive over the event bus; the index
+    is also rebuilt from the database once it is max_age seconds old, for
+    changes made outside the app or lost on the way (0 never rebuilds).
+    """
+
+    SHOP_FIELDS = ('shop_name', 'street', 'barangay')
+
+    def __init__(self, max_age=300):
+        self.max_age = max_age
+        self._lock = threading.RLock()
+        self.loaded = False
+        self.loaded_at = None
+        self._clear()
+
+    def _clear(self):
+        self._shops = {}          # shop_id -> public payload
+        self._shop_tokens = {}    # shop_id -> tokens from SHOP_FIELDS
+        self._services = {}       # service_id -> (shop_id, name)
+        self._postings = {}       # token -> set(shop_id)
+        self._vocab = []          # sorted list of tokens, for prefix lookups
+        self._service_postings = {}
+        self._service_vocab = []
+        self._by_barangay = {}    # normalized barangay -> set(shop_id)
+        self._ids = []            # sorted shop ids
+
+    # -- building -----------------------------------------------------
+
+    def rebuild(self, shops, services):
+        with self._lock:
+            self._clear()
+            for shop in shops:
+                self._add_shop(shop)
+            for service in services:
+                self._add_service(service['shop_id'], service['id'],
+                                  service['service_name'], service.get('price'))
+            self.loaded = True
+            self.loaded_at = time.monotonic()
+
+    def _stale(self):
+        if not self.loaded:
+            return True
+        return bool(self.max_age) and time.monotonic() - self.loaded_at >= self.max_age
+
+    def ensure_loaded(self, loader):
+        """Build the index from loader() -> (shops, services) on first use,
+        and again once it is older than max_age.
+
+        The loader runs under the index lock so writes that commit while it
+        reads are applied on top of the snapshot rather than lost. A failed
+        refresh keeps serving the old index and is retried after max_age.
+        """
+        if not self._stale():
+            return
+        with self._lock:
+            if not self._stale():
+                return
+            try:
+                self.rebuild(*loader())
+            except Exception as e:
+                if not self.loaded:
+                    raise
+                print(f"Search index refresh failed, keeping the old one: {e}")
+                self.loaded_at = time.monotonic()
+
+    def add_shop(self, shop):
+        with self._lock:
+            if self.loaded:
+                self._add_shop(shop)
+
+    def remove_shop(self, shop_id):
+        with self._lock:
+            if not self.loaded or shop_id not in self._shops:
+                return
+            for service_id, (owner, _) in list(self._services.items()):
+                if owner == shop_id:
+                    self._remove_service(service_id)
+            self._remove_shop_tokens(shop_id)
+            del self._shops[shop_id]
+            del self._ids[bisect_left(self._ids, shop_id)]
+
+    def add_service(self, shop_id, service_id, name, price=None):
+        with self._lock:
+            if self.loaded:
+                self._add_service(shop_id, service_id, name, price)
+
+    def update_service(self, service_id, name, price=None):
+        with self._lock:
+            if self.loaded and service_id in self._services:
+                shop_id = self._services[service_id][0]
+                self._remove_service(service_id)
+                self._add_service(shop_id, service_id, name, price)
+
+    def remove_service(self, service_id):
+        with self._lock:
+            if self.loaded:
+                self._remove_service(service_id)
+
+    def _add_shop(self, shop):
+        """Index shop, or re-index its own fields when it is already here.
+
+        Services are indexed separately (_add_service); a re-indexed shop
+        keeps the ones it has, with their postings.
+        """
+        shop_id = shop['id']
+        services = []
+        if shop_id in self._shops:
+            services = self._shops[shop_id]['services']
+            self._remove_shop_tokens(shop_id)
+        else:
+            insort(self._ids, shop_id)
+
+        payload = dict(shop)
+        payload['services'] = services
+        self._shops[shop_id] = payload
+
+        tokens = set()
+        for field in self.SHOP_FIELDS:
+            tokens.update(tokenize(shop.get(field)))
+        self._shop_tokens[shop_id] = tokens
+        for token in tokens:
+            self._post(self._postings, self._vocab, token, shop_id)
+
+        barangay = normalize(shop.get('barangay'))
+        self._by_barangay.setdefault(barangay, set()).add(shop_id)
+
+    def _remove_shop_tokens(self, shop_id):
+        for token in self._shop_tokens.pop(shop_id, ()):
+            self._unpost(self._postings, self._vocab, token, shop_id)
+        barangay = normalize(self._shops[shop_id].get('barangay'))
+        bucket = self._by_barangay.get(barangay)
+        if bucket is not None:
+            bucket.discard(shop_id)
+            if not bucket:
+                del self._by_barangay[barangay]
+
+    def _add_service(self, shop_id, service_id, name, price):
+        shop = self._shops.get(shop_id)
+        if shop is None:
+            return
+        self._services[service_id] = (shop_id, name)
+        shop['services'].append({
+            'id': service_id,
+            'name': name,
+            'price': float(price) if price is not None else None
+        })
+        for token in tokenize(name):
+            self._post(self._service_postings, self._service_vocab, token, shop_id)
+
+    def _remove_service(self, service_id):
+        entry = self._services.pop(service_id, None)
+        if entry is None:
+            return
+        shop_id, name = entry
+        shop = self._shops[shop_id]
+        shop['services'] = [s for s in shop['services'] if s['id'] != service_id]
+        # Another service of the same shop may share tokens with this one
+        remaining = set()
+        for service in shop['services']:
+            remaining.update(tokenize(service['name']))
+        for token in set(tokenize(name)) - remaining:
+            self._unpost(self._service_postings, self._service_vocab, token, shop_id)
+
+    @staticmethod
+    def _post(postings, vocab, token, shop_id):
+        bucket = postings.get(token)
+        if bucket is None:
+            bucket = postings[token] = set()
+            insort(vocab, token)
+        bucket.add(shop_id)
+
+    @staticmethod
+    def _unpost(postings, vocab, token, shop_id):
+        bucket = postings.get(token)
+        if bucket is None:
+            return
+        bucket.discard(shop_id)
+        if not bucket:
+            del postings[token]
+            del vocab[bisect_left(vocab, token)]
+
+    # -- querying -----------------------------------------------------
+
+    @staticmethod
+    def _prefix_match(postings, vocab, prefix):
+        start = bisect_left(vocab, prefix)
+        end = bisect_left(vocab, prefix + '\uffff', start)
+        if end - start == 1:
+            return postings[vocab[start]]
+        matched = set()
+        for token in vocab[start:end]:
+            matched |= postings[token]
+        return matched
+
+    def search(self, q=None, barangay=None, service=None, after_id=None, limit=20):
+        """Return (shops, has_more) for shops matching every filter."""
+        with self._lock:
+            candidates = []
+            for token in tokenize(q):
+                # A term may hit the shop fields or one of its services
+                candidates.append(
+                    self._prefix_match(self._postings, self._vocab, token) |
+                    self._prefix_match(self._service_postings, self._service_vocab, token)
+                )
+            if barangay:
+                candidates.append(self._by_barangay.get(normalize(barangay), set()))
+            for token in tokenize(service):
+                candidates.append(self._prefix_match(
+                    self._service_postings, self._service_vocab, token))
+
+            start = bisect_right(self._ids, after_id) if after_id is not None else 0
+            if not candidates:
+                page_ids = self._ids[start:start + limit + 1]
+            else:
+                candidates.sort(key=len)
+                matched = set.intersection(*candidates) if len(candidates) > 1 else candidates[0]
+                if after_id is not None:
+                    matched = [shop_id for shop_id in matched if shop_id > after_id]
+                page_ids = heapq.nsmallest(limit + 1, matched)
+
+            has_more = len(page_ids) > limit
+            shops = []
+            for shop_id in page_ids[:limit]:
+                shop = dict(self._shops[shop_id])
+                shop['services'] = list(shop['services'])
+                shops.append(shop)
+            return shops, has_more
+
+
+def search_index_from_env():
+    return ShopSearchIndex(max_age=float(os.getenv('SHOP_INDEX_MAX_AGE', '300')))
@@ -0,0 +1,126 @@
+import os
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+
+from flask.json import JSONEncoder
+from mysql.connector.constants import FieldType
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+DATETIME_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+def format_timedelta(value):
+    # MySQL TIME columns come back as timedelta; render them as HH:MM:SS
+    seconds = int(value.total_seconds())
+    sign = '-' if seconds < 0 else ''
+    seconds = abs(seconds)
+    return f"{sign}{seconds // 3600:02d}:{seconds % 3600 // 60:02d}:{seconds % 60:02d}"
+
+# Exact-type dispatch: one dict lookup per value instead of isinstance chains
+JSON_ENCODERS = {
+    Decimal: float,
+    datetime: lambda value: value.strftime(DATETIME_FORMAT),
+    date: lambda value: value.isoformat(),
+    time: lambda value: value.strftime('%H:%M:%S'),
+    timedelta: format_timedelta,
+}
+
+def json_default(value):
+    """JSON form of the column types MySQL hands back; the one place the
+    API's date and number formats are decided."""
+    encode = JSON_ENCODERS.get(type(value))
+    if encode is None:
+        # Subclasses; datetime has to be tried before date
+        for kind in (Decimal, datetime, date, time, timedelta):
+            if isinstance(value, kind):
+                encode = JSON_ENCODERS[kind]
+                break
+        else:
+            raise TypeError(f'Object of type {type(value).__name__} is not JSON serializable')
+    return encode(value)
+
+
+class RowJSONEncoder(JSONEncoder):
+    """app.json_encoder that writes database rows as they come off the cursor.
+
+    Decimal, datetime, date, time and timedelta are encoded natively, so
+    routes can jsonify fetchall() results without converting them first.
+    When orjson is installed (and JSON_ORJSON is not 0) compact output goes
+    through it; indented output keeps using the standard library.
+    """
+
+    use_orjson = orjson is not None and os.getenv('JSON_ORJSON', '1') != '0'
+
+    def default(self, o):
+        encode = JSON_ENCODERS.get(type(o))
+        if encode is not None:
+            return encode(o)
+        try:
+            return json_default(o)
+        except TypeError:
+            return super().default(o)
+
+    def encode(self, o):
+        if self.use_orjson and self.indent is None:
+            option = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS
+            if self.sort_keys:
+                option |= orjson.OPT_SORT_KEYS
+            return orjson.dumps(o, default=self.default, option=option).decode('utf-8')
+        return super().encode(o)
+
+
+# Column types whose values need converting, by cursor.description type code
+FIELD_CONVERTERS = {
+    FieldType.DECIMAL: float,
+    FieldType.NEWDECIMAL: float,
+    FieldType.DATETIME: lambda value: value.strftime(DATETIME_FORMAT),
+    FieldType.TIMESTAMP: lambda value: value.strftime(DATETIME_FORMAT),
+    FieldType.DATE: lambda value: value.isoformat(),
+    FieldType.TIME: format_timedelta,
+}
+
+def row_converter(description, overrides=None):
+    """Converter for the dict rows of one result set, built from its
+    cursor.description.
+
+    The columns to touch are worked out once per query instead of with an
+    isinstance check per value; the returned function converts a row in
+    place and returns it. Use it where rows must be plain JSON data before
+    they leave the controller (e.g. cached values); responses do not need
+    it, RowJSONEncoder handles these types. overrides maps a column name
+    to its own converter.
+    """
+    overrides = overrides or {}
+    converters = []
+    for column in description or ():
+        name, type_code = column[0], column[1]
+        convert = overrides.get(name) or FIELD_CONVERTERS.get(type_code)
+        if convert:
+            converters.append((name, convert))
+
+    if not converters:
+        return lambda row: row
+
+    def convert_row(row):
+        for name, convert in converters:
+            value = row[name]
+            if value is not None:
+                row[name] = convert(value)
+        return row
+    return convert_row
+
+def field_converter(**converters):
+    """Converter for named fields only, for routes whose response keeps a
+    field in a format of its own (e.g. an amount as a string)."""
+    items = tuple(converters.items())
+
+    def convert_row(row):
+        for name, convert in items:
+            value = row.get(name)
+            if value is not None:
+                row[name] = convert(value)
+        return row
+    return convert_row
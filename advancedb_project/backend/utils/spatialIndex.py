@@ -0,0 +1,147 @@
+import heapq
+import math
+import os
+import threading
+import time
+
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE_LAT = 111.32
+
+
+def haversine_km(lat1, lng1, lat2, lng2):
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    dphi = phi2 - phi1
+    dlmb = math.radians(lng2 - lng1)
+    a = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlmb / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+class ShopSpatialIndex:
+    """Uniform lat/lng grid of shop locations.
+
+    A radius query only visits the cells overlapping the query's bounding
+    box, so the haversine is computed for nearby candidates instead of for
+    every shop in the table.
+
+    Like the search index, it hears of other workers' writes over the
+    event bus and is rebuilt once it is max_age seconds old (0 never).
+    """
+
+    def __init__(self, cell_degrees=0.01, max_age=300):
+        # 0.01 degrees is ~1.1 km of latitude, about one barangay
+        self.cell_degrees = cell_degrees
+        self.max_age = max_age
+        self._lock = threading.RLock()
+        self.loaded = False
+        self.loaded_at = None
+        self._cells = {}      # (row, col) -> {shop_id: (lat, lng)}
+        self._locations = {}  # shop_id -> (row, col)
+        self._shops = {}      # shop_id -> public payload
+
+    def _cell(self, lat, lng):
+        return (math.floor(lat / self.cell_degrees), math.floor(lng / self.cell_degrees))
+
+    def _stale(self):
+        if not self.loaded:
+            return True
+        return bool(self.max_age) and time.monotonic() - self.loaded_at >= self.max_age
+
+    def ensure_loaded(self, loader):
+        if not self._stale():
+            return
+        with self._lock:
+            if not self._stale():
+                return
+            try:
+                self.rebuild(loader())
+            except Exception as e:
+                if not self.loaded:
+                    raise
+                print(f"Spatial index refresh failed, keeping the old one: {e}")
+                self.loaded_at = time.monotonic()
+
+    def rebuild(self, shops):
+        with self._lock:
+            self._cells = {}
+            self._locations = {}
+            self._shops = {}
+            for shop in shops:
+                self._put(shop)
+            self.loaded = True
+            self.loaded_at = time.monotonic()
+
+    def put(self, shop):
+        with self._lock:
+            if self.loaded:
+                self._put(shop)
+
+    def remove(self, shop_id):
+        with self._lock:
+            self._remove(shop_id)
+
+    def _put(self, shop):
+        shop_id = shop['id']
+        self._remove(shop_id)
+        lat, lng = shop.get('latitude'), shop.get('longitude')
+        if lat is None or lng is None:
+            return
+        lat, lng = float(lat), float(lng)
+        cell = self._cell(lat, lng)
+        self._cells.setdefault(cell, {})[shop_id] = (lat, lng)
+        self._locations[shop_id] = cell
+        self._shops[shop_id] = dict(shop)
+
+    def _remove(self, shop_id):
+        cell = self._locations.pop(shop_id, None)
+        if cell is None:
+            return
+        bucket = self._cells[cell]
+        del bucket[shop_id]
+        if not bucket:
+            del self._cells[cell]
+        del self._shops[shop_id]
+
+    def nearby(self, lat, lng, radius_km, limit=20):
+        """Return up to limit shops within radius_km, closest first."""
+        dlat = radius_km / KM_PER_DEGREE_LAT
+        # Longitude degrees shrink towards the poles
+        cos_lat = max(math.cos(math.radians(lat)), 1e-6)
+        dlng = radius_km / (KM_PER_DEGREE_LAT * cos_lat)
+
+        row_lo, col_lo = self._cell(lat - dlat, lng - dlng)
+        row_hi, col_hi = self._cell(lat + dlat, lng + dlng)
+
+        hits = []
+        with self._lock:
+            # Sparse data with a large radius: walking the occupied cells is
+            # cheaper than probing every empty cell in the bounding box
+            box_cells = (row_hi - row_lo + 1) * (col_hi - col_lo + 1)
+            if box_cells > len(self._cells):
+                cells = [
+                    bucket for (row, col), bucket in self._cells.items()
+                    if row_lo <= row <= row_hi and col_lo <= col <= col_hi
+                ]
+            else:
+                cells = [
+                    self._cells[(row, col)]
+                    for row in range(row_lo, row_hi + 1)
+                    for col in range(col_lo, col_hi + 1)
+                    if (row, col) in self._cells
+                ]
+            for bucket in cells:
+                for shop_id, (shop_lat, shop_lng) in bucket.items():
+                    distance = haversine_km(lat, lng, shop_lat, shop_lng)
+                    if distance <= radius_km:
+                        hits.append((distance, shop_id))
+
+            results = []
+            for distance, shop_id in heapq.nsmallest(limit, hits):
+                shop = dict(self._shops[shop_id])
+                shop['distance_km'] = round(distance, 3)
+                shop['distance'] = f"{distance:.1f} km"
+                results.append(shop)
+            return results
+
+
+def spatial_index_from_env():
+    return ShopSpatialIndex(max_age=float(os.getenv('SHOP_INDEX_MAX_AGE', '300')))
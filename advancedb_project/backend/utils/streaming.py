@@ -0,0 +1,31 @@
+import json
+
+# Bytes gathered before a piece of the body is handed to the server
+FLUSH_BYTES = 64 * 1024
+
+def json_object_stream(array_key, items, head=None, tail=None, dumps=json.dumps):
+    """Yield {**head, array_key: [items...], **tail()} as JSON text, piecewise.
+
+    items is consumed lazily and each item is serialized on its own, so
+    the full list never exists in memory. tail is called after the last
+    item, for fields that depend on the rows (e.g. next_cursor).
+    """
+    opening = dumps(head or {})[:-1]
+    if head:
+        opening += ', '
+    buffer = [opening + dumps(array_key) + ': [']
+    size = len(buffer[0])
+    first = True
+    for item in items:
+        piece = dumps(item) if first else ', ' + dumps(item)
+        first = False
+        buffer.append(piece)
+        size += len(piece)
+        if size >= FLUSH_BYTES:
+            yield ''.join(buffer)
+            buffer, size = [], 0
+    closing = ']'
+    for key, value in (tail() if tail else {}).items():
+        closing += f', {dumps(key)}: {dumps(value)}'
+    buffer.append(closing + '}')
+    yield ''.join(buffer)
@@ -0,0 +1,74 @@
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+
+import jwt
+
+
+class VerifiedTokenCache:
+    """Bounded LRU of tokens that already passed jwt.decode.
+
+    Keys are SHA-256 digests of the token, so raw bearer tokens are never
+    kept in memory longer than the request. A cached payload is only
+    served until the token's exp; after that the token goes through
+    jwt.decode again, which raises the usual ExpiredSignatureError.
+    Failed verifications are never cached.
+    """
+
+    def __init__(self, max_entries=4096):
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._data = OrderedDict()  # digest -> (exp or None, payload)
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _digest(token, key, algorithms):
+        material = '\0'.join([token, key, *algorithms]).encode('utf-8')
+        return hashlib.sha256(material).digest()
+
+    def decode(self, token, key, algorithms):
+        digest = self._digest(token, key, algorithms)
+        now = time.time()
+        with self._lock:
+            entry = self._data.get(digest)
+            if entry is not None:
+                exp, payload = entry
+                if exp is None or now <= exp:
+                    self._data.move_to_end(digest)
+                    self.hits += 1
+                    return dict(payload)
+                del self._data[digest]
+            self.misses += 1
+
+        payload = jwt.decode(token, key, algorithms=algorithms)
+
+        # A token that is not valid yet must keep being checked by PyJWT
+        if 'nbf' in payload and payload['nbf'] > now:
+            return payload
+        exp = payload.get('exp')
+        with self._lock:
+            self._data[digest] = (exp, dict(payload))
+            self._data.move_to_end(digest)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+        return payload
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def stats(self):
+        with self._lock:
+            return {
+                'size': len(self._data),
+                'max_entries': self.max_entries,
+                'hits': self.hits,
+                'misses': self.misses,
+            }
+
+
+def token_cache_from_env():
+    return VerifiedTokenCache(max_entries=int(os.getenv('JWT_CACHE_SIZE', '4096')))
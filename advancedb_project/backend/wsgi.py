@@ -0,0 +1,27 @@
+"""Production entry point.
+
+    gunicorn -c gunicorn.conf.py wsgi:app
+
+or, without gunicorn, a single eventlet server:
+
+    python wsgi.py
+"""
+import os
+
+os.environ.setdefault('SOCKETIO_ASYNC_MODE', 'eventlet')
+
+if __name__ == '__main__' and os.environ['SOCKETIO_ASYNC_MODE'] == 'eventlet':
+    # gunicorn's eventlet worker patches before loading the app; running
+    # this file directly has to do it before anything imports socket
+    import eventlet
+    eventlet.monkey_patch()
+    os.environ.setdefault('DB_USE_PURE', '1')
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+from app import app, socketio  # noqa: E402
+
+if __name__ == '__main__':
+    socketio.run(app, host=os.getenv('HOST', '0.0.0.0'), port=int(os.getenv('PORT', '5000')))
@@ -3,6 +3,88 @@ import 'package:socket_io_client/socket_io_client.dart' as IO;
 class SocketService {
   static IO.Socket? socket;
   static bool isConnected = false;
+  static final Map<String, List<Function(dynamic)>> _handlers = {};
+  // Events with a dispatcher on the current socket
+  static final Set<String> _dispatching = {};
+
+  // Rooms this client is in (room -> join event and payload) and the last
+  // sequence number seen in each, so a reconnect only replays the gap
+  static final Map<String, MapEntry<String, Map<String, dynamic>>> _rooms = {};
+  static final Map<String, int> _lastSeq = {};
+  static final List<Function(String)> _resyncHandlers = [];
+
+  // Frames carry their room and seq; anything at or below the last seq
+  // of its room was already handled (live and replayed copies can overlap)
+  static bool _isFresh(dynamic payload) {
+    if (payload is! Map || payload['room'] == null || payload['seq'] is! int) {
+      return true;
+    }
+    final room = payload['room'].toString();
+    final int seq = payload['seq'];
+    if (seq <= (_lastSeq[room] ?? 0)) return false;
+    _lastSeq[room] = seq;
+    return true;
+  }
+
+  // One socket listener per event checks a frame's freshness once and then
+  // fans it out to every handler registered for the event; checking per
+  // handler would advance _lastSeq on the first and drop the frame for the
+  // rest. Handlers added before the socket exists are attached with it.
+  static void _on(String event, Function(dynamic) handler) {
+    _handlers.putIfAbsent(event, () => []).add(handler);
+    _attachDispatchers();
+  }
+
+  static void _attachDispatchers() {
+    if (socket == null) return;
+    // The backend coalesces a room's events into one `updates` frame
+    // ({'events': [{'event': ..., 'data': ...}]}); the frame's seq covers
+    // all of them, and each entry goes to the handlers of its event, in order
+    if (_dispatching.add('updates')) {
+      socket!.on('updates', (frame) {
+        if (frame is! Map || frame['events'] is! List) return;
+        if (!_isFresh(frame)) return;
+        for (final entry in frame['events']) {
+          _dispatch(entry['event'], entry['data']);
+        }
+      });
+    }
+    for (final event in _handlers.keys) {
+      if (_dispatching.add(event)) {
+        socket!.on(event, (data) {
+          if (_isFresh(data)) _dispatch(event, data);
+        });
+      }
+    }
+  }
+
+  static void _dispatch(String event, dynamic data) {
+    for (final handler in List.of(_handlers[event] ?? const <Function(dynamic)>[])) {
+      handler(data);
+    }
+  }
+
+  static void _join(String room, String event, Map<String, dynamic> payload) {
+    _rooms[room] = MapEntry(event, payload);
+    if (isConnected) {
+      _emitJoin(room);
+    }
+  }
+
+  static void _emitJoin(String room) {
+    final join = _rooms[room];
+    if (join == null) return;
+    socket?.emit(join.key, {
+      ...join.value,
+      if (_lastSeq.containsKey(room)) 'last_seq': _lastSeq[room],
+    });
+  }
+
+  // Called when the backend could not replay everything this client
+  // missed; the screen should refetch its list
+  static void listenToResync(Function(String room) onResync) {
+    _resyncHandlers.add(onResync);
+  }
 
   static void initializeSocket() {
     if (socket != null) return;
@@ -14,10 +96,33 @@ class SocketService {
       'reconnectionDelay': 1000,
       'reconnectionAttempts': 5
     });
+    _attachDispatchers();
 
     socket?.onConnect((_) {
       print('Socket Connected');
       isConnected = true;
+      // Also runs after a reconnect: rejoin with the last seq seen
+      for (final room in _rooms.keys) {
+        _emitJoin(room);
+      }
+    });
+
+    socket?.on('room_joined', (data) {
+      print('Room joined confirmation: $data');
+      if (data is Map && data['seq'] is int) {
+        _lastSeq.putIfAbsent(data['room'].toString(), () => data['seq']);
+      }
+    });
+
+    socket?.on('resync', (data) {
+      if (data is! Map) return;
+      final room = data['room'].toString();
+      if (data['seq'] is int) {
+        _lastSeq[room] = data['seq'];
+      }
+      for (final handler in _resyncHandlers) {
+        handler(room);
+      }
     });
 
     socket?.onDisconnect((_) {
@@ -38,20 +143,16 @@ class SocketService {
     }
     
     if (userId.isNotEmpty) {
-      socket?.emit('join_user_room', {'user_id': userId});
+      _join('user_$userId', 'join_user_room', {'user_id': userId});
       print('Joining user room: $userId');
     }
   }
 
   static void listenToStatusUpdates(Function(dynamic) onStatusUpdate) {
-    socket?.on('status_update', (data) {
+    _on('status_update', (data) {
       print('Status update received: $data');
       onStatusUpdate(data);
     });
-
-    socket?.on('room_joined', (data) {
-      print('Room joined confirmation: $data');
-    });
   }
 
   static void joinShopRoom(String shopId) {
@@ -61,13 +162,22 @@ class SocketService {
     }
     
     if (shopId.isNotEmpty) {
-      socket?.emit('join_shop_room', {'shop_id': shopId});
+      _join('shop_$shopId', 'join_shop_room', {'shop_id': shopId});
       print('Joining shop room: $shopId');
     }
   }
 
+  // {'shop_id': ..., 'counts': {'pending': n, ...}, 'delta': {...}}
+  static void listenToOrderCounts(Function(Map<String, dynamic>) onOrderCounts) {
+    _on('order_counts', (data) {
+      if (data != null && data is Map) {
+        onOrderCounts(Map<String, dynamic>.from(data));
+      }
+    });
+  }
+
   static void listenToTransactionUpdates(Function(Map<String, dynamic>) onNewTransaction) {
-    socket?.on('new_transaction', (data) {
+    _on('new_transaction', (data) {
       print('New transaction received: $data');
       if (data != null && data is Map) {
         onNewTransaction(Map<String, dynamic>.from(data));
@@ -81,6 +191,11 @@ class SocketService {
       socket?.close();
       socket = null;
       isConnected = false;
+      _handlers.clear();
+      _dispatching.clear();
+      _rooms.clear();
+      _lastSeq.clear();
+      _resyncHandlers.clear();
       print('Socket disposed');
     }
   }
@@ -10,6 +10,7 @@ import 'ExpandCancelledOrder.dart';
 import 'ExpandOngoingOrder.dart';
 import 'ExpandCompleteOrder.dart';
 import '../../Sockets/socketService.dart';
+import '../../user/Transaction/transaction_service.dart';
 
 class CustomerOrders extends StatefulWidget {
   final int userId;
@@ -31,12 +32,15 @@ class _CustomerOrdersState extends State<CustomerOrders> {
   bool _isLoading = false;
   String _error = '';
   List<Map<String, dynamic>> _shopOrders = [];
+  // Tab badge counts by status, from /order_counts and the shop room
+  Map<String, int> _orderCounts = {};
 
   @override
   void initState() {
     super.initState();
     _initializeSocket();
     _fetchShopOrders();
+    _fetchOrderCounts();
   }
 
   void _initializeSocket() {
@@ -49,6 +53,24 @@ class _CustomerOrdersState extends State<CustomerOrders> {
     }
     
     SocketService.joinShopRoom(shopId);
+
+    // Missed orders are replayed on reconnect; only refetch when the
+    // backend says the gap is too old to replay
+    SocketService.listenToResync((_) {
+      if (!mounted) return;
+      _fetchShopOrders();
+      _fetchOrderCounts();
+    });
+
+    // Counts arrive with every order change in this shop; no list fetch
+    SocketService.listenToOrderCounts((data) {
+      if (!mounted || data['shop_id']?.toString() != shopId) return;
+      if (data['counts'] is Map) {
+        setState(() {
+          _orderCounts = _parseCounts(data['counts']);
+        });
+      }
+    });
     
     SocketService.listenToTransactionUpdates((data) {
       if (!mounted) return;
@@ -84,32 +106,58 @@ class _CustomerOrdersState extends State<CustomerOrders> {
       _error = '';
     });
 
+    try {
+      // Only the ongoing orders are listed here; the other statuses show
+      // as counts, which come from /order_counts
+      final ongoingOrders = await TransactionService.fetchAllTransactions(
+        owner: 'shop',
+        ownerId: widget.shopData['id'],
+        token: widget.token,
+        status: 'Processing',
+      );
+      setState(() {
+        _shopOrders = ongoingOrders;
+        _isLoading = false;
+      });
+    } catch (e) {
+      setState(() {
+        _error = e.toString();
+        _isLoading = false;
+      });
+    }
+  }
+
+  Future<void> _fetchOrderCounts() async {
     try {
       final response = await http.get(
-        Uri.parse('http://localhost:5000/user_transactions/${widget.shopData['id']}'),
+        Uri.parse('http://localhost:5000/shop/${widget.shopData['id']}/order_counts'),
         headers: {
           'Authorization': 'Bearer ${widget.token}',
           'Content-Type': 'application/json',
         },
       );
 
-      if (response.statusCode == 200) {
+      if (response.statusCode == 200 && mounted) {
         final data = jsonDecode(response.body);
         setState(() {
-          _shopOrders = List<Map<String, dynamic>>.from(data['data'] ?? []);
-          _isLoading = false;
+          _orderCounts = _parseCounts(data['counts'] ?? {});
         });
-      } else {
-        throw Exception('Failed to load orders');
       }
     } catch (e) {
-      setState(() {
-        _error = e.toString();
-        _isLoading = false;
-      });
+      print('Error fetching order counts: $e');
     }
   }
 
+  Map<String, int> _parseCounts(Map counts) {
+    return counts.map((status, count) =>
+      MapEntry(status.toString(), int.tryParse(count.toString()) ?? 0));
+  }
+
+  // Falls back to counting the loaded list until the counts arrive
+  int _countFor(String status) {
+    return _orderCounts[status] ?? _filterOrdersByStatus(status).length;
+  }
+
   List<Map<String, dynamic>> _filterOrdersByStatus(String status) {
     return _shopOrders.where((order) => 
       order['status']?.toString().toLowerCase() == status.toLowerCase()
@@ -140,7 +188,7 @@ class _CustomerOrdersState extends State<CustomerOrders> {
 
   // Card building methods remain the same as your original implementation
   Widget _buildNewOrdersCard() {
-    final newOrders = _filterOrdersByStatus('pending');
+    final newCount = _countFor('pending');
     return GestureDetector(
       onTap: () {
         Navigator.push(
@@ -163,7 +211,7 @@ class _CustomerOrdersState extends State<CustomerOrders> {
           child: Center(
             child: Padding(
               padding: const EdgeInsets.all(16),
-              child: newOrders.isEmpty
+              child: newCount == 0
                 ? const Text(
                     'No new orders yet.',
                     style: TextStyle(fontSize: 16, color: Colors.black87),
@@ -172,7 +220,7 @@ class _CustomerOrdersState extends State<CustomerOrders> {
                     mainAxisAlignment: MainAxisAlignment.center,
                     children: [
                       Text(
-                        newOrders.length.toString(),
+                        newCount.toString(),
                         style: TextStyle(
                           fontSize: 24,
                           fontWeight: FontWeight.bold,
@@ -181,7 +229,7 @@ class _CustomerOrdersState extends State<CustomerOrders> {
                       ),
                       const SizedBox(width: 16),
                       Text(
-                        'New Order${newOrders.length > 1 ? 's' : ''}',
+                        'New Order${newCount > 1 ? 's' : ''}',
                         style: const TextStyle(
                           fontSize: 16,
                           fontWeight: FontWeight.w500,
@@ -197,7 +245,7 @@ class _CustomerOrdersState extends State<CustomerOrders> {
   }
 
   Widget _buildCancelledOrdersCard() {
-    final cancelledOrders = _filterOrdersByStatus('cancelled');
+    final cancelledCount = _countFor('cancelled');
     return GestureDetector(
       onTap: () {
         Navigator.push(
@@ -220,7 +268,7 @@ class _CustomerOrdersState extends State<CustomerOrders> {
           child: Center(
             child: Padding(
               padding: const EdgeInsets.all(16),
-              child: cancelledOrders.isEmpty
+              child: cancelledCount == 0
                 ? const Text(
                     'No cancelled orders yet.',
                     style: TextStyle(fontSize: 16, color: Colors.black87),
@@ -229,7 +277,7 @@ class _CustomerOrdersState extends State<CustomerOrders> {
                     mainAxisAlignment: MainAxisAlignment.center,
                     children: [
                       Text(
-                        cancelledOrders.length.toString(),
+                        cancelledCount.toString(),
                         style: TextStyle(
                           fontSize: 24,
                           fontWeight: FontWeight.bold,
@@ -238,7 +286,7 @@ class _CustomerOrdersState extends State<CustomerOrders> {
                       ),
                       const SizedBox(width: 16),
                       Text(
-                        'Cancelled Order${cancelledOrders.length > 1 ? 's' : ''}',
+                        'Cancelled Order${cancelledCount > 1 ? 's' : ''}',
                         style: const TextStyle(
                           fontSize: 16,
                           fontWeight: FontWeight.w500,
@@ -351,7 +399,7 @@ class _CustomerOrdersState extends State<CustomerOrders> {
   }
 
   Widget _buildCompletedOrdersCard() {
-    final completedOrders = _filterOrdersByStatus('completed');
+    final completedCount = _countFor('completed');
     return GestureDetector(
       onTap: () {
         Navigator.push(
@@ -374,7 +422,7 @@ class _CustomerOrdersState extends State<CustomerOrders> {
           child: Center(
             child: Padding(
               padding: const EdgeInsets.all(16),
-              child: completedOrders.isEmpty
+              child: completedCount == 0
                 ? const Text(
                     'No completed orders yet.',
                     style: TextStyle(fontSize: 16, color: Colors.black87),
@@ -383,7 +431,7 @@ class _CustomerOrdersState extends State<CustomerOrders> {
                     mainAxisAlignment: MainAxisAlignment.center,
                     children: [
                       Text(
-                        completedOrders.length.toString(),
+                        completedCount.toString(),
                         style: TextStyle(
                           fontSize: 24,
                           fontWeight: FontWeight.bold,
@@ -392,7 +440,7 @@ class _CustomerOrdersState extends State<CustomerOrders> {
                       ),
                       const SizedBox(width: 16),
                       Text(
-                        'Completed Order${completedOrders.length > 1 ? 's' : ''}',
+                        'Completed Order${completedCount > 1 ? 's' : ''}',
                         style: const TextStyle(
                           fontSize: 16,
                           fontWeight: FontWeight.w500,
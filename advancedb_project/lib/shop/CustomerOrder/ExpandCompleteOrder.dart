@@ -1,12 +1,11 @@
 import 'package:flutter/material.dart';
-import 'package:http/http.dart' as http;
-import 'dart:convert';
 import '../OrderScreen/OrderScreen.dart';
 import '../ProfileShop/ShopProfile.dart';
 import '../ShopDashboard/homescreen.dart';
 import '../Services/ServiceScreen1.dart';
 import 'CustomerOrder.dart';
 import 'CompleteDetails.dart';
+import '../../user/Transaction/transaction_service.dart';
 
 class ExpandCompleteOrder extends StatefulWidget {
   final int userId;
@@ -30,6 +29,8 @@ class _ExpandCompleteOrderState extends State<ExpandCompleteOrder> {
   String _error = '';
   List<Map<String, dynamic>> _completedOrders = [];
   List<Map<String, dynamic>> _filteredOrders = [];
+  String? _nextCursor;
+  bool _isLoadingMore = false;
 
   @override
   void initState() {
@@ -67,28 +68,19 @@ class _ExpandCompleteOrderState extends State<ExpandCompleteOrder> {
     });
 
     try {
-      final response = await http.get(
-        Uri.parse('http://localhost:5000/shop_transactions/${widget.shopData['id']}'),
-        headers: {
-          'Authorization': 'Bearer ${widget.token}',
-          'Content-Type': 'application/json',
-        },
+      final page = await TransactionService.fetchTransactionPage(
+        owner: 'shop',
+        ownerId: widget.shopData['id'],
+        token: widget.token,
+        status: 'Completed',
       );
 
-      if (response.statusCode == 200) {
-        final data = jsonDecode(response.body);
-        final allOrders = List<Map<String, dynamic>>.from(data['data'] ?? []);
-        
-        setState(() {
-          _completedOrders = allOrders.where((order) => 
-            order['status']?.toString().toLowerCase() == 'completed'
-          ).toList();
-          _filteredOrders = List.from(_completedOrders);
-          _isLoading = false;
-        });
-      } else {
-        throw Exception('Failed to load completed orders');
-      }
+      setState(() {
+        _completedOrders = page.transactions;
+        _nextCursor = page.nextCursor;
+        _isLoading = false;
+      });
+      _filterOrders();
     } catch (e) {
       setState(() {
         _error = e.toString();
@@ -97,6 +89,47 @@ class _ExpandCompleteOrderState extends State<ExpandCompleteOrder> {
     }
   }
 
+  Future<void> _loadMoreCompletedOrders() async {
+    setState(() => _isLoadingMore = true);
+    try {
+      final page = await TransactionService.fetchTransactionPage(
+        owner: 'shop',
+        ownerId: widget.shopData['id'],
+        token: widget.token,
+        status: 'Completed',
+        cursor: _nextCursor,
+      );
+      setState(() {
+        _completedOrders.addAll(page.transactions);
+        _nextCursor = page.nextCursor;
+      });
+      _filterOrders();
+    } catch (e) {
+      setState(() => _error = e.toString());
+    } finally {
+      setState(() => _isLoadingMore = false);
+    }
+  }
+
+  // Search only covers the pages loaded so far, so the button stays
+  // reachable even when nothing on them matches
+  Widget _buildLoadMore() {
+    return Padding(
+      padding: const EdgeInsets.all(8.0),
+      child: Center(
+        child: _isLoadingMore
+            ? const CircularProgressIndicator(color: Colors.white)
+            : TextButton(
+                onPressed: _loadMoreCompletedOrders,
+                child: const Text(
+                  'Load more',
+                  style: TextStyle(color: Colors.white),
+                ),
+              ),
+      ),
+    );
+  }
+
   String _formatDate(String? dateTime) {
     if (dateTime == null) return '';
     try {
@@ -320,8 +353,8 @@ class _ExpandCompleteOrderState extends State<ExpandCompleteOrder> {
                         onRefresh: _fetchCompletedOrders,
                         child: _filteredOrders.isEmpty
                           ? ListView(
-                              children: const [
-                                Center(
+                              children: [
+                                const Center(
                                   child: Padding(
                                     padding: EdgeInsets.only(top: 32.0),
                                     child: Text(
@@ -333,12 +366,14 @@ class _ExpandCompleteOrderState extends State<ExpandCompleteOrder> {
                                     ),
                                   ),
                                 ),
+                                if (_nextCursor != null) _buildLoadMore(),
                               ],
                             )
                           : ListView.builder(
-                              itemCount: _filteredOrders.length,
-                              itemBuilder: (context, index) => 
-                                _buildOrderCard(_filteredOrders[index]),
+                              itemCount: _filteredOrders.length + (_nextCursor != null ? 1 : 0),
+                              itemBuilder: (context, index) => index < _filteredOrders.length
+                                ? _buildOrderCard(_filteredOrders[index])
+                                : _buildLoadMore(),
                             ),
                       ),
               ),
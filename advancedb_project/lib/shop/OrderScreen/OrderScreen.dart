@@ -1,11 +1,11 @@
 import 'package:flutter/material.dart';
 import 'package:http/http.dart' as http;
-import 'dart:convert';
 import 'IndividualTransact.dart';
 import '../Services/ServiceScreen1.dart';
 import '../CustomerOrder/CustomerOrder.dart';
 import '../ProfileShop/ShopProfile.dart';
 import '../ShopDashboard/homescreen.dart';
+import '../../user/Transaction/transaction_service.dart';
 
 class TransactionsScreen extends StatefulWidget {
   final int userId;
@@ -23,13 +23,23 @@ class TransactionsScreen extends StatefulWidget {
   State<TransactionsScreen> createState() => _TransactionsScreenState();
 }
 
+// What each filter chip asks the server for; null lists every order
+const Map<String, String?> filterStatuses = {
+  'All': null,
+  'Cancelled': 'Cancelled',
+  'In Progress': 'Pending,Processing',
+  'Completed': 'Completed',
+};
+
 class _TransactionsScreenState extends State<TransactionsScreen> {
   final Color navyBlue = const Color(0xFF1A0066);
   bool isItemSelected = false;
   final Map<int, bool> selectedItems = {};
   String selectedFilter = 'All';
   List<Map<String, dynamic>> transactionsData = [];
+  String? nextCursor;
   bool isLoading = true;
+  bool isLoadingMore = false;
   String? error;
   bool isDeleting = false;
 
@@ -51,49 +61,18 @@ Future<void> fetchTransactions() async {
       throw Exception('No shop data available');
     }
 
-    print('Fetching transactions for shop ID: ${widget.shopData['id']}');
-    final response = await http.get(
-      Uri.parse('http://localhost:5000/shop_transactions/${widget.shopData['id']}'),
-      headers: {
-        'Content-Type': 'application/json',
-        'Authorization': 'Bearer ${widget.token}',
-      },
+    final page = await TransactionService.fetchTransactionPage(
+      owner: 'shop',
+      ownerId: widget.shopData['id'],
+      token: widget.token,
+      status: filterStatuses[selectedFilter],
     );
 
-    print('Response status: ${response.statusCode}');
-    print('Response body: ${response.body}');
-
-    if (response.statusCode == 200) {
-      final data = jsonDecode(response.body);
-      
-      if (data is Map<String, dynamic> && data.containsKey('transactions')) {
-        final transactions = List<Map<String, dynamic>>.from(data['transactions']).map((transaction) {
-          return {
-            'id': transaction['id'],
-            'transaction_id': transaction['id'],
-            'user_name': transaction['customer_name'] ?? transaction['user_name'] ?? 'N/A',
-            'service_name': transaction['service_name']?.toString() ?? 'N/A',
-            'delivery_type': transaction['delivery_type']?.toString() ?? 'N/A',
-            'status': transaction['status']?.toString() ?? 'N/A',
-            'payment_method': transaction['payment_method']?.toString() ?? 'N/A',
-            'total_amount': transaction['total_amount']?.toString() ?? '0',
-            'created_at': transaction['created_at']?.toString() ?? 'N/A',
-          };
-        }).toList();
-
-        setState(() {
-          transactionsData = transactions;
-          isLoading = false;
-        });
-      } else {
-        setState(() {
-          transactionsData = [];
-          isLoading = false;
-        });
-      }
-    } else {
-      throw Exception('Failed to load transactions: ${response.statusCode}');
-    }
+    setState(() {
+      transactionsData = page.transactions.map(_tableRow).toList();
+      nextCursor = page.nextCursor;
+      isLoading = false;
+    });
   } catch (e) {
     print('Error in fetchTransactions: $e');
     setState(() {
@@ -106,6 +85,43 @@ Future<void> fetchTransactions() async {
   }
 }
 
+  Map<String, dynamic> _tableRow(Map<String, dynamic> transaction) {
+    return {
+      'id': transaction['id'],
+      'transaction_id': transaction['id'],
+      'user_name': transaction['customer_name'] ?? transaction['user_name'] ?? 'N/A',
+      'service_name': transaction['service_name']?.toString() ?? 'N/A',
+      'delivery_type': transaction['delivery_type']?.toString() ?? 'N/A',
+      'status': transaction['status']?.toString() ?? 'N/A',
+      'payment_method': transaction['payment_method']?.toString() ?? 'N/A',
+      'total_amount': transaction['total_amount']?.toString() ?? '0',
+      'created_at': transaction['created_at']?.toString() ?? 'N/A',
+    };
+  }
+
+  Future<void> _loadMoreTransactions() async {
+    setState(() => isLoadingMore = true);
+    try {
+      final page = await TransactionService.fetchTransactionPage(
+        owner: 'shop',
+        ownerId: widget.shopData['id'],
+        token: widget.token,
+        status: filterStatuses[selectedFilter],
+        cursor: nextCursor,
+      );
+      setState(() {
+        transactionsData.addAll(page.transactions.map(_tableRow));
+        nextCursor = page.nextCursor;
+      });
+    } catch (e) {
+      _showErrorSnackBar('Error loading more transactions: $e');
+    } finally {
+      if (mounted) {
+        setState(() => isLoadingMore = false);
+      }
+    }
+  }
+
   void _showErrorSnackBar(String message) {
     if (!mounted) return;
     ScaffoldMessenger.of(context).showSnackBar(
@@ -164,16 +180,6 @@ Future<void> fetchTransactions() async {
     }
   }
 
-  List<Map<String, dynamic>> getFilteredTransactions() {
-    if (selectedFilter == 'All') {
-      return transactionsData;
-    }
-    return transactionsData.where((transaction) {
-      return transaction['status']?.toString().toLowerCase() == 
-             selectedFilter.toLowerCase();
-    }).toList();
-  }
-
   Future<void> _viewSelectedTransaction() async {
     final selectedTransactionId = selectedItems.entries
         .firstWhere(
@@ -257,7 +263,6 @@ Future<void> fetchTransactions() async {
 
 
   Widget _buildDataTableSection() {
-    final filteredData = getFilteredTransactions();
     return Container(
       decoration: const BoxDecoration(
         color: Colors.white,
@@ -266,41 +271,55 @@ Future<void> fetchTransactions() async {
       child: SingleChildScrollView(
         scrollDirection: Axis.horizontal,
         child: SingleChildScrollView(
-          child: DataTable(
-            columnSpacing: 20,
-            columns: const [
-              DataColumn(label: Text('Customer ID')),
-              DataColumn(label: Text('Recipient Name')),
-              DataColumn(label: Text('Date')),
-              DataColumn(label: Text('Service')),
-              DataColumn(label: Text('Delivery Type')),
-              DataColumn(label: Text('Status')),
-              DataColumn(label: Text('Payment Type')),
-              DataColumn(label: Text('Total Amount')),
+          child: Column(
+            children: [
+              DataTable(
+                columnSpacing: 20,
+                columns: const [
+                  DataColumn(label: Text('Customer ID')),
+                  DataColumn(label: Text('Recipient Name')),
+                  DataColumn(label: Text('Date')),
+                  DataColumn(label: Text('Service')),
+                  DataColumn(label: Text('Delivery Type')),
+                  DataColumn(label: Text('Status')),
+                  DataColumn(label: Text('Payment Type')),
+                  DataColumn(label: Text('Total Amount')),
+                ],
+                rows:
+                    transactionsData.map((data) {
+                      final transactionId = data['transaction_id'];
+                      return DataRow(
+                        selected: selectedItems[transactionId] ?? false,
+                        onSelectChanged: (selected) {
+                          setState(() {
+                            selectedItems[transactionId] = selected ?? false;
+                            isItemSelected = selectedItems.containsValue(true);
+                          });
+                        },
+                        cells: [
+                          DataCell(Text(data['transaction_id'].toString())),
+                          DataCell(Text(data['user_name'] ?? 'N/A')),
+                          DataCell(Text(data['created_at'] ?? 'N/A')),
+                          DataCell(Text(data['service_name'] ?? 'N/A')),
+                          DataCell(Text(data['delivery_type'] ?? 'N/A')),
+                          DataCell(Text(data['status'] ?? 'N/A')),
+                          DataCell(Text(data['payment_method'] ?? 'N/A')),
+                          DataCell(Text('₱${data['total_amount'] ?? '0'}')),
+                        ],
+                      );
+                    }).toList(),
+              ),
+              if (nextCursor != null)
+                Padding(
+                  padding: const EdgeInsets.all(8.0),
+                  child: isLoadingMore
+                      ? const CircularProgressIndicator()
+                      : TextButton(
+                          onPressed: _loadMoreTransactions,
+                          child: const Text('Load more'),
+                        ),
+                ),
             ],
-            rows:
-                filteredData.map((data) {
-                  final transactionId = data['transaction_id'];
-                  return DataRow(
-                    selected: selectedItems[transactionId] ?? false,
-                    onSelectChanged: (selected) {
-                      setState(() {
-                        selectedItems[transactionId] = selected ?? false;
-                        isItemSelected = selectedItems.containsValue(true);
-                      });
-                    },
-                    cells: [
-                      DataCell(Text(data['transaction_id'].toString())),
-                      DataCell(Text(data['user_name'] ?? 'N/A')),
-                      DataCell(Text(data['created_at'] ?? 'N/A')),
-                      DataCell(Text(data['service_name'] ?? 'N/A')),
-                      DataCell(Text(data['delivery_type'] ?? 'N/A')),
-                      DataCell(Text(data['status'] ?? 'N/A')),
-                      DataCell(Text(data['payment_method'] ?? 'N/A')),
-                      DataCell(Text('₱${data['total_amount'] ?? '0'}')),
-                    ],
-                  );
-                }).toList(),
           ),
         ),
       ),
@@ -374,6 +393,7 @@ Future<void> fetchTransactions() async {
         setState(() {
           selectedFilter = selected ? label : 'All';
         });
+        fetchTransactions();
       },
     );
   }
@@ -10,6 +10,7 @@ import '../ProfileShop/ShopProfile.dart';
 import '../CustomerOrder/CustomerOrder.dart';
 import 'notifpage.dart';
 import 'shop_map.dart';
+import '../../user/Transaction/transaction_service.dart';
 
 class DashboardScreen extends StatefulWidget {
   final int userId;
@@ -134,33 +135,34 @@ void _showShopDetails(Map<String, dynamic> shop) {
 
   Future<void> _loadDashboardData() async {
     try {
-      final response = await http.get(
-        Uri.parse('http://localhost:5000/shop_transactions/${widget.shopData['id']}'),
-        headers: {
-          'Authorization': 'Bearer ${widget.token}',
-          'Content-Type': 'application/json',
-        },
-      );
+      // Pages come newest first: stop once a page reaches past today
+      final today = DateTime.now();
+      bool isToday(Map<String, dynamic> t) {
+        final orderDate = DateTime.parse(t['created_at']);
+        return orderDate.year == today.year &&
+              orderDate.month == today.month &&
+              orderDate.day == today.day;
+      }
 
-      if (response.statusCode == 200) {
-        final data = jsonDecode(response.body);
-        final transactions = List<Map<String, dynamic>>.from(data['transactions']);
-        
-        // Calculate today's orders
-        final today = DateTime.now();
-        final todayOrders = transactions.where((t) {
-          final orderDate = DateTime.parse(t['created_at']);
-          return orderDate.year == today.year && 
-                orderDate.month == today.month && 
-                orderDate.day == today.day;
-        }).toList();
+      final transactions = <Map<String, dynamic>>[];
+      String? cursor;
+      do {
+        final page = await TransactionService.fetchTransactionPage(
+          owner: 'shop',
+          ownerId: widget.shopData['id'],
+          token: widget.token,
+          limit: 100,
+          cursor: cursor,
+        );
+        transactions.addAll(page.transactions);
+        cursor = page.nextCursor;
+      } while (cursor != null && isToday(transactions.last));
 
-        setState(() {
-          todayOrderCount = todayOrders.length;
-          recentTransactions = transactions.take(3).toList();
-          isLoading = false;
-        });
-      }
+      setState(() {
+        todayOrderCount = transactions.where(isToday).length;
+        recentTransactions = transactions.take(3).toList();
+        isLoading = false;
+      });
     } catch (e) {
       print('Error loading dashboard data: $e');
       setState(() => isLoading = false);
@@ -1,11 +1,10 @@
 import 'package:flutter/material.dart';
-import 'package:http/http.dart' as http;
-import 'dart:convert';
 import 'laundry_dashboard_screen.dart';
 import '../ProfileUser/UserProfile.dart';
 import 'search_screen.dart';
 import '../../loginscreen.dart';
 import '../History/ActiveTransact.dart';
+import '../Transaction/transaction_service.dart';
 
 class ActivitiesScreen extends StatefulWidget {
   final int userId;
@@ -43,24 +42,16 @@ class _ActivitiesScreenState extends State<ActivitiesScreen> {
   });
 
   try {
-    final response = await http.get(
-      Uri.parse('http://localhost:5000/user_transactions/${widget.userId}'),
-      headers: {
-        'Authorization': 'Bearer ${widget.token}',
-        'Content-Type': 'application/json',
-      },
+    // Newest orders only; the full history lives in PastTransact
+    final page = await TransactionService.fetchTransactionPage(
+      owner: 'user',
+      ownerId: widget.userId,
+      token: widget.token,
     );
-
-    if (response.statusCode == 200) {
-      final data = jsonDecode(response.body);
-      // The backend returns transactions directly in the response
-      setState(() {
-        _recentTransactions = List<Map<String, dynamic>>.from(data['transactions'] ?? []);
-        _isLoading = false;
-      });
-    } else {
-      throw Exception('Failed to load transactions');
-    }
+    setState(() {
+      _recentTransactions = page.transactions;
+      _isLoading = false;
+    });
   } catch (e) {
     setState(() {
       _errorMessage = 'Error: $e';
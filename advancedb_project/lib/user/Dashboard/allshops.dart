@@ -135,43 +135,21 @@ class _AllShopsScreenState extends State<AllShopsScreen> {
         throw Exception('Shop ID is empty');
       }
 
-      final shopResponse = await http.get(
-        Uri.parse('http://localhost:5000/shop/$shopId'),
+      // One round trip for the shop and its whole catalog
+      final response = await http.get(
+        Uri.parse('http://localhost:5000/shop/$shopId/full'),
         headers: {
           'Authorization': 'Bearer ${widget.token}',
           'Content-Type': 'application/json',
         },
       );
 
-      if (shopResponse.statusCode != 200) {
-        throw Exception('Failed to load shop data: ${shopResponse.statusCode}');
+      if (response.statusCode != 200) {
+        throw Exception('Failed to load shop data: ${response.statusCode}');
       }
 
-      final shopData = jsonDecode(shopResponse.body);
-
-      final servicesResponse = await http.get(
-        Uri.parse('http://localhost:5000/shop/$shopId/services'),
-        headers: {
-          'Authorization': 'Bearer ${widget.token}',
-          'Content-Type': 'application/json',
-        },
-      );
-
-      final clothingResponse = await http.get(
-        Uri.parse('http://localhost:5000/shop/$shopId/clothing'),
-        headers: {
-          'Authorization': 'Bearer ${widget.token}',
-          'Content-Type': 'application/json',
-        },
-      );
-
-      final householdResponse = await http.get(
-        Uri.parse('http://localhost:5000/shop/$shopId/household'),
-        headers: {
-          'Authorization': 'Bearer ${widget.token}',
-          'Content-Type': 'application/json',
-        },
-      );
+      final fullData = jsonDecode(response.body);
+      final shopData = fullData['shop'];
 
       return {
         'id': shopId,
@@ -190,20 +168,14 @@ class _AllShopsScreenState extends State<AllShopsScreen> {
         'building': shopData['building'] ?? '',
         'opening_time': shopData['opening_time'] ?? '',
         'closing_time': shopData['closing_time'] ?? '',
-        'services': servicesResponse.statusCode == 200 
-            ? (jsonDecode(servicesResponse.body)['services'] as List).map((service) => {
-                'service_name': service['service_name'],
-                'description': service['description'] ?? '',
-                'price': service['price']?.toString() ?? '0',
-                'color': service['color']?.toString() ?? '0xFF1A0066',
-              }).toList()
-            : [],
-        'clothing_types': clothingResponse.statusCode == 200 
-            ? jsonDecode(clothingResponse.body)['types'] ?? []
-            : [],
-        'household_items': householdResponse.statusCode == 200 
-            ? jsonDecode(householdResponse.body)['items'] ?? []
-            : [],
+        'services': (fullData['services'] as List).map((service) => {
+          'service_name': service['service_name'],
+          'description': service['description'] ?? '',
+          'price': service['price']?.toString() ?? '0',
+          'color': service['color']?.toString() ?? '0xFF1A0066',
+        }).toList(),
+        'clothing_types': fullData['clothing_types'] ?? [],
+        'household_items': fullData['household_items'] ?? [],
       };
     } catch (e) {
       print('Error fetching complete shop data: $e');
@@ -56,7 +56,8 @@ class _SearchScreenState extends State<SearchScreen> {
 
     try {
       final response = await http.get(
-        Uri.parse('http://localhost:5000/shops'),
+        Uri.parse('http://localhost:5000/shops/search')
+            .replace(queryParameters: {'q': query}),
         headers: {
           'Content-Type': 'application/json',
           'Authorization': 'Bearer ${widget.token}',
@@ -65,17 +66,8 @@ class _SearchScreenState extends State<SearchScreen> {
 
       if (response.statusCode == 200) {
         final data = jsonDecode(response.body);
-        final allShops = data is List ? data : data['shops'] as List;
-
-        // Enhanced search filtering
-        final filteredShops = allShops.where((shop) {
-          final shopName = shop['shop_name']?.toString().toLowerCase() ?? '';
-          final location = shop['location']?.toString().toLowerCase() ?? '';
-          final searchQuery = query.toLowerCase();
-          
-          return shopName.contains(searchQuery) || 
-                 location.contains(searchQuery);
-        }).toList();
+        // Filtering happens server-side against the shop search index
+        final filteredShops = data['shops'] as List;
 
         setState(() {
           _searchResults = filteredShops.map((shop) => LaundryShop(
@@ -174,42 +166,21 @@ Future<void> _handleShopTap(LaundryShop shop) async {
 
       print('Fetching shop data for ID: $shopId');
 
-      final shopResponse = await http.get(
-        Uri.parse('http://localhost:5000/shop/$shopId'),
+      // One round trip for the shop and its whole catalog
+      final response = await http.get(
+        Uri.parse('http://localhost:5000/shop/$shopId/full'),
         headers: {
           'Authorization': 'Bearer ${widget.token}',
           'Content-Type': 'application/json',
         },
       );
 
-      if (shopResponse.statusCode != 200) {
-        throw Exception('Failed to load shop data: ${shopResponse.statusCode}');
+      if (response.statusCode != 200) {
+        throw Exception('Failed to load shop data: ${response.statusCode}');
       }
 
-      final shopData = jsonDecode(shopResponse.body);
-      final servicesResponse = await http.get(
-        Uri.parse('http://localhost:5000/shop/$shopId/services'),
-        headers: {
-          'Authorization': 'Bearer ${widget.token}',
-          'Content-Type': 'application/json',
-        },
-      );
-
-      final clothingResponse = await http.get(
-        Uri.parse('http://localhost:5000/shop/$shopId/clothing'),
-        headers: {
-          'Authorization': 'Bearer ${widget.token}',
-          'Content-Type': 'application/json',
-        },
-      );
-
-      final householdResponse = await http.get(
-        Uri.parse('http://localhost:5000/shop/$shopId/household'),
-        headers: {
-          'Authorization': 'Bearer ${widget.token}',
-          'Content-Type': 'application/json',
-        },
-      );
+      final fullData = jsonDecode(response.body);
+      final shopData = fullData['shop'];
 
       return {
         'id': shopId,
@@ -228,20 +199,14 @@ Future<void> _handleShopTap(LaundryShop shop) async {
         'building': shopData['building'] ?? '',
         'opening_time': shopData['opening_time'] ?? '',
         'closing_time': shopData['closing_time'] ?? '',
-        'services': servicesResponse.statusCode == 200 
-            ? (jsonDecode(servicesResponse.body)['services'] as List).map((service) => {
-                'service_name': service['service_name'],
-                'description': service['description'] ?? '',
-                'price': service['price']?.toString() ?? '0',
-                'color': service['color']?.toString() ?? '0xFF1A0066',
-              }).toList()
-            : [],
-        'clothing_types': clothingResponse.statusCode == 200 
-            ? jsonDecode(clothingResponse.body)['types'] ?? []
-            : [],
-        'household_items': householdResponse.statusCode == 200 
-            ? jsonDecode(householdResponse.body)['items'] ?? []
-            : [],
+        'services': (fullData['services'] as List).map((service) => {
+          'service_name': service['service_name'],
+          'description': service['description'] ?? '',
+          'price': service['price']?.toString() ?? '0',
+          'color': service['color']?.toString() ?? '0xFF1A0066',
+        }).toList(),
+        'clothing_types': fullData['clothing_types'] ?? [],
+        'household_items': fullData['household_items'] ?? [],
       };
     } catch (e) {
       print('Error fetching complete shop data: $e');
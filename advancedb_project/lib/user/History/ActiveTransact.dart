@@ -1,9 +1,8 @@
 import 'package:flutter/material.dart';
-import 'package:http/http.dart' as http;
-import 'dart:convert';
 import 'PastTransact.dart';
 import 'DetailTransact.dart';
 import '../../Sockets/socketService.dart';
+import '../Transaction/transaction_service.dart';
 
 class ActiveTransact extends StatefulWidget {
   final int userId;
@@ -35,6 +34,10 @@ class _ActiveTransactState extends State<ActiveTransact> {
     try {
       SocketService.initializeSocket();
       SocketService.joinUserRoom(widget.userId.toString());
+
+      SocketService.listenToResync((_) {
+        if (mounted) _fetchActiveOrders();
+      });
       
       SocketService.listenToStatusUpdates((data) {
         if (!mounted) return;
@@ -94,32 +97,17 @@ class _ActiveTransactState extends State<ActiveTransact> {
   });
 
   try {
-    final response = await http.get(
-      // Changed from /active to filtering in the frontend
-      Uri.parse('http://localhost:5000/user_transactions/${widget.userId}'),
-      headers: {
-        'Authorization': 'Bearer ${widget.token}',
-        'Content-Type': 'application/json',
-      },
+    final activeOrders = await TransactionService.fetchAllTransactions(
+      owner: 'user',
+      ownerId: widget.userId,
+      token: widget.token,
+      status: 'Pending,Processing',
     );
 
-    if (response.statusCode == 200) {
-      final data = jsonDecode(response.body);
-      final allTransactions = List<Map<String, dynamic>>.from(data['data'] ?? []);
-      
-      // Filter active orders (status is 'Processing' or 'Pending')
-      final activeOrders = allTransactions.where((order) {
-        final status = order['status']?.toString().toLowerCase() ?? '';
-        return status == 'processing' || status == 'pending';
-      }).toList();
-
-      setState(() {
-        _activeOrders = activeOrders;
-        _isLoading = false;
-      });
-    } else {
-      throw Exception('Failed to load active orders');
-    }
+    setState(() {
+      _activeOrders = activeOrders;
+      _isLoading = false;
+    });
   } catch (e) {
     setState(() {
       _error = e.toString();
@@ -1,9 +1,8 @@
 import 'package:flutter/material.dart';
-import 'package:http/http.dart' as http;
-import 'dart:convert';
 import 'ActiveTransact.dart';
 import 'DetailTransact.dart';
 import '../ProfileUser/UserProfile.dart';
+import '../Transaction/transaction_service.dart';
 
 class PastTransact extends StatefulWidget {
   final int userId;
@@ -23,6 +22,8 @@ class _PastTransactState extends State<PastTransact> {
   bool _isLoading = false;
   String _error = '';
   List<Map<String, dynamic>> _pastOrders = [];
+  String? _nextCursor;
+  bool _isLoadingMore = false;
 
   @override
   void initState() {
@@ -37,32 +38,18 @@ class _PastTransactState extends State<PastTransact> {
   });
 
   try {
-    final response = await http.get(
-      // Changed from /completed to filtering in the frontend
-      Uri.parse('http://localhost:5000/user_transactions/${widget.userId}'),
-      headers: {
-        'Authorization': 'Bearer ${widget.token}',
-        'Content-Type': 'application/json',
-      },
+    final page = await TransactionService.fetchTransactionPage(
+      owner: 'user',
+      ownerId: widget.userId,
+      token: widget.token,
+      status: 'Completed,Cancelled',
     );
 
-    if (response.statusCode == 200) {
-      final data = jsonDecode(response.body);
-      final allTransactions = List<Map<String, dynamic>>.from(data['data'] ?? []);
-      
-      // Filter completed or cancelled orders
-      final pastOrders = allTransactions.where((order) {
-        final status = order['status']?.toString().toLowerCase() ?? '';
-        return status == 'completed' || status == 'cancelled';
-      }).toList();
-
-      setState(() {
-        _pastOrders = pastOrders;
-        _isLoading = false;
-      });
-    } else {
-      throw Exception('Failed to load past orders');
-    }
+    setState(() {
+      _pastOrders = page.transactions;
+      _nextCursor = page.nextCursor;
+      _isLoading = false;
+    });
   } catch (e) {
     setState(() {
       _error = e.toString();
@@ -71,6 +58,29 @@ class _PastTransactState extends State<PastTransact> {
   }
 }
 
+  Future<void> _loadMorePastOrders() async {
+    setState(() => _isLoadingMore = true);
+    try {
+      final page = await TransactionService.fetchTransactionPage(
+        owner: 'user',
+        ownerId: widget.userId,
+        token: widget.token,
+        status: 'Completed,Cancelled',
+        cursor: _nextCursor,
+      );
+      setState(() {
+        _pastOrders.addAll(page.transactions);
+        _nextCursor = page.nextCursor;
+      });
+    } catch (e) {
+      ScaffoldMessenger.of(context).showSnackBar(
+        SnackBar(content: Text('Failed to load more orders: $e')),
+      );
+    } finally {
+      setState(() => _isLoadingMore = false);
+    }
+  }
+
   String _formatDateTime(String dateTime) {
     try {
       final date = DateTime.parse(dateTime);
@@ -219,7 +229,7 @@ class _PastTransactState extends State<PastTransact> {
                               child: Padding(
                                 padding: const EdgeInsets.all(16.0),
                                 child: Column(
-                                  children: _pastOrders.map((order) {
+                                  children: _pastOrders.map<Widget>((order) {
                                     return Padding(
                                       padding: const EdgeInsets.only(bottom: 16.0),
                                       child: _buildOrderCard(
@@ -233,7 +243,16 @@ class _PastTransactState extends State<PastTransact> {
                                         orderDetails: order,
                                       ),
                                     );
-                                  }).toList(),
+                                  }).toList()
+                                    ..addAll([
+                                      if (_nextCursor != null)
+                                        _isLoadingMore
+                                            ? const CircularProgressIndicator()
+                                            : TextButton(
+                                                onPressed: _loadMorePastOrders,
+                                                child: const Text('Load more'),
+                                              ),
+                                    ]),
                                 ),
                               ),
                             ),
@@ -1,11 +1,31 @@
 import 'dart:convert';
+import 'dart:math';
 import 'package:http/http.dart' as http;
 
+// One page of an order list, newest first. nextCursor fetches the page
+// after it and is null on the last one.
+class TransactionPage {
+  final List<Map<String, dynamic>> transactions;
+  final String? nextCursor;
+
+  const TransactionPage(this.transactions, this.nextCursor);
+}
+
 class TransactionService {
+  static final Random _random = Random.secure();
+
+  // One key per order attempt; reuse it when retrying the same order so
+  // the backend can drop the duplicate instead of creating a second one.
+  static String newIdempotencyKey() {
+    final bytes = List<int>.generate(16, (_) => _random.nextInt(256));
+    return bytes.map((b) => b.toRadixString(16).padLeft(2, '0')).join();
+  }
+
   static Future<Map<String, dynamic>> createTransaction({
     required int userId,
     required Map<String, dynamic> data,
     required String token,
+    String? idempotencyKey,
   }) async {
     try {
       // Add validation checks
@@ -19,11 +39,13 @@ class TransactionService {
           'Content-Type': 'application/json',
           'Accept': 'application/json',
           'Authorization': 'Bearer $token',
+          'Idempotency-Key': idempotencyKey ?? newIdempotencyKey(),
         },
         body: jsonEncode(data),
       );
 
-      if (response.statusCode == 201) {
+      // 202: accepted by the async order pipeline, committed shortly
+      if (response.statusCode == 201 || response.statusCode == 202) {
         final responseData = jsonDecode(response.body);
         print('Transaction created successfully: $responseData'); // Debug log
         return responseData;
@@ -37,4 +59,65 @@ class TransactionService {
       throw Exception('Failed to create transaction: $e');
     }
   }
-}
\ No newline at end of file
+
+  // Pages of /user_transactions or /shop_transactions (owner 'user' or
+  // 'shop'). status takes one status or several joined with commas, so
+  // screens ask for the orders they show instead of filtering everything.
+  static Future<TransactionPage> fetchTransactionPage({
+    required String owner,
+    required Object ownerId,
+    required String token,
+    String? status,
+    int limit = 20,
+    String? cursor,
+  }) async {
+    final response = await http.get(
+      Uri.parse('http://localhost:5000/${owner}_transactions/$ownerId').replace(
+        queryParameters: {
+          'limit': '$limit',
+          if (status != null) 'status': status,
+          if (cursor != null) 'cursor': cursor,
+        },
+      ),
+      headers: {
+        'Authorization': 'Bearer $token',
+        'Content-Type': 'application/json',
+      },
+    );
+
+    if (response.statusCode != 200) {
+      throw Exception('Failed to load transactions: ${response.statusCode}');
+    }
+    final data = jsonDecode(response.body);
+    // The user list comes back under 'data', the shop list under 'transactions'
+    final rows = data[owner == 'user' ? 'data' : 'transactions'] ?? [];
+    return TransactionPage(
+      List<Map<String, dynamic>>.from(rows),
+      data['next_cursor'],
+    );
+  }
+
+  // Every page of a list that stays short, like a customer's open orders.
+  static Future<List<Map<String, dynamic>>> fetchAllTransactions({
+    required String owner,
+    required Object ownerId,
+    required String token,
+    String? status,
+  }) async {
+    final transactions = <Map<String, dynamic>>[];
+    String? cursor;
+    do {
+      final page = await fetchTransactionPage(
+        owner: owner,
+        ownerId: ownerId,
+        token: token,
+        status: status,
+        limit: 100,
+        cursor: cursor,
+      );
+      transactions.addAll(page.transactions);
+      cursor = page.nextCursor;
+    } while (cursor != null);
+    return transactions;
+  }
+}